@@ -0,0 +1,7 @@
+"""
+Standalone performance benchmarks. Run from backend/, e.g. python -m benchmarks.wal_concurrency
+
+    python -m benchmarks.endpoints --out baseline.json   # endpoint latency, throughput, peak RSS
+    python -m benchmarks.endpoints --compare baseline.json
+    python -m benchmarks.tenants --tenants 1 4 8          # shared database vs per-tenant shards
+"""
@@ -0,0 +1,94 @@
+"""
+Compare two benchmarks.endpoints result files and flag regressions.
+
+A (scenario, size) pair regresses when a metric is worse than the baseline by
+more than the tolerance (relative) and by more than the metric's noise floor
+(absolute), so sub-millisecond jitter on fast endpoints is not reported.
+Runs on different machines, Python or SQLite versions, or DB modes are
+compared anyway, with a warning.
+
+    python -m benchmarks.compare baseline.json results.json --tolerance 0.15
+"""
+import json
+from typing import Dict, List, NamedTuple
+
+
+class Metric(NamedTuple):
+    higher_is_better: bool
+    noise_floor: float
+
+
+METRICS: Dict[str, Metric] = {
+    "p50_ms": Metric(False, 1.0),
+    "p95_ms": Metric(False, 2.0),
+    "rows_per_second": Metric(True, 0.0),
+    "peak_rss_mib": Metric(False, 8.0),
+}
+# Differences here make the timings of two runs hard to compare
+ENVIRONMENT = ("db_mode", "sqlite_profile", "python", "sqlite", "platform", "seed")
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> List[dict]:
+    """One row per (scenario, size, metric) present in both runs."""
+    previous = {(r["scenario"], r["size"]): r for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        base = previous.get((r["scenario"], r["size"]))
+        if base is None:
+            continue
+        for metric, spec in METRICS.items():
+            old, new = base.get(metric), r.get(metric)
+            if not old or new is None:   # e.g. peak RSS unavailable on the platform
+                continue
+            worse_by = (old - new) if spec.higher_is_better else (new - old)
+            change = (new - old) / old
+            rows.append({
+                "scenario": r["scenario"],
+                "size": r["size"],
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change": round(change, 3),
+                "regression": worse_by > spec.noise_floor and worse_by / old > tolerance,
+            })
+    return rows
+
+
+def environment_warnings(baseline: dict, current: dict) -> List[str]:
+    old, new = baseline.get("meta", {}), current.get("meta", {})
+    return [
+        f"{key} differs: {old.get(key)} (baseline) vs {new.get(key)}"
+        for key in ENVIRONMENT
+        if old.get(key) != new.get(key)
+    ]
+
+
+def print_comparison(baseline: dict, current: dict, rows: List[dict]):
+    for warning in environment_warnings(baseline, current):
+        print(f"warning: {warning}")
+    print(f"baseline {baseline.get('meta', {}).get('git_commit')} -> current {current.get('meta', {}).get('git_commit')}")
+    for r in rows:
+        flag = "REGRESSION" if r["regression"] else ""
+        print(f"{r['scenario']:>20} {r['size']:>9} {r['metric']:>16} "
+              f"{r['baseline']:>12} -> {r['current']:<12} {r['change']:+8.1%}  {flag}")
+    regressions = sum(r["regression"] for r in rows)
+    print(f"{regressions} regression(s) in {len(rows)} comparisons")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Flag regressions between two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.tolerance)
+    print_comparison(baseline, current, rows)
+    if any(r["regression"] for r in rows):
+        raise SystemExit(1)
@@ -0,0 +1,356 @@
+"""
+Latency, throughput and peak RSS of the main endpoints at several library sizes.
+
+For each size a temporary database is seeded with benchmarks.generator data
+(same seed, same library on every run and commit). Each scenario then drives
+the FastAPI app in-process through starlette's TestClient, in its own spawned
+process and on its own copy of the seeded database: its peak RSS is its own,
+and writes by the import scenarios do not leak into the next one. The response
+cache is off, so reads measure the work behind a cache miss.
+
+    get_books            GET  /api/books, following X-Next-Cursor (wraps around)
+    get_books_filtered   GET  /api/books?genre=Fiction
+    export_json          GET  /api/json (the JSON export)
+    import_json          POST /api/import/json, replace=true, the whole library
+    import_goodreads     POST /api/import/goodreads into an emptied library
+
+Results (with the run's seed, Python, SQLite and git commit) are printed and,
+with --out, written as JSON; --compare checks them against a stored run
+(see benchmarks.compare) and exits 1 on a regression.
+
+    python -m benchmarks.endpoints --sizes 1000 100000 --out baseline.json
+    python -m benchmarks.endpoints --sizes 1000 100000 --compare baseline.json
+    python -m benchmarks.endpoints --sizes 1000000 --scenarios get_books export_json --repeat 2
+"""
+import argparse
+import gc
+import io
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks import generator
+
+PAGE_SIZE = 500
+
+# Read before the app is imported: config takes its settings from the environment
+BENCH_ENV = {
+    "BOOKTRACKER_CACHE_BACKEND": "off",
+    "BOOKTRACKER_CHANGELOG_COMPACT_INTERVAL": "0",
+}
+
+
+# ─── Peak RSS ────────────────────────────────────────────────────────────────
+# Linux can reset the high-water mark, so a scenario's peak excludes building
+# its payload; elsewhere the process-lifetime peak from getrusage is reported.
+
+def _status_kib(field: str) -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _rss_mib() -> Optional[float]:
+    kib = _status_kib("VmRSS")
+    return round(kib / 1024, 1) if kib is not None else None
+
+
+def _peak_rss_mib() -> Optional[float]:
+    kib = _status_kib("VmHWM")
+    if kib is None:
+        try:
+            import resource
+        except ImportError:   # Windows
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        kib = peak // 1024 if sys.platform == "darwin" else peak   # bytes on macOS
+    return round(kib / 1024, 1)
+
+
+# ─── Scenarios ───────────────────────────────────────────────────────────────
+# A scenario builds its payload up front and returns its steps: callables that
+# make one request and return (seconds, rows), seconds None for untimed setup.
+
+Step = Callable[[], Tuple[Optional[float], int]]
+
+
+def _timed(request: Callable[[], object]):
+    t0 = time.perf_counter()
+    response = request()
+    took = time.perf_counter() - t0
+    if response.status_code != 200:
+        raise SystemExit(f"{response.request.method} {response.request.url}: {response.status_code} {response.text[:200]}")
+    return took, response
+
+
+def _pages(client, params: dict, requests: int) -> List[Step]:
+    cursor = None
+
+    def page():
+        nonlocal cursor
+        query = {**params, "limit": PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+        took, response = _timed(lambda: client.get("/api/books", params=query))
+        cursor = response.headers.get("X-Next-Cursor")   # None after the last page: start over
+        return took, len(response.json())
+
+    return [page] * requests
+
+
+def get_books(client, size: int, args) -> List[Step]:
+    return _pages(client, {}, args.requests)
+
+
+def get_books_filtered(client, size: int, args) -> List[Step]:
+    return _pages(client, {"genre": "Fiction"}, args.requests)
+
+
+def export_json(client, size: int, args) -> List[Step]:
+    def export():
+        return _timed(lambda: client.get("/api/json"))[0], size
+
+    return [export] * args.repeat
+
+
+def import_json(client, size: int, args) -> List[Step]:
+    library = generator.generate_library(size, args.seed)
+    body = json.dumps({"readings": library.books, "author_profiles": library.authors, "replace": True}).encode()
+    headers = {"Content-Type": "application/json"}
+
+    def post():
+        return _timed(lambda: client.post("/api/import/json", content=body, headers=headers))[0], size
+
+    return [post] * args.repeat
+
+
+def import_goodreads(client, size: int, args) -> List[Step]:
+    authors = generator.generate_authors(generator.author_count(size), args.seed)
+    out = io.StringIO()
+    generator.write_goodreads_csv(generator.generate_books(size, args.seed, authors), out)
+    body = out.getvalue().encode("utf-8")
+
+    def empty():
+        _timed(lambda: client.delete("/api/books/all"))
+        return None, 0
+
+    def post():
+        files = {"file": ("goodreads_library_export.csv", body, "text/csv")}
+        return _timed(lambda: client.post("/api/import/goodreads", files=files))[0], size
+
+    return [empty, post] * args.repeat
+
+
+SCENARIOS: Dict[str, Tuple[str, Callable[..., List[Step]]]] = {
+    "get_books": ("GET /api/books", get_books),
+    "get_books_filtered": ("GET /api/books?genre=", get_books_filtered),
+    "export_json": ("GET /api/json", export_json),
+    "import_json": ("POST /api/import/json", import_json),
+    "import_goodreads": ("POST /api/import/goodreads", import_goodreads),
+}
+
+
+def _drive(steps: List[Step]) -> Tuple[List[float], int, float]:
+    """Run the steps: (latencies in ms, rows, seconds spent in timed requests)."""
+    latencies, rows, elapsed = [], 0, 0.0
+    for step in steps:
+        took, step_rows = step()
+        if took is None:
+            continue
+        latencies.append(took * 1000)
+        elapsed += took
+        rows += step_rows
+    return latencies, rows, elapsed
+
+
+# ─── Child processes ─────────────────────────────────────────────────────────
+
+def _seed(size: int, seed: int, results):
+    from types import SimpleNamespace
+
+    from database import SessionLocal, engine, init_db
+    from models import ReadingGoal
+    from utils.importer import bulk_import_books
+
+    init_db()
+    library = generator.generate_library(size, seed)
+    with SessionLocal() as db:
+        bulk_import_books(
+            db,
+            (SimpleNamespace(**b) for b in library.books),
+            [SimpleNamespace(**a) for a in library.authors],
+        )
+        db.add_all(ReadingGoal(**g) for g in library.goals)
+        db.commit()
+    engine.dispose()   # checkpoints the WAL into the file that gets copied
+    results.put(None)
+
+
+def _run_scenario(name: str, size: int, args, results):
+    from starlette.testclient import TestClient
+
+    from benchmarks.wal_concurrency import _percentile
+    from main import app
+
+    with TestClient(app) as client:
+        steps = SCENARIOS[name][1](client, size, args)   # payloads are built here, before the RSS baseline
+        _drive(_pages(client, {}, 1))   # warm up imports, the connection pool and the statement cache
+        gc.collect()
+        base_rss = _rss_mib()
+        _reset_peak_rss()
+        latencies, rows, elapsed = _drive(steps)
+        peak_rss = _peak_rss_mib()
+    results.put({
+        "scenario": name,
+        "endpoint": SCENARIOS[name][0],
+        "size": size,
+        "requests": len(latencies),
+        "rows": rows,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "max_ms": round(max(latencies), 2),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "rows_per_second": round(rows / elapsed, 1),
+        "base_rss_mib": base_rss,
+        "peak_rss_mib": peak_rss,
+    })
+
+
+def _in_child(target, *args):
+    """Run target in a fresh interpreter (spawn: no inherited heap) and return what it put in the queue."""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=target, args=(*args, results))
+    proc.start()
+    while True:
+        try:
+            result = results.get(timeout=1)
+            break
+        except queue.Empty:
+            if not proc.is_alive():   # died before reporting; its traceback is on stderr
+                raise SystemExit(f"{target.__name__}{args[:2]} failed with exit code {proc.exitcode}")
+    proc.join()
+    return result
+
+
+# ─── Runner ──────────────────────────────────────────────────────────────────
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    os.environ.update(BENCH_ENV, BOOKTRACKER_DB_MODE=args.db_mode)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["BOOKTRACKER_ASSET_DIR"] = os.path.join(tmp, "assets")
+        for size in args.sizes:
+            seeded = os.path.join(tmp, f"seed-{size}.db")
+            os.environ["BOOKTRACKER_DATABASE_URL"] = f"sqlite:///{seeded}"
+            t0 = time.perf_counter()
+            _in_child(_seed, size, args.seed)
+            print(f"seeded {size} books in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+            for name in args.scenarios:
+                db_path = os.path.join(tmp, f"run-{size}.db")
+                shutil.copyfile(seeded, db_path)
+                os.environ["BOOKTRACKER_DATABASE_URL"] = f"sqlite:///{db_path}"
+                result = _in_child(_run_scenario, name, size, args)
+                print(f"  {name}: p50 {result['p50_ms']} ms", file=sys.stderr)
+                results.append(result)
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(db_path + suffix):
+                        os.remove(db_path + suffix)
+            os.remove(seeded)
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "seed": args.seed,
+            "sizes": args.sizes,
+            "db_mode": args.db_mode,
+            "sqlite_profile": os.getenv("BOOKTRACKER_SQLITE_PROFILE", "performance"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def print_table(results: List[dict]):
+    columns = ["scenario", "size", "requests", "p50_ms", "p95_ms", "p99_ms",
+               "requests_per_second", "rows_per_second", "peak_rss_mib"]
+    print("  ".join(f"{c:>20}" for c in columns))
+    for r in results:
+        print("  ".join(f"{str(r[c]):>20}" for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="books in the library")
+    parser.add_argument("--seed", type=int, default=1, help="generator seed")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="page requests per listing scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each export/import scenario")
+    parser.add_argument("--db-mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--out", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to check this run against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown with --compare")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(report["results"])
+
+    if args.compare:
+        from benchmarks.compare import compare, print_comparison
+
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(baseline, report, args.tolerance)
+        print()
+        print_comparison(baseline, report, rows)
+        if any(r["regression"] for r in rows):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
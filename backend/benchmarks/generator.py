@@ -0,0 +1,241 @@
+"""
+Seeded synthetic library: books, author profiles, reading goals and Goodreads CSVs.
+
+The same seed and size always produce the same library, so benchmark runs on
+different commits measure the same data. The shape follows a real reading
+history rather than uniform noise: a few prolific authors and a long tail
+(Zipf-like), genres that mostly follow the author, page counts around 300 with
+a long right tail, more books in recent years, series titles that the saga
+parser groups, books still being read or on the wishlist, academic reading,
+collections, ratings skewed towards 4.
+
+    python -m benchmarks.generator --books 100000 --seed 7 --json library.json
+    python -m benchmarks.generator --books 100000 --seed 7 --goodreads goodreads.csv
+"""
+import csv
+import json
+import random
+import uuid
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import IO, Dict, Iterator, List, NamedTuple
+
+GENRES = [
+    "Fiction", "Fantasy", "Science Fiction", "Mystery", "Thriller", "History",
+    "Philosophy", "Science", "Biography", "Poetry", "Horror", "Essay",
+]
+# (nationality, weight)
+NATIONALITIES = [
+    ("United States", 30), ("United Kingdom", 15), ("Spain", 10), ("Argentina", 6),
+    ("France", 7), ("Japan", 6), ("Russia", 5), ("Germany", 5), ("Colombia", 4),
+    ("Italy", 4), ("Mexico", 3), ("Nigeria", 2), ("Poland", 2), ("Chile", 1),
+]
+FIRST_NAMES = [
+    "Ana", "Jorge", "Ursula", "Haruki", "Clarice", "Fyodor", "Octavia", "Italo",
+    "Chimamanda", "Olga", "Gabriel", "Mary", "Samuel", "Isabel", "Kazuo", "Virginia",
+    "Roberto", "Toni", "Stanislaw", "Elena", "Julio", "Margaret", "Terry", "Leo",
+]
+LAST_NAMES = [
+    "Borges", "Le Guin", "Murakami", "Lispector", "Dostoevsky", "Butler", "Calvino",
+    "Adichie", "Tokarczuk", "Garcia", "Shelley", "Beckett", "Allende", "Ishiguro",
+    "Woolf", "Bolano", "Morrison", "Lem", "Ferrante", "Cortazar", "Atwood", "Pratchett",
+    "Tolstoy", "Matute", "Saramago", "Highsmith",
+]
+TITLE_WORDS = [
+    "Shadow", "River", "Garden", "Night", "Library", "Winter", "Glass", "Memory",
+    "Island", "Silence", "Empire", "Mirror", "Labyrinth", "Harvest", "Storm", "Letters",
+    "City", "Dream", "Stone", "Lighthouse", "Hunger", "Orchard", "Fire", "Station",
+]
+COLLECTIONS = ["Book Club", "Favourites 2023", "Summer", "Re-read", "Gifts", "Audiobooks", "Classics"]
+ACADEMIC_FIELDS = ["Mathematics", "Computer Science", "Linguistics", "Economics", "Biology"]
+# star rating -> weight; None = unrated
+RATINGS = [(None, 20), (1.0, 2), (2.0, 6), (3.0, 20), (3.5, 8), (4.0, 26), (4.5, 8), (5.0, 10)]
+# (status, weight); only completed books have a date_finished
+STATUSES = [("completed", 88), ("reading", 3), ("want-to-read", 7), ("abandoned", 2)]
+
+HISTORY_YEARS = 25
+LAST_DAY = date(2025, 12, 31)   # fixed so the data does not depend on the day it is generated
+
+
+class Library(NamedTuple):
+    authors: List[dict]     # AuthorProfileCreate payloads
+    books: List[dict]       # BookCreate payloads
+    goals: List[dict]       # ReadingGoalCreate payloads
+
+
+def _weighted(rng: random.Random, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def author_count(books: int) -> int:
+    return max(10, books // 8)
+
+
+def generate_authors(count: int, seed: int) -> List[dict]:
+    rng = random.Random(f"{seed}-authors")
+    authors, seen = [], set()
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        name = f"{first} {last}"
+        if name in seen:
+            name = f"{first} {chr(65 + rng.randrange(26))}. {last}"
+        if name in seen:
+            name = f"{first} {last} {i}"
+        seen.add(name)
+        authors.append({
+            "name": name,
+            "nationality": _weighted(rng, NATIONALITIES),
+            "primary_genre": rng.choice(GENRES),
+            "favorite_book": None,
+            "bio": None,
+        })
+    return authors
+
+
+def _title(rng: random.Random) -> str:
+    words = rng.sample(TITLE_WORDS, rng.choice((1, 2, 2, 3)))
+    shape = rng.random()
+    if shape < 0.5:
+        return "The " + " of ".join(words) if len(words) > 1 else f"The {words[0]}"
+    if shape < 0.8:
+        return " and ".join(words)
+    return f"{words[0]}: {' '.join(words[1:]) or 'A Novel'}"
+
+
+def _finished_on(rng: random.Random) -> date:
+    # Triangular towards LAST_DAY: recent years hold more books
+    days = int(rng.triangular(0, HISTORY_YEARS * 365, 0))
+    return LAST_DAY - timedelta(days=days)
+
+
+def generate_books(count: int, seed: int, authors: List[dict]) -> Iterator[dict]:
+    """Yield `count` BookCreate payloads; unique by id and by (title, author), as imports require."""
+    rng = random.Random(f"{seed}-books")
+    # Zipf-like author popularity: weight 1/rank
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(authors))))
+    seen = set()
+    series: Dict[str, List] = {}   # author -> [series name, next volume]
+
+    for i in range(count):
+        author = rng.choices(authors, cum_weights=cum_weights)[0]
+        name = author["name"]
+        if rng.random() < 0.15:
+            entry = series.get(name)
+            if entry is None or rng.random() < 0.3:
+                entry = series[name] = [rng.choice(TITLE_WORDS) + " Cycle", 1]
+            title = f"{_title(rng)} ({entry[0]}, #{entry[1]})"
+            entry[1] += 1
+        else:
+            title = _title(rng)
+        if (title, name) in seen:
+            title = f"{title} {i}"
+        seen.add((title, name))
+
+        status = _weighted(rng, STATUSES)
+        finished = _finished_on(rng)
+        pages = min(1500, max(40, int(rng.lognormvariate(5.7, 0.45))))
+        reading_type = _weighted(rng, [("complete", 90), ("academic", 7), ("reference", 3)])
+        academic = reading_type == "academic"
+        total_chapters = rng.randint(8, 30) if academic else None
+
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "title": title,
+            "author": name,
+            "pages": pages,
+            "genre": author["primary_genre"] if rng.random() < 0.7 else rng.choice(GENRES),
+            "nationality": author["nationality"],
+            # books.date_finished is NOT NULL: unfinished books carry an empty date
+            "date_finished": finished.isoformat() if status == "completed" else "",
+            "timestamp": None,
+            "rating": _weighted(rng, RATINGS) if status == "completed" else None,
+            "collections": rng.sample(COLLECTIONS, _weighted(rng, [(0, 70), (1, 22), (2, 8)])),
+            "isbn": f"978{rng.randrange(10**10):010d}" if rng.random() < 0.7 else None,
+            "year_published": max(1600, finished.year - int(rng.expovariate(1 / 15))),
+            "read_count": 2 if rng.random() < 0.05 else 1,
+            "cover_url": None,
+            "notes": "Generated note. " * rng.randint(1, 20) if rng.random() < 0.1 else None,
+            "start_date": (finished - timedelta(days=rng.randint(1, 60))).isoformat(),
+            "favorite": rng.random() < 0.05,
+            "reading_type": reading_type,
+            "academic_field": rng.choice(ACADEMIC_FIELDS) if academic else None,
+            "academic_level": rng.choice(("undergraduate", "graduate")) if academic else None,
+            "chapters_read": sorted(rng.sample(range(1, total_chapters + 1), rng.randint(1, total_chapters)))
+            if academic else None,
+            "total_chapters": total_chapters,
+            "status": status,
+        }
+
+
+def generate_goals(books: int, seed: int) -> List[dict]:
+    rng = random.Random(f"{seed}-goals")
+    per_year = max(1, books // HISTORY_YEARS)
+    return [
+        {"year": year, "target_books": max(1, int(per_year * rng.uniform(0.6, 1.4)))}
+        for year in range(LAST_DAY.year - HISTORY_YEARS + 1, LAST_DAY.year + 2)
+    ]
+
+
+def generate_library(books: int, seed: int) -> Library:
+    authors = generate_authors(author_count(books), seed)
+    return Library(authors, list(generate_books(books, seed, authors)), generate_goals(books, seed))
+
+
+# ─── Goodreads export format ─────────────────────────────────────────────────
+
+GOODREADS_HEADER = [
+    "Book Id", "Title", "Author", "Author l-f", "Additional Authors", "ISBN", "ISBN13",
+    "My Rating", "Average Rating", "Publisher", "Binding", "Number of Pages",
+    "Year Published", "Original Publication Year", "Date Read", "Date Added",
+    "Bookshelves", "Bookshelves with positions", "Exclusive Shelf", "My Review",
+]
+_SHELVES = {"completed": "read", "reading": "currently-reading", "want-to-read": "to-read", "abandoned": "read"}
+
+
+def goodreads_row(number: int, book: dict) -> list:
+    first, _, last = book["author"].partition(" ")
+    isbn13 = book["isbn"]
+    added = book["start_date"].replace("-", "/")
+    return [
+        1_000_000 + number, book["title"], book["author"], f"{last}, {first}", "",
+        # Goodreads quotes ISBNs as spreadsheet formulas
+        f'="{isbn13[3:]}"' if isbn13 else '=""', f'="{isbn13}"' if isbn13 else '=""',
+        int(book["rating"] or 0), "3.91", "", "Paperback", book["pages"],
+        book["year_published"], book["year_published"],
+        (book["date_finished"] or "").replace("-", "/"), added,
+        book["genre"], f"{book['genre']} (#{number + 1})", _SHELVES[book["status"]], book["notes"] or "",
+    ]
+
+
+def write_goodreads_csv(books, out: IO[str]) -> int:
+    """Write books as a Goodreads "library export" CSV; returns the number of rows."""
+    writer = csv.writer(out)
+    writer.writerow(GOODREADS_HEADER)
+    count = 0
+    for count, book in enumerate(books, 1):
+        writer.writerow(goodreads_row(count, book))
+    return count
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write a synthetic library.")
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="/api/import/json payload (books + author profiles + goals)")
+    parser.add_argument("--goodreads", metavar="PATH", help="Goodreads CSV export of the same books")
+    args = parser.parse_args()
+    if not args.json and not args.goodreads:
+        parser.error("give --json and/or --goodreads")
+
+    if args.json:
+        library = generate_library(args.books, args.seed)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"readings": library.books, "author_profiles": library.authors,
+                       "goals": library.goals}, f)
+    if args.goodreads:
+        authors = generate_authors(author_count(args.books), args.seed)
+        with open(args.goodreads, "w", encoding="utf-8", newline="") as f:
+            write_goodreads_csv(generate_books(args.books, args.seed, authors), f)
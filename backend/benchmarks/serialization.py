@@ -0,0 +1,118 @@
+"""
+Serialization cost of one /api/books page, regular path vs fast path.
+
+    regular   ORM objects -> book_to_dict -> List[BookResponse] validation -> json.dumps
+              (what get_books did before utils.serialization)
+    stdlib    tuple rows -> utils.serialization, stdlib encoder
+    orjson    tuple rows -> utils.serialization, orjson encoder (skipped when unavailable)
+
+Every path runs the same page query on a seeded temporary database and must
+produce the same JSON; the timings include the query.
+
+    python -m benchmarks.serialization --rows 20000 --limit 2000 --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import sessionmaker
+
+import models  # noqa: F401 – registers the tables on Base.metadata
+from benchmarks.wal_concurrency import _readings
+from database import Base, create_sqlite_engine
+from routers.books import list_statements
+from schemas import BookResponse
+from utils import serialization
+from utils.helpers import BOOK_FIELDS, book_to_dict
+from utils.importer import bulk_import_books
+
+_BOOK_LIST = TypeAdapter(List[BookResponse])
+
+
+def regular_path(db, limit: int) -> bytes:
+    _, stmt = list_statements(None, None, None, None, limit, None)
+    books = db.execute(stmt).scalars().all()
+    content = _BOOK_LIST.dump_python(_BOOK_LIST.validate_python([book_to_dict(b) for b in books]), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(db, limit: int, encoder: str) -> bytes:
+    fields = list(BOOK_FIELDS)
+    _, stmt = list_statements(None, None, None, None, limit, fields)
+    rows = db.execute(stmt).all()
+    if encoder == "orjson":
+        return serialization._encode_orjson(rows, fields)
+    return serialization._encode_stdlib(rows, fields)
+
+
+def _time(fn, repeat: int):
+    fn()   # warm up caches and the statement cache
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        body = fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return body, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="books in the database")
+    parser.add_argument("--limit", type=int, default=2000, help="page size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    paths = {"regular": lambda db: regular_path(db, args.limit)}
+    paths["stdlib"] = lambda db: fast_path(db, args.limit, "stdlib")
+    if serialization.ENCODER == "orjson":
+        paths["orjson"] = lambda db: fast_path(db, args.limit, "orjson")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_sqlite_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        with Session() as db:
+            bulk_import_books(db, _readings(0, args.rows))
+            db.commit()
+
+        expected = None
+        for name, path in paths.items():
+            with Session() as db:
+                body, timings = _time(lambda: path(db), args.repeat)
+            decoded = json.loads(body)
+            if expected is None:
+                expected = decoded
+            elif decoded != expected:
+                raise SystemExit(f"{name} output differs from the regular path")
+            results.append({
+                "path": name,
+                "rows": len(decoded),
+                "median_ms": round(statistics.median(timings), 2),
+                "min_ms": round(min(timings), 2),
+                "rows_per_second": round(len(decoded) / (statistics.median(timings) / 1000)),
+                "bytes": len(body),
+            })
+        engine.dispose()
+
+    baseline = results[0]["median_ms"]
+    for r in results:
+        r["speedup"] = round(baseline / r["median_ms"], 2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    columns = list(results[0])
+    print("  ".join(f"{c:>16}" for c in columns))
+    for r in results:
+        print("  ".join(f"{str(r[c]):>16}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
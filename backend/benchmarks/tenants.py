@@ -0,0 +1,107 @@
+"""
+Write throughput of N concurrent tenants: one shared database vs one shard each.
+
+Each writer process stands for one tenant importing books in committed
+batches (the /api/import/json path). In "shared" layout every writer commits
+to the same file and queues on its single write lock; in "sharded" layout
+(BOOKTRACKER_TENANCY=multi) each writes its own <tenant>.db. We report total
+rows/s, the slowest commit and lock errors per layout and tenant count.
+
+    python -m benchmarks.tenants --tenants 1 2 4 8 --rows 20000 --batch 500
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.wal_concurrency import _readings
+from database import create_sqlite_engine
+from migrations import migrate
+from utils.importer import bulk_import_books
+
+LAYOUTS = ("shared", "sharded")
+
+
+def _writer(db_path: str, tenant: int, rows: int, batch: int, start, results):
+    engine = create_sqlite_engine(f"sqlite:///{db_path}")
+    Session = sessionmaker(bind=engine, autoflush=False)
+    slowest, errors = 0.0, 0
+    first = tenant * rows   # distinct ids, so shared-layout tenants do not collide
+    start.wait()
+    with Session() as db:
+        for offset in range(first, first + rows, batch):
+            t0 = time.perf_counter()
+            try:
+                bulk_import_books(db, _readings(offset, min(batch, first + rows - offset)))
+                db.commit()
+            except OperationalError:
+                db.rollback()
+                errors += 1
+                continue
+            slowest = max(slowest, time.perf_counter() - t0)
+    engine.dispose()
+    results.put((slowest, errors))
+
+
+def run_layout(layout: str, tenants: int, rows: int, batch: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, "shared.db" if layout == "shared" else f"tenant-{i}.db") for i in range(tenants)]
+        for path in set(paths):
+            engine = create_sqlite_engine(f"sqlite:///{path}")
+            migrate(engine)
+            engine.dispose()
+
+        start = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_writer, args=(paths[i], i, rows, batch, start, results))
+            for i in range(tenants)
+        ]
+        for w in workers:
+            w.start()
+        time.sleep(0.5)  # let every writer connect before the clock starts
+
+        started = time.perf_counter()
+        start.set()
+        outcomes = [results.get() for _ in workers]
+        elapsed = time.perf_counter() - started
+        for w in workers:
+            w.join()
+
+    return {
+        "layout": layout,
+        "tenants": tenants,
+        "rows_per_second": round(tenants * rows / elapsed, 1),
+        "slowest_commit_ms": round(max(s for s, _ in outcomes) * 1000, 1),
+        "lock_errors": sum(e for _, e in outcomes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, nargs="+", default=[1, 2, 4, 8], help="concurrent writers")
+    parser.add_argument("--rows", type=int, default=20000, help="books imported by each tenant")
+    parser.add_argument("--batch", type=int, default=500, help="rows per import transaction")
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=list(LAYOUTS))
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = [
+        run_layout(layout, n, args.rows, args.batch) for n in args.tenants for layout in args.layouts
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    columns = list(results[0])
+    print("  ".join(f"{c:>18}" for c in columns))
+    for r in results:
+        print("  ".join(f"{str(r[c]):>18}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
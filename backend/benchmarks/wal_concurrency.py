@@ -0,0 +1,153 @@
+"""
+Read concurrency during a bulk import, per SQLite profile.
+
+The main process imports books in committed batches (the same path as
+/api/import/json) while reader processes keep paging through /api/books-style
+queries. Readers are separate processes, like uvicorn workers, so the GIL
+does not mask lock contention. For each profile in config.SQLITE_PROFILES (plus "legacy", the
+pre-profile engine with no pragmas at all) we report reader latency
+percentiles, reads/s, lock errors and writer throughput.
+
+    python -m benchmarks.wal_concurrency --seed 20000 --import-rows 50000 --readers 4
+"""
+import argparse
+import json
+import os
+import multiprocessing
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import models  # noqa: F401 – registers the tables on Base.metadata
+from config import SQLITE_PROFILES
+from database import Base, create_sqlite_engine
+from routers.books import list_statements
+from utils.importer import bulk_import_books
+
+# The engine as it was before profiles existed: rollback journal, no busy timeout
+PROFILES = {"legacy": {}, **SQLITE_PROFILES}
+
+GENRES = ["Fiction", "History", "Philosophy", "Science", "Fantasy", "Poetry"]
+
+
+def _readings(start: int, count: int):
+    for i in range(start, start + count):
+        yield SimpleNamespace(
+            id=f"bench-{i}", title=f"Book {i}", author=f"Author {i % 997}", pages=100 + i % 700,
+            genre=GENRES[i % len(GENRES)], nationality="Nowhere",
+            date_finished=f"{2000 + i % 25}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            timestamp=None, rating=float(i % 6) or None, collections=[], isbn=None,
+            year_published=None, read_count=None, cover_url=None, notes=None, start_date=None,
+            favorite=False, reading_type=None, academic_field=None, academic_level=None,
+            chapters_read=None, total_chapters=None, status=None,
+        )
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _reader(db_path: str, profile: str, done, results):
+    engine = create_sqlite_engine(f"sqlite:///{db_path}", PROFILES[profile])
+    Session = sessionmaker(bind=engine, autoflush=False)
+    latencies, errors = [], 0
+    with Session() as db:
+        while not done.is_set():
+            count_stmt, page_stmt = list_statements("Fiction", None, None, None, 100, None)
+            t0 = time.perf_counter()
+            try:
+                db.execute(count_stmt).scalar()
+                db.execute(page_stmt).scalars().all()
+                db.rollback()  # end the read transaction so WAL checkpoints can proceed
+            except OperationalError:
+                db.rollback()
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - t0) * 1000)
+    engine.dispose()
+    results.put((latencies, errors))
+
+
+def run_profile(profile: str, seed: int, import_rows: int, batch: int, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        engine = create_sqlite_engine(f"sqlite:///{db_path}", PROFILES[profile])
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        with Session() as db:
+            bulk_import_books(db, _readings(0, seed))
+            db.commit()
+
+        done = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_reader, args=(db_path, profile, done, results))
+            for _ in range(readers)
+        ]
+        for w in workers:
+            w.start()
+        time.sleep(0.5)  # let the readers connect before the import starts
+
+        write_started = time.perf_counter()
+        with Session() as db:
+            for start in range(seed, seed + import_rows, batch):
+                bulk_import_books(db, _readings(start, min(batch, seed + import_rows - start)))
+                db.commit()
+        write_elapsed = time.perf_counter() - write_started
+
+        done.set()
+        latencies, errors = [], 0
+        for _ in workers:
+            worker_latencies, worker_errors = results.get()
+            latencies.extend(worker_latencies)
+            errors += worker_errors
+        for w in workers:
+            w.join()
+        engine.dispose()
+
+    return {
+        "profile": profile,
+        "reads": len(latencies),
+        "reads_per_second": round(len(latencies) / write_elapsed, 1),
+        "read_p50_ms": round(_percentile(latencies, 50) or 0, 2),
+        "read_p95_ms": round(_percentile(latencies, 95) or 0, 2),
+        "read_p99_ms": round(_percentile(latencies, 99) or 0, 2),
+        "read_max_ms": round(max(latencies, default=0), 2),
+        "read_mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0,
+        "lock_errors": errors,
+        "import_rows_per_second": round(import_rows / write_elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=20000, help="books present before the import")
+    parser.add_argument("--import-rows", type=int, default=50000)
+    parser.add_argument("--batch", type=int, default=1000, help="rows per import transaction")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES))
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = [
+        run_profile(p, args.seed, args.import_rows, args.batch, args.readers) for p in args.profiles
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    columns = list(results[0])
+    print("  ".join(f"{c:>22}" for c in columns))
+    for r in results:
+        print("  ".join(f"{str(r[c]):>22}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
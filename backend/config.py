@@ -0,0 +1,143 @@
+"""
+Runtime configuration, read once from environment variables.
+
+    BOOKTRACKER_DATABASE_URL   SQLAlchemy URL of the sync engine (default sqlite:///./books.db)
+    BOOKTRACKER_DB_MODE        "sync" (default) or "async" – async serves the books, authors,
+                               goals and import/export routers through aiosqlite
+    BOOKTRACKER_ASYNC_DATABASE_URL  URL of the async engine (default: the sync URL on sqlite+aiosqlite)
+
+SQLite tuning, applied to every new connection:
+
+    BOOKTRACKER_SQLITE_PROFILE    "performance" (default: WAL, synchronous=NORMAL, large cache,
+                                  mmap, in-memory temp tables) or "default" (SQLite's own settings)
+    BOOKTRACKER_SQLITE_<PRAGMA>   override a single pragma of the profile, e.g.
+                                  BOOKTRACKER_SQLITE_CACHE_SIZE=-131072
+    BOOKTRACKER_POOL_SIZE / BOOKTRACKER_POOL_MAX_OVERFLOW / BOOKTRACKER_POOL_TIMEOUT
+
+Response cache for the read endpoints (see utils.cache):
+
+    BOOKTRACKER_CACHE_BACKEND     "memory" (default, per process), "sqlite" (one file shared by
+                                  every worker) or "off"
+    BOOKTRACKER_CACHE_MAX_BYTES   size bound of the cached bodies (default 64 MiB)
+    BOOKTRACKER_CACHE_TTL         seconds an entry may be served (default 300)
+    BOOKTRACKER_CACHE_PATH        file of the sqlite backend (default ./response_cache.db)
+
+Cover images and author photos (see utils.assets):
+
+    BOOKTRACKER_ASSET_DIR         directory of the content-addressed files (default ./assets)
+    BOOKTRACKER_ASSET_MAX_BYTES   largest accepted image (default 20 MiB)
+
+Change log behind /api/sync (see utils.changelog):
+
+    BOOKTRACKER_CHANGELOG_RETENTION_DAYS    age at which delete tombstones are compacted away;
+                                            clients that last synced before that start over (default 30)
+    BOOKTRACKER_CHANGELOG_COMPACT_INTERVAL  seconds between compactions in the server, 0 = never (default 3600)
+
+Instrumentation (see utils.metrics and utils.profiler):
+
+    BOOKTRACKER_METRICS               "on" (default) or "off": per-route timings, SQL counters,
+                                      /api/metrics and Server-Timing headers
+    BOOKTRACKER_PROFILE_SLOW_MS       dump a stack profile of requests slower than this, 0 = off (default)
+    BOOKTRACKER_PROFILE_INTERVAL_MS   sampling interval of the profiler (default 5)
+    BOOKTRACKER_PROFILE_DIR           directory of the profiles (default ./profiles)
+
+Multi-tenant mode, one SQLite file per tenant (see utils.tenants):
+
+    BOOKTRACKER_TENANCY               "single" (default: everything in BOOKTRACKER_DATABASE_URL) or "multi"
+    BOOKTRACKER_TENANT_DIR            directory of the shards, <tenant>.db (default ./tenants)
+    BOOKTRACKER_TENANT_HEADER         request header naming the tenant (default X-Tenant-ID)
+    BOOKTRACKER_TENANT_MAX_ENGINES    shard engines kept open, least recently used evicted (default 64)
+    BOOKTRACKER_TENANT_POOL_SIZE / BOOKTRACKER_TENANT_POOL_MAX_OVERFLOW   per shard (default 2 / 8)
+    BOOKTRACKER_TENANT_FANOUT_WORKERS shards visited in parallel by cross-tenant jobs (default 8)
+    BOOKTRACKER_ADMIN_TOKEN           X-Admin-Token required by /api/admin; unset = admin disabled
+
+Background jobs behind /api/jobs (see utils.jobs):
+
+    BOOKTRACKER_JOB_WORKERS           processes running imports and exports (default 2)
+    BOOKTRACKER_JOB_MAX_PENDING       queued + running jobs per server process before 429s (default 16)
+    BOOKTRACKER_JOB_DIR               directory of uploads and export results (default ./jobs)
+    BOOKTRACKER_JOB_RETENTION_HOURS   age at which finished jobs and their files are deleted (default 24)
+"""
+import os
+
+DATABASE_URL = os.getenv("BOOKTRACKER_DATABASE_URL", "sqlite:///./books.db")
+
+DB_MODE = os.getenv("BOOKTRACKER_DB_MODE", "sync").lower()
+if DB_MODE not in ("sync", "async"):
+    raise ValueError(f"BOOKTRACKER_DB_MODE must be 'sync' or 'async', got {DB_MODE!r}")
+
+ASYNC_DATABASE_URL = os.getenv(
+    "BOOKTRACKER_ASYNC_DATABASE_URL",
+    DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1),
+)
+
+SQLITE_PROFILES = {
+    "performance": {
+        "journal_mode": "WAL",          # readers no longer block behind writers
+        "synchronous": "NORMAL",        # durable in WAL mode, one fsync per checkpoint
+        "cache_size": -65536,           # negative = KiB, i.e. 64 MiB page cache
+        "mmap_size": 268435456,         # 256 MiB memory-mapped reads
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,           # ms to wait for a lock instead of "database is locked"
+        "foreign_keys": "ON",
+    },
+    "default": {
+        "busy_timeout": 5000,
+        "foreign_keys": "ON",
+    },
+}
+
+SQLITE_PROFILE = os.getenv("BOOKTRACKER_SQLITE_PROFILE", "performance").lower()
+if SQLITE_PROFILE not in SQLITE_PROFILES:
+    raise ValueError(f"BOOKTRACKER_SQLITE_PROFILE must be one of {sorted(SQLITE_PROFILES)}, got {SQLITE_PROFILE!r}")
+
+_ALL_PRAGMAS = {p for profile in SQLITE_PROFILES.values() for p in profile}
+SQLITE_PRAGMAS = {
+    **SQLITE_PROFILES[SQLITE_PROFILE],
+    **{
+        p: os.environ[f"BOOKTRACKER_SQLITE_{p.upper()}"]
+        for p in _ALL_PRAGMAS
+        if f"BOOKTRACKER_SQLITE_{p.upper()}" in os.environ
+    },
+}
+
+POOL_SIZE = int(os.getenv("BOOKTRACKER_POOL_SIZE", "10"))
+POOL_MAX_OVERFLOW = int(os.getenv("BOOKTRACKER_POOL_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("BOOKTRACKER_POOL_TIMEOUT", "30"))
+
+CACHE_BACKEND = os.getenv("BOOKTRACKER_CACHE_BACKEND", "memory").lower()
+if CACHE_BACKEND not in ("memory", "sqlite", "off"):
+    raise ValueError(f"BOOKTRACKER_CACHE_BACKEND must be 'memory', 'sqlite' or 'off', got {CACHE_BACKEND!r}")
+CACHE_MAX_BYTES = int(os.getenv("BOOKTRACKER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTL = float(os.getenv("BOOKTRACKER_CACHE_TTL", "300"))
+CACHE_PATH = os.getenv("BOOKTRACKER_CACHE_PATH", "./response_cache.db")
+
+ASSET_DIR = os.getenv("BOOKTRACKER_ASSET_DIR", "./assets")
+ASSET_MAX_BYTES = int(os.getenv("BOOKTRACKER_ASSET_MAX_BYTES", str(20 * 1024 * 1024)))
+
+CHANGELOG_RETENTION_DAYS = float(os.getenv("BOOKTRACKER_CHANGELOG_RETENTION_DAYS", "30"))
+CHANGELOG_COMPACT_INTERVAL = float(os.getenv("BOOKTRACKER_CHANGELOG_COMPACT_INTERVAL", "3600"))
+
+METRICS = os.getenv("BOOKTRACKER_METRICS", "on").lower()
+if METRICS not in ("on", "off"):
+    raise ValueError(f"BOOKTRACKER_METRICS must be 'on' or 'off', got {METRICS!r}")
+METRICS_ENABLED = METRICS == "on"
+PROFILE_SLOW_MS = float(os.getenv("BOOKTRACKER_PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("BOOKTRACKER_PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("BOOKTRACKER_PROFILE_DIR", "./profiles")
+
+TENANCY = os.getenv("BOOKTRACKER_TENANCY", "single").lower()
+if TENANCY not in ("single", "multi"):
+    raise ValueError(f"BOOKTRACKER_TENANCY must be 'single' or 'multi', got {TENANCY!r}")
+TENANT_DIR = os.getenv("BOOKTRACKER_TENANT_DIR", "./tenants")
+TENANT_HEADER = os.getenv("BOOKTRACKER_TENANT_HEADER", "X-Tenant-ID")
+TENANT_MAX_ENGINES = int(os.getenv("BOOKTRACKER_TENANT_MAX_ENGINES", "64"))
+TENANT_POOL_SIZE = int(os.getenv("BOOKTRACKER_TENANT_POOL_SIZE", "2"))
+TENANT_POOL_MAX_OVERFLOW = int(os.getenv("BOOKTRACKER_TENANT_POOL_MAX_OVERFLOW", "8"))
+TENANT_FANOUT_WORKERS = int(os.getenv("BOOKTRACKER_TENANT_FANOUT_WORKERS", "8"))
+ADMIN_TOKEN = os.getenv("BOOKTRACKER_ADMIN_TOKEN") or None
+
+JOB_WORKERS = int(os.getenv("BOOKTRACKER_JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.getenv("BOOKTRACKER_JOB_MAX_PENDING", "16"))
+JOB_DIR = os.getenv("BOOKTRACKER_JOB_DIR", "./jobs")
+JOB_RETENTION_HOURS = float(os.getenv("BOOKTRACKER_JOB_RETENTION_HOURS", "24"))
@@ -1,12 +1,60 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from contextlib import asynccontextmanager
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./books.db"
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
+from config import (
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    DB_MODE,
+    METRICS_ENABLED,
+    POOL_MAX_OVERFLOW,
+    POOL_SIZE,
+    POOL_TIMEOUT,
+    SQLITE_PRAGMAS,
+    TENANCY,
 )
+
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict) -> None:
+    """Run the given PRAGMAs on every new DBAPI connection of the engine."""
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def create_sqlite_engine(
+    url: str,
+    pragmas: dict = SQLITE_PRAGMAS,
+    pool_size: int = POOL_SIZE,
+    max_overflow: int = POOL_MAX_OVERFLOW,
+    poolclass=None,
+) -> Engine:
+    """Create a sync SQLite engine with the configured performance profile and pool sizing."""
+    kwargs = {"connect_args": {"check_same_thread": False}}
+    if METRICS_ENABLED:
+        from utils.metrics import CountingConnection
+        kwargs["connect_args"]["factory"] = CountingConnection   # rows fetched per request
+    if poolclass is not None:
+        kwargs["poolclass"] = poolclass
+    elif ":memory:" not in url and url.rstrip("/") != "sqlite:":
+        kwargs.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=POOL_TIMEOUT)
+    engine = create_engine(url, **kwargs)
+    apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+engine = create_sqlite_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -14,27 +62,76 @@ class Base(DeclarativeBase):
     pass
 
 
+# ─── Request databases ───────────────────────────────────────────────────────
+# Request code opens sessions through these rather than SessionLocal / engine:
+# in multi-tenant mode (BOOKTRACKER_TENANCY=multi) they route to the shard of
+# the request's tenant (utils.tenants); otherwise to the engines above.
+
+def current_engine() -> Engine:
+    if TENANCY == "multi":
+        from utils.tenants import current_shard
+        return current_shard().engine
+    return engine
+
+
+def open_session() -> Session:
+    if TENANCY == "multi":
+        from utils.tenants import current_shard
+        return current_shard().sessions()
+    return SessionLocal()
+
+
 def get_db():
-    db = SessionLocal()
+    db = open_session()
     try:
         yield db
     finally:
         db.close()
 
 
+# ─── Optional async engine (BOOKTRACKER_DB_MODE=async) ───────────────────────
+# Only created in async mode so aiosqlite stays an optional dependency.
+
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    # Older SQLAlchemy releases default file-backed aiosqlite to NullPool, which
+    # rejects the sizing arguments; pin the queue pool explicitly.
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+    )
+    apply_sqlite_pragmas(async_engine.sync_engine, SQLITE_PRAGMAS)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+@asynccontextmanager
+async def open_async_session():
+    if TENANCY == "multi":
+        from utils.tenants import current_shard
+        # Opening a shard the first time migrates it: keep that off the event loop
+        factory = (await run_in_threadpool(current_shard)).async_sessions
+    else:
+        factory = AsyncSessionLocal
+    async with factory() as db:
+        yield db
+
+
+async def get_async_db():
+    async with open_async_session() as db:
+        yield db
+
+
 def init_db():
-    # Import all models so SQLAlchemy registers them before create_all
-    from models import Book, AuthorProfile, ReadingGoal  # noqa: F401
-    Base.metadata.create_all(bind=engine)
-
-    # Lightweight migrations: add new columns to existing DBs without losing data
-    _migrations = [
-        "ALTER TABLE books ADD COLUMN status VARCHAR",
-    ]
-    with engine.connect() as conn:
-        for stmt in _migrations:
-            try:
-                conn.execute(text(stmt))
-                conn.commit()
-            except Exception:
-                pass  # Column already exists – that's fine
+    """Bring the database schema up to date (see migrations.py); one query when it already is."""
+    from migrations import migrate
+    migrate(engine)
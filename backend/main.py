@@ -1,16 +1,109 @@
+import asyncio
+import logging
+import signal
+import threading
 from contextlib import asynccontextmanager
+from datetime import timedelta
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from config import (
+    CHANGELOG_COMPACT_INTERVAL,
+    CHANGELOG_RETENTION_DAYS,
+    DB_MODE,
+    JOB_RETENTION_HOURS,
+    METRICS_ENABLED,
+    TENANCY,
+)
+from database import async_engine, engine, init_db
+from routers import admin, assets, cache, collections, hall_of_fame, jobs, metrics, sagas, stats, sync
+from utils import changelog
+from utils import jobs as job_utils
+from utils.metrics import MetricsMiddleware, instrument_engine
+from utils.tenants import TenantMiddleware, fan_out, shards
+
+if DB_MODE == "async":
+    from routers import authors_async as authors
+    from routers import books_async as books
+    from routers import export_async as export
+    from routers import goals_async as goals
+else:
+    from routers import authors, books, export, goals
+
+
+logger = logging.getLogger("booktracker.changelog")
+
+
+def _compact_change_log():
+    retention = timedelta(days=CHANGELOG_RETENTION_DAYS)
+    if TENANCY == "multi":
+        results, errors = fan_out(lambda conn: changelog.compact(conn, retention))
+        for tenant, error in errors.items():
+            logger.error("change log compaction of tenant %s failed: %s", tenant, error)
+        removed = sum(r for r, _ in results.values())
+        if removed:
+            logger.info("change log: removed %d entries in %d shard(s)", removed, len(results))
+        return
+    with engine.begin() as conn:
+        removed, horizon = changelog.compact(conn, retention)
+    if removed:
+        logger.info("change log: removed %d entries, horizon %d", removed, horizon)
 
-from database import init_db
-from routers import authors, books, export, goals, hall_of_fame
+
+def _clean_up_jobs(recover: bool):
+    """Fail the jobs orphaned by a stopped server (at startup), delete the expired ones."""
+    recovered = job_utils.store.recover() if recover else 0
+    pruned = job_utils.store.prune(timedelta(hours=JOB_RETENTION_HOURS))
+    if recovered or pruned:
+        job_utils.logger.info("jobs: %d interrupted, %d expired and deleted", recovered, pruned)
+
+
+async def _compact_periodically():
+    while True:
+        try:
+            await run_in_threadpool(_compact_change_log)
+        except Exception:
+            logger.exception("change log compaction failed")
+        try:
+            await run_in_threadpool(_clean_up_jobs, False)
+        except Exception:
+            logger.exception("job clean-up failed")
+        await asyncio.sleep(CHANGELOG_COMPACT_INTERVAL)
+
+
+def _close_streams_on_exit():
+    """
+    uvicorn waits for open responses before it runs the lifespan shutdown, so
+    the /api/sync/events streams are ended from its SIGINT/SIGTERM handlers.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return   # e.g. TestClient: no signals to chain
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if callable(previous):
+            def handler(signum, frame, previous=previous):
+                changelog.close_streams()
+                previous(signum, frame)
+            signal.signal(sig, handler)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
+    if TENANCY == "single":
+        init_db()   # tenant shards are migrated when first opened
+    _close_streams_on_exit()
+    await run_in_threadpool(_clean_up_jobs, True)
+    compaction = asyncio.create_task(_compact_periodically()) if CHANGELOG_COMPACT_INTERVAL > 0 else None
     yield
+    if compaction is not None:
+        compaction.cancel()
+    job_utils.runner.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
+    shards.close_all()
 
 
 app = FastAPI(
@@ -20,6 +113,10 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Added first so CORS wraps it: its 400s and preflights still get CORS headers
+if TENANCY == "multi":
+    app.add_middleware(TenantMiddleware)
+
 # Allow the Vite dev server and common prod ports
 app.add_middleware(
     CORSMiddleware,
@@ -32,13 +129,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "ETag", "X-Cache", "Server-Timing"],
 )
 
+# Outermost, so the timings cover every other middleware
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(Engine)   # every engine, tenant shards included
+
 app.include_router(books.router, prefix="/api/books", tags=["Books"])
 app.include_router(authors.router, prefix="/api/authors", tags=["Authors"])
 app.include_router(goals.router, prefix="/api/goals", tags=["Goals"])
 app.include_router(export.router, prefix="/api", tags=["Import / Export"])
+app.include_router(collections.router, prefix="/api/collections", tags=["Collections"])
+app.include_router(sagas.router, prefix="/api/sagas", tags=["Sagas"])
 app.include_router(hall_of_fame.router, prefix="/api/hall-of-fame", tags=["Hall of Fame"])
+app.include_router(stats.router, prefix="/api/stats", tags=["Statistics"])
+app.include_router(cache.router, prefix="/api/cache", tags=["Cache"])
+app.include_router(assets.router, prefix="/api/assets", tags=["Assets"])
+app.include_router(sync.router, prefix="/api/sync", tags=["Sync"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
+if METRICS_ENABLED:
+    app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
+if TENANCY == "multi":
+    app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 
 @app.get("/api/health", tags=["Health"])
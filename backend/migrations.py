@@ -0,0 +1,387 @@
+"""
+Ordered, versioned schema migrations.
+
+Every step in MIGRATIONS runs once per database and is recorded in
+schema_migrations. On an up-to-date database startup costs a single query;
+only when steps are pending does the runner look at individual versions.
+
+Steps must be idempotent (CREATE ... IF NOT EXISTS, column checks before ALTER)
+so that a step interrupted before it was recorded can simply run again. A step
+is either a plain function of the connection, run in one transaction, or a
+generator function of (connection, batch_size) for data migrations over large
+tables: it yields (done, total) after each batch, the runner commits there and
+reports progress, so no single write transaction holds the database for long.
+
+New tables added to models.py after the baseline need their own step
+(create_tables); Base.metadata.create_all only runs as part of step 1.
+
+    python -m migrations            # apply pending steps
+    python -m migrations --check    # exit 1 if steps are pending (deploy pipelines)
+    python -m migrations --status   # list applied and pending steps
+"""
+import inspect
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+import models
+from database import Base
+
+BATCH_SIZE = 5000   # rows per transaction in batched data migrations
+
+logger = logging.getLogger("booktracker.migrations")
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable
+
+    @property
+    def batched(self) -> bool:
+        return inspect.isgeneratorfunction(self.apply)
+
+
+# ─── Helpers for steps ───────────────────────────────────────────────────────
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(row[1] == column for row in conn.exec_driver_sql(f"PRAGMA table_info({table})"))
+
+
+def has_table(conn: Connection, name: str) -> bool:
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}
+    ).first() is not None
+
+
+def add_column(conn: Connection, table: str, column: str, ddl: str):
+    """ALTER TABLE ... ADD COLUMN unless the column exists (e.g. created by create_all)."""
+    if not has_column(conn, table, column):
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def create_tables(conn: Connection, *model_classes):
+    for model in model_classes:
+        model.__table__.create(conn, checkfirst=True)
+
+
+def create_indexes(conn: Connection, model_class, *names: str):
+    """Create the named indexes of a model (as declared in models.py) unless they exist."""
+    for index in model_class.__table__.indexes:
+        if index.name in names:
+            index.create(conn, checkfirst=True)
+
+
+def rowid_batches(conn: Connection, table: str, batch_size: int) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Yield (after, upto, done, total) so that after < rowid <= upto covers the next
+    batch_size rows of `table`. Rows inserted once iteration has started are left
+    out; the triggers of the step being run are expected to cover them.
+    """
+    total, first, last = conn.exec_driver_sql(f"SELECT count(*), min(rowid), max(rowid) FROM {table}").one()
+    if not total:
+        return
+    after, done = first - 1, 0
+    while after < last:
+        upto, n = conn.execute(
+            text(f"SELECT max(rowid), count(*) FROM (SELECT rowid FROM {table} "
+                 "WHERE rowid > :after AND rowid <= :last ORDER BY rowid LIMIT :n)"),
+            {"after": after, "last": last, "n": batch_size},
+        ).one()
+        if not n:
+            break
+        done += n
+        yield after, upto, done, total
+        after = upto
+
+
+# ─── Steps ───────────────────────────────────────────────────────────────────
+
+def _baseline_schema(conn):
+    Base.metadata.create_all(conn)
+    add_column(conn, "books", "status", "VARCHAR")
+
+
+def _stat_aggregates(conn):
+    # No-op: the backfill reads columns that later steps add (finished_on, step 10),
+    # so step 12 builds the materialized statistics once they all exist
+    pass
+
+
+def _full_text_search(conn, batch_size):
+    from utils.search import ensure_fts, index_rows
+    exists = has_table(conn, "books_fts")
+    if not ensure_fts(conn) or exists:   # no FTS5 in this SQLite build, or already indexed
+        return
+    for after, upto, done, total in rowid_batches(conn, "books", batch_size):
+        index_rows(conn, after, upto)
+        yield done, total
+
+
+_COMPOSITE_INDEXES = (
+    "ix_books_date_finished_id", "ix_books_genre_date_finished", "ix_books_nationality_date_finished",
+    "ix_books_reading_type_date_finished", "ix_books_status_date_finished", "ix_books_title_author",
+)
+
+
+def _composite_indexes(conn):
+    # Superseded by the composite indexes, which start with the same column
+    for name in ("ix_books_title", "ix_books_genre", "ix_books_nationality"):
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+    create_indexes(conn, models.Book, *_COMPOSITE_INDEXES)
+
+
+def _data_versions(conn):
+    from utils.versions import ensure_seeded
+    create_tables(conn, models.DataVersion)
+    with Session(bind=conn) as db:
+        ensure_seeded(db)
+
+
+def _normalized_lists(conn, batch_size):
+    from utils import relations
+    create_tables(conn, models.BookCollection, models.BookChapter)
+    relations.ensure_triggers(conn)
+    relations.clear(conn)
+    for after, upto, done, total in rowid_batches(conn, "books", batch_size):
+        relations.backfill(conn, after, upto)
+        yield done, total
+
+
+def _hall_of_fame_items(conn):
+    # Split the single-row JSON document into one row per entry
+    from utils.hall_of_fame import SECTIONS, write_document
+    create_tables(conn, models.HallOfFameItem)
+    if not has_table(conn, "hall_of_fame"):
+        return
+    row = conn.exec_driver_sql("SELECT data FROM hall_of_fame ORDER BY id LIMIT 1").first()
+    if row and row[0]:
+        document = json.loads(row[0])
+        write_document(conn, {s: document[s] for s in SECTIONS if s in document})
+    conn.exec_driver_sql("DROP TABLE hall_of_fame")
+
+
+def _external_assets(conn, batch_size):
+    # Move inline data: URL covers and author photos to the asset store
+    from utils.assets import externalize
+    from utils.versions import BOOKS, HALL_OF_FAME, bump
+    for after, upto, done, total in rowid_batches(conn, "books", batch_size):
+        rows = conn.execute(
+            text("SELECT rowid, cover_url FROM books WHERE rowid > :after AND rowid <= :upto "
+                 "AND cover_url LIKE 'data:%'"),
+            {"after": after, "upto": upto},
+        ).all()
+        updates = [{"r": rowid, "url": externalize(url)} for rowid, url in rows]
+        if updates:
+            conn.execute(text("UPDATE books SET cover_url = :url WHERE rowid = :r"), updates)
+        yield done, total
+    photos = conn.execute(text(
+        "SELECT key, data FROM hall_of_fame_items WHERE section = 'authorPhotos' AND data LIKE '\"data:%'"
+    )).all()
+    for key, data in photos:
+        conn.execute(
+            text("UPDATE hall_of_fame_items SET data = :data WHERE section = 'authorPhotos' AND key = :key"),
+            {"key": key, "data": json.dumps(externalize(json.loads(data)), ensure_ascii=False)},
+        )
+    # Responses cached under the old ETags still embed the images
+    with Session(bind=conn) as db:
+        bump(db, BOOKS, HALL_OF_FAME)
+
+
+def _saga_index(conn, batch_size):
+    # Parse every title once; from now on saga_key is set by the write paths
+    from utils import sagas
+    add_column(conn, "books", "saga_key", "VARCHAR")
+    create_tables(conn, models.Saga)
+    create_indexes(conn, models.Book, "ix_books_saga_key")
+    for after, upto, done, total in rowid_batches(conn, "books", batch_size):
+        rows = conn.execute(
+            text("SELECT rowid, title, author FROM books WHERE rowid > :after AND rowid <= :upto"),
+            {"after": after, "upto": upto},
+        ).all()
+        keys = [{"r": rowid, "key": sagas.saga_key_for(title, author)} for rowid, title, author in rows]
+        conn.execute(text("UPDATE books SET saga_key = :key WHERE rowid = :r"), keys)
+        yield done, total
+    # The last batch was committed, so this session begins (and must commit) its own transaction
+    with Session(bind=conn) as db:
+        sagas.rebuild_table(db)
+        db.commit()
+
+
+def _finished_on(conn, batch_size):
+    # Normalize every date_finished once; from now on finished_on is set by the write paths
+    from utils.dates import normalize_date
+    add_column(conn, "books", "finished_on", "VARCHAR")
+    for after, upto, done, total in rowid_batches(conn, "books", batch_size):
+        rows = conn.execute(
+            text("SELECT rowid, date_finished FROM books WHERE rowid > :after AND rowid <= :upto"),
+            {"after": after, "upto": upto},
+        ).all()
+        dates = [{"r": rowid, "d": normalize_date(raw)} for rowid, raw in rows]
+        conn.execute(text("UPDATE books SET finished_on = :d WHERE rowid = :r"), dates)
+        yield done, total
+    # Built once the column is filled: cheaper than maintaining it during the backfill
+    create_indexes(conn, models.Book, "ix_books_finished_on")
+
+
+def _change_log(conn, batch_size):
+    # Seed the log with every existing row, so since=0 is a full sync from the start
+    from utils import changelog
+    create_tables(conn, models.ChangeLog, models.ChangeLogCompaction)
+    if conn.execute(text("SELECT 1 FROM change_log LIMIT 1")).first() is None:
+        for entity in ("authors", "goals", "hall_of_fame"):
+            changelog.backfill(conn, entity)
+        for after, upto, done, total in rowid_batches(conn, "books", batch_size):
+            changelog.backfill(conn, "books", after, upto)
+            yield done, total
+    changelog.ensure_triggers(conn)
+
+
+def _year_aggregates(conn):
+    # Rebuild every stat_aggregates row: backfills databases that predate the table
+    # (see step 2), and re-keys the stored year groups, which older steps computed
+    # from date_finished, on finished_on (which also accepts dates like "2023-5-14")
+    from utils import aggregates
+    with Session(bind=conn) as db:
+        aggregates.rebuild(db)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline_schema", _baseline_schema),
+    Migration(2, "stat_aggregates", _stat_aggregates),
+    Migration(3, "full_text_search", _full_text_search),
+    Migration(4, "composite_indexes", _composite_indexes),
+    Migration(5, "data_versions", _data_versions),
+    Migration(6, "normalized_lists", _normalized_lists),
+    Migration(7, "hall_of_fame_items", _hall_of_fame_items),
+    Migration(8, "external_assets", _external_assets),
+    Migration(9, "saga_index", _saga_index),
+    Migration(10, "finished_on", _finished_on),
+    Migration(11, "change_log", _change_log),
+    Migration(12, "year_aggregates", _year_aggregates),
+]
+
+assert [m.version for m in MIGRATIONS] == sorted({m.version for m in MIGRATIONS}), "versions must be unique and ascending"
+
+LATEST = MIGRATIONS[-1].version
+
+
+# ─── Runner ──────────────────────────────────────────────────────────────────
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def applied_versions(conn: Connection) -> Dict[int, tuple]:
+    """version -> (name, applied_at, duration_ms); empty when schema_migrations does not exist."""
+    if not has_table(conn, "schema_migrations"):
+        return {}
+    rows = conn.exec_driver_sql("SELECT version, name, applied_at, duration_ms FROM schema_migrations")
+    return {version: rest for version, *rest in rows}
+
+
+def pending(conn: Connection) -> List[Migration]:
+    applied = applied_versions(conn)
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+def is_current(conn: Connection) -> bool:
+    """The single startup check: every known step is recorded."""
+    try:
+        count = conn.execute(
+            text("SELECT count(*) FROM schema_migrations WHERE version <= :latest"), {"latest": LATEST}
+        ).scalar()
+    except OperationalError:   # no schema_migrations yet
+        conn.rollback()
+        return False
+    conn.rollback()
+    return count == len(MIGRATIONS)
+
+
+def _record(conn: Connection, migration: Migration, duration_ms: float):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name, applied_at, duration_ms) "
+             "VALUES (:version, :name, :applied_at, :duration_ms)"),
+        {"version": migration.version, "name": migration.name,
+         "applied_at": _now(), "duration_ms": duration_ms},
+    )
+
+
+def _ensure_table(conn: Connection):
+    if not has_table(conn, "schema_migrations"):
+        create_tables(conn, models.SchemaMigration)
+        conn.commit()
+
+
+def _log_progress(migration: Migration, done: int, total: int):
+    logger.info("migration %d %s: %d/%d rows", migration.version, migration.name, done, total)
+
+
+def migrate(
+    engine: Engine,
+    batch_size: int = BATCH_SIZE,
+    progress: Callable[[Migration, int, int], None] = _log_progress,
+) -> List[Migration]:
+    """Apply the pending steps in order; returns the steps that ran."""
+    ran = []
+    with engine.connect() as conn:
+        if is_current(conn):
+            return ran
+        _ensure_table(conn)
+        for migration in MIGRATIONS:
+            if conn.execute(text("SELECT 1 FROM schema_migrations WHERE version = :v"),
+                            {"v": migration.version}).first():
+                continue   # recorded meanwhile, e.g. by another worker
+            logger.info("applying migration %d %s", migration.version, migration.name)
+            started = time.perf_counter()
+            if migration.batched:
+                for done, total in migration.apply(conn, batch_size):
+                    conn.commit()
+                    progress(migration, done, total)
+            else:
+                migration.apply(conn)
+            _record(conn, migration, round((time.perf_counter() - started) * 1000, 1))
+            conn.commit()
+            ran.append(migration)
+    return ran
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Apply or check the schema migrations.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="exit 1 if migrations are pending, change nothing")
+    mode.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per batch in data migrations")
+    args = parser.parse_args()
+
+    if args.check or args.status:
+        with engine.connect() as conn:
+            applied = applied_versions(conn)
+            todo = pending(conn)
+        if args.status:
+            for version, (name, applied_at, duration_ms) in sorted(applied.items()):
+                print(f"applied  {version:>3} {name:<24} {applied_at}  {duration_ms} ms")
+        for m in todo:
+            print(f"pending  {m.version:>3} {m.name}")
+        print(f"{len(todo)} pending migration(s), latest version {LATEST}")
+        sys.exit(1 if args.check and todo else 0)
+
+    def report(migration, done, total):
+        print(f"  {migration.name}: {done}/{total} rows ({100 * done // total}%)", flush=True)
+
+    ran = migrate(engine, batch_size=args.batch_size, progress=report)
+    for m in ran:
+        print(f"applied  {m.version:>3} {m.name}")
+    print(f"{len(ran)} migration(s) applied, at version {LATEST}")
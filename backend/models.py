@@ -1,18 +1,30 @@
-from sqlalchemy import Column, String, Integer, Float, Boolean, Text
+from sqlalchemy import Column, String, Integer, Float, Boolean, Text, Index
 from database import Base
 
-_HALL_OF_FAME_EMPTY = '{"badges":[],"categories":[],"nominations":[],"annualAwards":[],"rankings":[],"authorPhotos":{}}'
-
 
 class Book(Base):
     __tablename__ = "books"
+    # Composite indexes match get_books: equality filter + ORDER BY date_finished DESC, id DESC,
+    # so SQLite walks the index backwards instead of sorting. They also serve the old
+    # single-column title/genre/nationality lookups through their leading column.
+    __table_args__ = (
+        Index("ix_books_date_finished_id", "date_finished", "id"),
+        Index("ix_books_genre_date_finished", "genre", "date_finished", "id"),
+        Index("ix_books_nationality_date_finished", "nationality", "date_finished", "id"),
+        Index("ix_books_reading_type_date_finished", "reading_type", "date_finished", "id"),
+        Index("ix_books_status_date_finished", "status", "date_finished", "id"),
+        Index("ix_books_title_author", "title", "author"),   # import dedupe
+        Index("ix_books_saga_key", "saga_key"),
+        # Timeline / goal progress: a range over finished_on, answered from the index alone
+        Index("ix_books_finished_on", "finished_on", "pages", "rating"),
+    )
 
     id = Column(String, primary_key=True, index=True)
-    title = Column(String, nullable=False, index=True)
+    title = Column(String, nullable=False)
     author = Column(String, nullable=False, index=True)
     pages = Column(Integer, nullable=False)
-    genre = Column(String, nullable=False, index=True)
-    nationality = Column(String, nullable=False, index=True)
+    genre = Column(String, nullable=False)
+    nationality = Column(String, nullable=False)
     date_finished = Column(String, nullable=False)
     timestamp = Column(String, nullable=True)
     rating = Column(Float, nullable=True)
@@ -30,6 +42,33 @@ class Book(Base):
     chapters_read = Column(Text, nullable=True)     # JSON array of ints
     total_chapters = Column(Integer, nullable=True)
     status = Column(String, nullable=True)          # reading | completed | abandoned | want-to-read
+    saga_key = Column(String, nullable=True)        # "<saga>|||<author>" lower-cased, set on write (utils.sagas)
+    finished_on = Column(String, nullable=True)     # date_finished as ISO YYYY-MM-DD, set on write (utils.dates)
+
+
+class BookCollection(Base):
+    """
+    One row per (book, collection): the indexed copy of Book.collections.
+    Maintained by triggers on books (see utils.relations), never written directly.
+    """
+    __tablename__ = "book_collections"
+    __table_args__ = (
+        Index("ix_book_collections_name", "name", "book_id"),
+        {"sqlite_with_rowid": False},
+    )
+
+    book_id = Column(String, primary_key=True)
+    name = Column(String, primary_key=True)
+    position = Column(Integer, nullable=False)     # order within the book's list
+
+
+class BookChapter(Base):
+    """One row per chapter read: the indexed copy of Book.chapters_read (same triggers)."""
+    __tablename__ = "book_chapters"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    book_id = Column(String, primary_key=True)
+    chapter = Column(Integer, primary_key=True)
 
 
 class AuthorProfile(Base):
@@ -49,8 +88,80 @@ class ReadingGoal(Base):
     target_books = Column(Integer, nullable=False)
 
 
-class HallOfFame(Base):
-    __tablename__ = "hall_of_fame"
+class HallOfFameItem(Base):
+    """One entry of a Hall of Fame section as JSON text (see utils.hall_of_fame)."""
+    __tablename__ = "hall_of_fame_items"
+    __table_args__ = (
+        Index("ix_hall_of_fame_items_position", "section", "position"),
+        {"sqlite_with_rowid": False},
+    )
+
+    section = Column(String, primary_key=True)   # badges | categories | ... | authorPhotos
+    key = Column(String, primary_key=True)
+    position = Column(Integer, nullable=False)
+    data = Column(Text, nullable=False)
+
+
+class StatAggregate(Base):
+    """Materialized per-group totals, kept in sync by every book write (see utils.aggregates)."""
+    __tablename__ = "stat_aggregates"
+
+    dimension = Column(String, primary_key=True)    # year | genre | nationality | author
+    key = Column(String, primary_key=True)
+    book_count = Column(Integer, nullable=False, default=0)
+    page_sum = Column(Integer, nullable=False, default=0)
+    rated_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0)
+
+
+class DataVersion(Base):
+    """Change counter per table, bumped by every write; the read endpoints' ETags (see utils.versions)."""
+    __tablename__ = "data_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class SchemaMigration(Base):
+    """One row per applied step of migrations.MIGRATIONS."""
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String, nullable=False)
+    applied_at = Column(String, nullable=False)   # ISO 8601, UTC
+    duration_ms = Column(Float)
+
+
+class Saga(Base):
+    """Summary and influence of a saga of 2+ non-academic books, refreshed by writes to its books (utils.sagas)."""
+    __tablename__ = "sagas"
+
+    key = Column(String, primary_key=True)          # Book.saga_key
+    total_pages = Column(Integer, nullable=False)
+    raw_score = Column(Float, nullable=False)
+    data = Column(Text, nullable=False)             # build_saga() summary as JSON
+
+
+class ChangeLog(Base):
+    """One row per write to a synced row, appended by triggers (see utils.changelog)."""
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_entity_key", "entity", "key", "seq"),
+        {"sqlite_autoincrement": True},   # seq is never reused, even after compaction
+    )
+
+    seq = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)       # books | authors | goals | hall_of_fame
+    key = Column(String, nullable=False)          # id / name / year / "<section>/<key>"
+    op = Column(String, nullable=False)           # upsert | delete
+    changed_at = Column(String, nullable=False)   # ISO 8601, UTC
+
+
+class ChangeLogCompaction(Base):
+    """One row per compaction; clients synced before the latest horizon must start over."""
+    __tablename__ = "change_log_compactions"
 
-    id = Column(Integer, primary_key=True, default=1)
-    data = Column(Text, nullable=False, default=_HALL_OF_FAME_EMPTY)
+    id = Column(Integer, primary_key=True)
+    compacted_at = Column(String, nullable=False)
+    horizon = Column(Integer, nullable=False)     # highest seq dropped without a newer entry
+    removed = Column(Integer, nullable=False)
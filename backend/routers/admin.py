@@ -0,0 +1,57 @@
+import os
+import secrets
+from collections import Counter
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from config import ADMIN_TOKEN
+from utils import changelog
+from utils.tenants import fan_out, shard_path, shards
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (BOOKTRACKER_ADMIN_TOKEN unset)")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid X-Admin-Token")
+
+
+def _tenant_summary(conn: Connection) -> dict:
+    books, pages = conn.execute(text("SELECT count(*), coalesce(sum(pages), 0) FROM books")).one()
+    genres = conn.execute(text(
+        "SELECT genre, count(*) AS n FROM books GROUP BY genre ORDER BY n DESC, genre LIMIT 5"
+    )).all()
+    return {
+        "books": books,
+        "pages": pages,
+        "authors": conn.execute(text("SELECT count(DISTINCT author) FROM books")).scalar(),
+        "goals": conn.execute(text("SELECT count(*) FROM reading_goals")).scalar(),
+        "change_log_head": changelog.head(conn),
+        "top_genres": {genre: n for genre, n in genres},
+    }
+
+
+@router.get("/tenants", summary="Per-tenant and total library sizes, fanned out over every shard",
+            dependencies=[Depends(require_admin)])
+def get_tenants():
+    """Shards that could not be read are listed under `errors`, not counted in the totals."""
+    summaries, errors = fan_out(_tenant_summary)
+    genres: Counter = Counter()
+    for tenant, summary in summaries.items():
+        summary["file_bytes"] = os.path.getsize(shard_path(tenant))
+        genres.update(summary["top_genres"])   # approximate: each tenant reports its top 5
+    return {
+        "tenants": summaries,
+        "totals": {
+            "tenants": len(summaries),
+            **{key: sum(s[key] for s in summaries.values()) for key in ("books", "pages", "goals", "file_bytes")},
+            "top_genres": dict(genres.most_common(5)),
+        },
+        "engines": shards.info(),
+        "errors": errors,
+    }
@@ -0,0 +1,54 @@
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+from config import ASSET_MAX_BYTES
+from utils import assets
+from utils.versions import etag_matches
+
+router = APIRouter()
+
+# Names are content hashes, so a URL's bytes never change
+IMMUTABLE_HEADERS = {
+    "Cache-Control": "public, max-age=31536000, immutable",
+    "X-Content-Type-Options": "nosniff",
+    # SVGs are served from the API origin: never let one run script there
+    "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'; sandbox",
+}
+
+
+@router.api_route("/{name}", methods=["GET", "HEAD"])
+def get_asset(name: str, if_none_match: Optional[str] = Header(None)):
+    """The stored bytes, with Range support; sent with sendfile/pathsend where the server offers it."""
+    if not assets.NAME.match(name) or not os.path.exists(assets.path_for(name)):
+        raise HTTPException(status_code=404, detail="Asset not found")
+    headers = {**IMMUTABLE_HEADERS, "ETag": '"' + name.split(".")[0] + '"'}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(assets.path_for(name), media_type=assets.media_type_for(name), headers=headers)
+
+
+@router.post("/", status_code=201)
+async def upload_asset(
+    request: Request,
+    content_type: Optional[str] = Header(None),
+    content_length: Optional[int] = Header(None),
+):
+    """
+    Store the raw request body (e.g. an image file) and return its URL, to use
+    as a book's cover_url or an author photo.
+    """
+    if content_length is not None and content_length > ASSET_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Assets are limited to {ASSET_MAX_BYTES} bytes")
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > ASSET_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Assets are limited to {ASSET_MAX_BYTES} bytes")
+    if not data:
+        raise HTTPException(status_code=422, detail="Empty body")
+    name = await run_in_threadpool(assets.put, bytes(data), content_type)
+    return {"name": name, "url": assets.URL_PREFIX + name, "size": len(data), "media_type": assets.media_type_for(name)}
@@ -1,11 +1,13 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
 from database import get_db
 from models import AuthorProfile
 from schemas import AuthorProfileCreate, AuthorProfileResponse
+from utils.cache import cache_response, cached_response
+from utils.versions import AUTHORS, bump, current_etag, not_modified
 
 router = APIRouter()
 
@@ -20,14 +22,34 @@ def profile_to_dict(p: AuthorProfile) -> dict:
     }
 
 
-@router.get("/", response_model=List[AuthorProfileResponse])
-def get_authors(db: Session = Depends(get_db)):
+AUTHOR_LIST = List[AuthorProfileResponse]
+
+
+@router.get("/", response_model=AUTHOR_LIST)
+def get_authors(
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    etag = current_etag(db, AUTHORS)
+    cached = not_modified(etag, if_none_match, response) or cached_response(request, etag)
+    if cached:
+        return cached
     profiles = db.query(AuthorProfile).order_by(AuthorProfile.name).all()
-    return [profile_to_dict(p) for p in profiles]
+    return cache_response(request, [AUTHORS], etag, [profile_to_dict(p) for p in profiles], AUTHOR_LIST)
 
 
 @router.get("/{name}", response_model=AuthorProfileResponse)
-def get_author(name: str, db: Session = Depends(get_db)):
+def get_author(
+    name: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    cached = not_modified(current_etag(db, AUTHORS), if_none_match, response)
+    if cached:
+        return cached
     profile = db.query(AuthorProfile).filter(AuthorProfile.name == name).first()
     if not profile:
         raise HTTPException(status_code=404, detail="Author not found")
@@ -43,6 +65,7 @@ def upsert_author(profile: AuthorProfileCreate, db: Session = Depends(get_db)):
         existing.primary_genre = profile.primary_genre
         existing.favorite_book = profile.favorite_book
         existing.bio = profile.bio
+        bump(db, AUTHORS)
         db.commit()
         db.refresh(existing)
         return profile_to_dict(existing)
@@ -55,6 +78,7 @@ def upsert_author(profile: AuthorProfileCreate, db: Session = Depends(get_db)):
         bio=profile.bio,
     )
     db.add(new_profile)
+    bump(db, AUTHORS)
     db.commit()
     db.refresh(new_profile)
     return profile_to_dict(new_profile)
@@ -66,5 +90,6 @@ def delete_author(name: str, db: Session = Depends(get_db)):
     if not profile:
         raise HTTPException(status_code=404, detail="Author not found")
     db.delete(profile)
+    bump(db, AUTHORS)
     db.commit()
     return {"message": "Author profile deleted", "name": name}
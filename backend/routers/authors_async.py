@@ -0,0 +1,83 @@
+"""Async (aiosqlite) version of routers/authors.py, mounted when BOOKTRACKER_DB_MODE=async."""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+from models import AuthorProfile
+from routers.authors import AUTHOR_LIST, profile_to_dict
+from schemas import AuthorProfileCreate, AuthorProfileResponse
+from utils.cache import cache_response, cached_response
+from utils.versions import AUTHORS, bump, current_etag, not_modified
+
+router = APIRouter()
+
+
+@router.get("/", response_model=AUTHOR_LIST)
+async def get_authors(
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    etag = await db.run_sync(current_etag, AUTHORS)
+    cached = not_modified(etag, if_none_match, response) or cached_response(request, etag)
+    if cached:
+        return cached
+    profiles = (await db.execute(select(AuthorProfile).order_by(AuthorProfile.name))).scalars()
+    return cache_response(request, [AUTHORS], etag, [profile_to_dict(p) for p in profiles], AUTHOR_LIST)
+
+
+@router.get("/{name}", response_model=AuthorProfileResponse)
+async def get_author(
+    name: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    cached = not_modified(await db.run_sync(current_etag, AUTHORS), if_none_match, response)
+    if cached:
+        return cached
+    profile = await db.get(AuthorProfile, name)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Author not found")
+    return profile_to_dict(profile)
+
+
+@router.post("/", response_model=AuthorProfileResponse)
+async def upsert_author(profile: AuthorProfileCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.get(AuthorProfile, profile.name)
+
+    if existing:
+        existing.nationality = profile.nationality
+        existing.primary_genre = profile.primary_genre
+        existing.favorite_book = profile.favorite_book
+        existing.bio = profile.bio
+        await db.run_sync(bump, AUTHORS)
+        await db.commit()
+        return profile_to_dict(existing)
+
+    new_profile = AuthorProfile(
+        name=profile.name,
+        nationality=profile.nationality,
+        primary_genre=profile.primary_genre,
+        favorite_book=profile.favorite_book,
+        bio=profile.bio,
+    )
+    db.add(new_profile)
+    await db.run_sync(bump, AUTHORS)
+    await db.commit()
+    return profile_to_dict(new_profile)
+
+
+@router.delete("/{name}")
+async def delete_author(name: str, db: AsyncSession = Depends(get_async_db)):
+    profile = await db.get(AuthorProfile, name)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Author not found")
+    await db.delete(profile)
+    await db.run_sync(bump, AUTHORS)
+    await db.commit()
+    return {"message": "Author profile deleted", "name": name}
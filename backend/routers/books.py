@@ -1,34 +1,190 @@
 import uuid
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 
 from database import get_db
 from models import Book
-from schemas import BookCreate, BookResponse
-from utils.helpers import book_to_dict, dict_to_book_kwargs
+from schemas import BookBatchRequest, BookBatchResponse, BookCreate, BookPatch, BookResponse
+from utils.aggregates import AggregateDelta, clear as clear_aggregates, snapshot
+from utils.batch import apply_book_batch
+from utils.cache import cached_response, store_response
+from utils.helpers import (
+    BOOK_FIELDS,
+    book_to_dict,
+    decode_cursor,
+    dict_to_book_kwargs,
+    encode_cursor,
+    patch_to_columns,
+)
+from utils.relations import in_collection
+from utils.sagas import clear as clear_sagas
+from utils.search import SEARCH_SQL, build_match, rows_to_results, search_params
+from utils.serialization import encode_book_rows
+from utils.versions import BOOKS, bump, current_etag, not_modified
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
 
-@router.get("/", response_model=List[BookResponse])
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(BOOK_FIELDS)
+    selected = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in selected if f not in BOOK_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def list_statements(
+    genre: Optional[str],
+    nationality: Optional[str],
+    reading_type: Optional[str],
+    cursor: Optional[str],
+    limit: int,
+    selected: Optional[List[str]],
+    status: Optional[str] = None,
+    collection: Optional[str] = None,
+):
+    """Build the (count, page) statements behind get_books; shared by the sync and async routers."""
+    filters = []
+    if genre:
+        filters.append(Book.genre == genre)
+    if nationality:
+        filters.append(Book.nationality == nationality)
+    if reading_type:
+        filters.append(Book.reading_type == reading_type)
+    if status:
+        filters.append(Book.status == status)
+    if collection:
+        filters.append(in_collection(collection))
+
+    count_stmt = select(func.count(Book.id)).where(*filters)
+
+    if selected:
+        # Always fetch the keyset columns so the next cursor can be built
+        columns = list(dict.fromkeys(selected + ["date_finished", "id"]))
+        page_stmt = select(*[getattr(Book, c) for c in columns])
+    else:
+        page_stmt = select(Book)
+    page_stmt = page_stmt.where(*filters)
+
+    if cursor:
+        try:
+            after_date, after_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        page_stmt = page_stmt.where(tuple_(Book.date_finished, Book.id) < (after_date, after_id))
+
+    page_stmt = page_stmt.order_by(Book.date_finished.desc(), Book.id.desc()).limit(limit + 1)
+    return count_stmt, page_stmt
+
+
+BOOK_LIST = List[BookResponse]
+
+
+def page_response(
+    request: Request,
+    etag: str,
+    rows: list,
+    total: int,
+    limit: int,
+    selected: List[str],
+) -> Response:
+    """
+    Encode one page of list_statements() rows with its paging headers and store
+    it in the response cache. Rows are encoded straight from their tuples, see
+    utils.serialization; the output matches List[BookResponse].
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    headers = {"X-Total-Count": str(total)}
+    if has_more:
+        last = rows[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.date_finished, last.id)
+
+    return store_response(request, [BOOKS], etag, encode_book_rows(rows, selected), headers)
+
+
+def apply_update(db_book: Book, book: BookCreate):
+    """Overwrite every column of db_book with the values of a BookCreate payload."""
+    for column, value in dict_to_book_kwargs(book, db_book.id).items():
+        if column != "id":
+            setattr(db_book, column, value)
+
+
+def apply_patch(db_book: Book, changes: BookPatch):
+    """Write only the fields present in a BookPatch payload."""
+    current = {"title": db_book.title, "author": db_book.author}
+    for column, value in patch_to_columns(changes.model_dump(exclude_unset=True), current).items():
+        setattr(db_book, column, value)
+
+
+def batch_response(result: dict, atomic: bool, response: Response) -> dict:
+    """Shape apply_book_batch() output; an atomic batch with failures is reported as 409."""
+    committed = not (atomic and result["failed"])
+    if not committed:
+        response.status_code = 409
+    return {**result, "committed": committed}
+
+
+@router.get("/", response_model=BOOK_LIST)
 def get_books(
+    request: Request,
+    response: Response,
     genre: Optional[str] = None,
     nationality: Optional[str] = None,
     reading_type: Optional[str] = None,
+    status: Optional[str] = None,
+    collection: Optional[str] = Query(None, description="Only books in this collection (exact name)"),
+    cursor: Optional[str] = Query(None, description="Opaque token from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return, e.g. id,title,author"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
-    query = db.query(Book)
-    if genre:
-        query = query.filter(Book.genre == genre)
-    if nationality:
-        query = query.filter(Book.nationality == nationality)
-    if reading_type:
-        query = query.filter(Book.reading_type == reading_type)
+    """
+    List books newest first, one keyset page at a time.
+    Ordered by (date_finished, id) descending; follow X-Next-Cursor until it is absent.
+    X-Total-Count carries the number of books matching the filters.
+    Answers 304 when If-None-Match carries the current ETag.
+    """
+    selected = parse_fields(fields)
+    etag = current_etag(db, BOOKS)
+    cached = not_modified(etag, if_none_match, response) or cached_response(request, etag)
+    if cached:
+        return cached
+    count_stmt, page_stmt = list_statements(
+        genre, nationality, reading_type, cursor, limit, selected, status=status, collection=collection
+    )
+    total = db.execute(count_stmt).scalar()
+    rows = db.execute(page_stmt).all()
+    return page_response(request, etag, rows, total, limit, selected)
+
 
-    books = query.order_by(Book.date_finished.desc()).all()
-    return [book_to_dict(b) for b in books]
+@router.get("/search", summary="Full-text search over title, author, notes, genre and collections")
+def search_books(
+    q: str = Query(..., min_length=1, description="Words to find, each matched as a prefix"),
+    limit: int = Query(20, ge=1, le=100),
+    highlight: bool = Query(True, description="Wrap matches in the snippet with <mark> tags"),
+    db: Session = Depends(get_db),
+):
+    """BM25-ranked results with a snippet of the best-matching column."""
+    match = build_match(q)
+    if not match:
+        return []
+    try:
+        rows = db.execute(SEARCH_SQL, search_params(match, limit, highlight)).all()
+    except OperationalError:
+        raise HTTPException(status_code=503, detail="Full-text search is not available on this database")
+    return rows_to_results(rows)
 
 
 @router.post("/", response_model=BookResponse, status_code=201)
@@ -41,13 +197,40 @@ def create_book(book: BookCreate, db: Session = Depends(get_db)):
 
     db_book = Book(**dict_to_book_kwargs(book, book_id))
     db.add(db_book)
+    delta = AggregateDelta()
+    delta.add(db_book)
+    delta.apply(db)
+    bump(db, BOOKS)
     db.commit()
     db.refresh(db_book)
     return book_to_dict(db_book)
 
 
+@router.post("/batch", response_model=BookBatchResponse)
+def batch_books(request: BookBatchRequest, response: Response, db: Session = Depends(get_db)):
+    """
+    Create, patch and delete many books in one transaction, with per-item results.
+    With atomic=true nothing is written unless every operation succeeds (409 otherwise).
+    """
+    result = apply_book_batch(db, request.operations)
+    out = batch_response(result, request.atomic, response)
+    if out["committed"]:
+        db.commit()
+    else:
+        db.rollback()
+    return out
+
+
 @router.get("/{book_id}", response_model=BookResponse)
-def get_book(book_id: str, db: Session = Depends(get_db)):
+def get_book(
+    book_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    cached = not_modified(current_etag(db, BOOKS), if_none_match, response)
+    if cached:
+        return cached
     book = db.query(Book).filter(Book.id == book_id).first()
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
@@ -56,37 +239,38 @@ def get_book(book_id: str, db: Session = Depends(get_db)):
 
 @router.put("/{book_id}", response_model=BookResponse)
 def update_book(book_id: str, book: BookCreate, db: Session = Depends(get_db)):
-    import json
+    db_book = db.query(Book).filter(Book.id == book_id).first()
+    if not db_book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    delta = AggregateDelta()
+    delta.remove(snapshot(db_book))
+
+    apply_update(db_book, book)
+
+    delta.add(db_book)
+    delta.apply(db)
+    bump(db, BOOKS)
+    db.commit()
+    db.refresh(db_book)
+    return book_to_dict(db_book)
 
+
+@router.patch("/{book_id}", response_model=BookResponse)
+def patch_book(book_id: str, changes: BookPatch, db: Session = Depends(get_db)):
+    """Update only the supplied fields; everything else is left as stored."""
     db_book = db.query(Book).filter(Book.id == book_id).first()
     if not db_book:
         raise HTTPException(status_code=404, detail="Book not found")
 
-    db_book.title = book.title
-    db_book.author = book.author
-    db_book.pages = book.pages
-    db_book.genre = book.genre
-    db_book.nationality = book.nationality
-    db_book.date_finished = book.date_finished
-    db_book.timestamp = book.timestamp
-    db_book.rating = book.rating
-    db_book.collections = json.dumps(book.collections)
-    db_book.isbn = book.isbn
-    db_book.year_published = book.year_published
-    db_book.read_count = book.read_count
-    db_book.cover_url = book.cover_url
-    db_book.notes = book.notes
-    db_book.start_date = book.start_date
-    db_book.favorite = book.favorite
-    db_book.reading_type = book.reading_type
-    db_book.academic_field = book.academic_field
-    db_book.academic_level = book.academic_level
-    db_book.chapters_read = (
-        json.dumps(book.chapters_read) if book.chapters_read is not None else None
-    )
-    db_book.total_chapters = book.total_chapters
-    db_book.status = book.status
+    delta = AggregateDelta()
+    delta.remove(snapshot(db_book))
+
+    apply_patch(db_book, changes)
 
+    delta.add(db_book)
+    delta.apply(db)
+    bump(db, BOOKS)
     db.commit()
     db.refresh(db_book)
     return book_to_dict(db_book)
@@ -96,6 +280,9 @@ def update_book(book_id: str, book: BookCreate, db: Session = Depends(get_db)):
 def delete_all_books(db: Session = Depends(get_db)):
     count = db.query(Book).count()
     db.query(Book).delete()
+    clear_aggregates(db)
+    clear_sagas(db)
+    bump(db, BOOKS)
     db.commit()
     return {"message": f"Deleted {count} books", "count": count}
 
@@ -105,6 +292,10 @@ def delete_book(book_id: str, db: Session = Depends(get_db)):
     db_book = db.query(Book).filter(Book.id == book_id).first()
     if not db_book:
         raise HTTPException(status_code=404, detail="Book not found")
+    delta = AggregateDelta()
+    delta.remove(db_book)
     db.delete(db_book)
+    delta.apply(db)
+    bump(db, BOOKS)
     db.commit()
     return {"message": "Book deleted", "id": book_id}
@@ -0,0 +1,186 @@
+"""Async (aiosqlite) version of routers/books.py, mounted when BOOKTRACKER_DB_MODE=async."""
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+from models import Book
+from routers.books import (
+    BOOK_LIST,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    apply_patch,
+    apply_update,
+    batch_response,
+    list_statements,
+    page_response,
+    parse_fields,
+)
+from schemas import BookBatchRequest, BookBatchResponse, BookCreate, BookPatch, BookResponse
+from utils.aggregates import AggregateDelta, clear as clear_aggregates, snapshot
+from utils.batch import apply_book_batch
+from utils.cache import cached_response
+from utils.helpers import book_to_dict, dict_to_book_kwargs
+from utils.sagas import clear as clear_sagas
+from utils.search import SEARCH_SQL, build_match, rows_to_results, search_params
+from utils.versions import BOOKS, bump, current_etag, not_modified
+
+router = APIRouter()
+
+
+@router.get("/", response_model=BOOK_LIST)
+async def get_books(
+    request: Request,
+    response: Response,
+    genre: Optional[str] = None,
+    nationality: Optional[str] = None,
+    reading_type: Optional[str] = None,
+    status: Optional[str] = None,
+    collection: Optional[str] = Query(None, description="Only books in this collection (exact name)"),
+    cursor: Optional[str] = Query(None, description="Opaque token from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return, e.g. id,title,author"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    selected = parse_fields(fields)
+    etag = await db.run_sync(current_etag, BOOKS)
+    cached = not_modified(etag, if_none_match, response) or cached_response(request, etag)
+    if cached:
+        return cached
+    count_stmt, page_stmt = list_statements(
+        genre, nationality, reading_type, cursor, limit, selected, status=status, collection=collection
+    )
+    total = (await db.execute(count_stmt)).scalar()
+    rows = (await db.execute(page_stmt)).all()
+    return page_response(request, etag, rows, total, limit, selected)
+
+
+@router.get("/search", summary="Full-text search over title, author, notes, genre and collections")
+async def search_books(
+    q: str = Query(..., min_length=1, description="Words to find, each matched as a prefix"),
+    limit: int = Query(20, ge=1, le=100),
+    highlight: bool = Query(True, description="Wrap matches in the snippet with <mark> tags"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    match = build_match(q)
+    if not match:
+        return []
+    try:
+        rows = (await db.execute(SEARCH_SQL, search_params(match, limit, highlight))).all()
+    except OperationalError:
+        raise HTTPException(status_code=503, detail="Full-text search is not available on this database")
+    return rows_to_results(rows)
+
+
+@router.post("/", response_model=BookResponse, status_code=201)
+async def create_book(book: BookCreate, db: AsyncSession = Depends(get_async_db)):
+    book_id = book.id or str(uuid.uuid4())
+
+    # Avoid duplicate IDs
+    if await db.get(Book, book_id):
+        book_id = str(uuid.uuid4())
+
+    db_book = Book(**dict_to_book_kwargs(book, book_id))
+    db.add(db_book)
+    delta = AggregateDelta()
+    delta.add(db_book)
+    await db.run_sync(delta.apply)
+    await db.run_sync(bump, BOOKS)
+    await db.commit()
+    await db.refresh(db_book)
+    return book_to_dict(db_book)
+
+
+@router.post("/batch", response_model=BookBatchResponse)
+async def batch_books(request: BookBatchRequest, response: Response, db: AsyncSession = Depends(get_async_db)):
+    result = await db.run_sync(apply_book_batch, request.operations)
+    out = batch_response(result, request.atomic, response)
+    if out["committed"]:
+        await db.commit()
+    else:
+        await db.rollback()
+    return out
+
+
+@router.get("/{book_id}", response_model=BookResponse)
+async def get_book(
+    book_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    cached = not_modified(await db.run_sync(current_etag, BOOKS), if_none_match, response)
+    if cached:
+        return cached
+    book = await db.get(Book, book_id)
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return book_to_dict(book)
+
+
+@router.put("/{book_id}", response_model=BookResponse)
+async def update_book(book_id: str, book: BookCreate, db: AsyncSession = Depends(get_async_db)):
+    db_book = await db.get(Book, book_id)
+    if not db_book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    delta = AggregateDelta()
+    delta.remove(snapshot(db_book))
+
+    apply_update(db_book, book)
+
+    delta.add(db_book)
+    await db.run_sync(delta.apply)
+    await db.run_sync(bump, BOOKS)
+    await db.commit()
+    await db.refresh(db_book)
+    return book_to_dict(db_book)
+
+
+@router.patch("/{book_id}", response_model=BookResponse)
+async def patch_book(book_id: str, changes: BookPatch, db: AsyncSession = Depends(get_async_db)):
+    db_book = await db.get(Book, book_id)
+    if not db_book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    delta = AggregateDelta()
+    delta.remove(snapshot(db_book))
+
+    apply_patch(db_book, changes)
+
+    delta.add(db_book)
+    await db.run_sync(delta.apply)
+    await db.run_sync(bump, BOOKS)
+    await db.commit()
+    await db.refresh(db_book)
+    return book_to_dict(db_book)
+
+
+@router.delete("/all", summary="Delete every book in the database")
+async def delete_all_books(db: AsyncSession = Depends(get_async_db)):
+    count = (await db.execute(select(func.count(Book.id)))).scalar()
+    await db.execute(delete(Book))
+    await db.run_sync(clear_aggregates)
+    await db.run_sync(clear_sagas)
+    await db.run_sync(bump, BOOKS)
+    await db.commit()
+    return {"message": f"Deleted {count} books", "count": count}
+
+
+@router.delete("/{book_id}")
+async def delete_book(book_id: str, db: AsyncSession = Depends(get_async_db)):
+    db_book = await db.get(Book, book_id)
+    if not db_book:
+        raise HTTPException(status_code=404, detail="Book not found")
+    delta = AggregateDelta()
+    delta.remove(db_book)
+    await db.delete(db_book)
+    await db.run_sync(delta.apply)
+    await db.run_sync(bump, BOOKS)
+    await db.commit()
+    return {"message": "Book deleted", "id": book_id}
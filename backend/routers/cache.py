@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+
+from utils.cache import cache_info, response_cache
+
+router = APIRouter()
+
+
+@router.get("/stats", summary="Response cache size and hit/miss/eviction counters")
+def get_cache_stats():
+    return cache_info()
+
+
+@router.delete("/", summary="Drop every cached response")
+def clear_cache():
+    if response_cache is not None:
+        response_cache.clear()
+    return {"message": "Response cache cleared"}
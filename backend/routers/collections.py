@@ -0,0 +1,27 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from database import get_db
+from utils.cache import cache_response, cached_response
+from utils.relations import collection_counts
+from utils.versions import BOOKS, current_etag, not_modified
+
+router = APIRouter()
+
+
+@router.get("/", summary="Every collection with its book count, pages and date range")
+def get_collections(
+    request: Request,
+    response: Response,
+    min_count: int = Query(1, ge=1, description="Hide collections with fewer books"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Books of one collection: GET /api/books/?collection=<name>."""
+    etag = current_etag(db, BOOKS)
+    cached = not_modified(etag, if_none_match, response) or cached_response(request, etag)
+    if cached:
+        return cached
+    return cache_response(request, [BOOKS], etag, collection_counts(db, min_count))
@@ -1,102 +1,167 @@
-import csv
-import io
 import json
-import uuid
+import shutil
+import tempfile
 from datetime import date
+from typing import BinaryIO, Iterator, Optional
 
-from fastapi import APIRouter, Depends, File, UploadFile
+from fastapi import APIRouter, Depends, File, Header, Query, UploadFile
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from database import get_db
+from database import get_db, open_session
 from models import AuthorProfile, Book, ReadingGoal
+from routers.authors import profile_to_dict
 from schemas import BulkImportResponse, ImportRequest
-from utils.helpers import book_to_dict, dict_to_book_kwargs
+from utils.assets import inline
+from utils.goodreads import READ_CHUNK_SIZE, iter_goodreads_import
+from utils.helpers import book_to_dict
+from utils.importer import bulk_import_books
+from utils.streaming import (
+    BATCH_SIZE,
+    accepts_gzip,
+    csv_chunks,
+    encode_chunks,
+    gzip_chunks,
+    json_array_chunks,
+)
 
 router = APIRouter()
 
 
 # ─── Export endpoints ────────────────────────────────────────────────────────
+#
+# Exports are generators: rows are pulled from a server-side cursor in batches
+# (yield_per) and encoded incrementally, so memory stays flat and the first
+# bytes go out before the query is exhausted. The generators open their own
+# session because request-scoped dependencies are closed before streaming ends;
+# export jobs (utils.jobs) write the same chunks to a file.
+
+CSV_HEADER = [
+    "Title", "Author", "Pages", "Genre", "Nationality",
+    "Date Finished", "Rating", "Collections", "ISBN",
+    "Year Published", "Notes", "Reading Type", "Favorite",
+    "Cover URL", "Start Date", "Academic Field", "Academic Level",
+]
+
+
+def stream_download(
+    chunks: Iterator[bytes],
+    media_type: str,
+    filename: str,
+    gzip: bool,
+    accept_encoding: Optional[str],
+) -> StreamingResponse:
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip and accepts_gzip(accept_encoding):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+def _iter_books(db: Session, order_by=None):
+    query = db.query(Book)
+    if order_by is not None:
+        query = query.order_by(order_by)
+    return query.yield_per(BATCH_SIZE)
+
+
+def json_export_chunks() -> Iterator[str]:
+    db = open_session()
+    try:
+        books = _iter_books(db, Book.date_finished.desc())
+        yield from json_array_chunks(book_to_dict(b) for b in books)
+    finally:
+        db.close()
+
+
+def csv_row(b: Book) -> list:
+    collections = json.loads(b.collections or "[]")
+    return [
+        b.title, b.author, b.pages, b.genre, b.nationality,
+        b.date_finished, b.rating or "",
+        ", ".join(collections),
+        b.isbn or "", b.year_published or "", b.notes or "",
+        b.reading_type or "",
+        "Yes" if b.favorite else "No",
+        b.cover_url or "", b.start_date or "",
+        b.academic_field or "", b.academic_level or "",
+    ]
+
+
+def csv_export_chunks() -> Iterator[str]:
+    db = open_session()
+    try:
+        books = _iter_books(db, Book.date_finished.desc())
+        yield from csv_chunks(CSV_HEADER, (csv_row(b) for b in books))
+    finally:
+        db.close()
+
+
+def backup_preamble(exported_at: str) -> str:
+    return f'{{\n  "version": "1.0",\n  "exported_at": {json.dumps(exported_at)},\n  "readings": '
+
+
+def backup_book(b: Book, inline_assets: bool) -> dict:
+    book = book_to_dict(b)
+    if inline_assets:
+        book["cover_url"] = inline(book["cover_url"])
+    return book
+
+
+def backup_chunks(exported_at: str, inline_assets: bool) -> Iterator[str]:
+    db = open_session()
+    try:
+        yield backup_preamble(exported_at)
+        yield from json_array_chunks((backup_book(b, inline_assets) for b in _iter_books(db)), level=1)
+        yield ',\n  "author_profiles": '
+        yield from json_array_chunks(
+            (profile_to_dict(p) for p in db.query(AuthorProfile).yield_per(BATCH_SIZE)),
+            level=1,
+        )
+        yield ',\n  "reading_goals": '
+        yield from json_array_chunks(
+            ({"year": g.year, "target_books": g.target_books} for g in db.query(ReadingGoal)),
+            level=1,
+        )
+        yield "\n}"
+    finally:
+        db.close()
+
 
 @router.get("/json", summary="Download all books as JSON")
-def export_json(db: Session = Depends(get_db)):
-    books = db.query(Book).order_by(Book.date_finished.desc()).all()
-    data = [book_to_dict(b) for b in books]
-    content = json.dumps(data, ensure_ascii=False, indent=2)
+def export_json(
+    gzip: bool = Query(False, description="Compress with gzip when the client accepts it"),
+    accept_encoding: Optional[str] = Header(None),
+):
     filename = f"book-readings-{date.today().isoformat()}.json"
-    return StreamingResponse(
-        io.BytesIO(content.encode("utf-8")),
-        media_type="application/json",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    return stream_download(
+        encode_chunks(json_export_chunks()), "application/json", filename, gzip, accept_encoding
     )
 
 
 @router.get("/csv", summary="Download all books as CSV")
-def export_csv(db: Session = Depends(get_db)):
-    books = db.query(Book).order_by(Book.date_finished.desc()).all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "Title", "Author", "Pages", "Genre", "Nationality",
-        "Date Finished", "Rating", "Collections", "ISBN",
-        "Year Published", "Notes", "Reading Type", "Favorite",
-        "Cover URL", "Start Date", "Academic Field", "Academic Level",
-    ])
-
-    for b in books:
-        collections = json.loads(b.collections or "[]")
-        writer.writerow([
-            b.title, b.author, b.pages, b.genre, b.nationality,
-            b.date_finished, b.rating or "",
-            ", ".join(collections),
-            b.isbn or "", b.year_published or "", b.notes or "",
-            b.reading_type or "",
-            "Yes" if b.favorite else "No",
-            b.cover_url or "", b.start_date or "",
-            b.academic_field or "", b.academic_level or "",
-        ])
-
-    content = output.getvalue()
+def export_csv(
+    gzip: bool = Query(False, description="Compress with gzip when the client accepts it"),
+    accept_encoding: Optional[str] = Header(None),
+):
     filename = f"book-readings-{date.today().isoformat()}.csv"
-    return StreamingResponse(
-        io.BytesIO(content.encode("utf-8-sig")),   # utf-8-sig for Excel BOM
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    return stream_download(
+        encode_chunks(csv_export_chunks(), "utf-8-sig"),   # utf-8-sig for Excel BOM
+        "text/csv", filename, gzip, accept_encoding,
     )
 
 
 @router.get("/backup", summary="Download full backup (books + authors + goals)")
-def export_backup(db: Session = Depends(get_db)):
-    books = db.query(Book).all()
-    profiles = db.query(AuthorProfile).all()
-    goals = db.query(ReadingGoal).all()
-
-    backup = {
-        "version": "1.0",
-        "exported_at": date.today().isoformat(),
-        "readings": [book_to_dict(b) for b in books],
-        "author_profiles": [
-            {
-                "name": p.name,
-                "nationality": p.nationality,
-                "primary_genre": p.primary_genre,
-                "favorite_book": p.favorite_book,
-                "bio": p.bio,
-            }
-            for p in profiles
-        ],
-        "reading_goals": [
-            {"year": g.year, "target_books": g.target_books} for g in goals
-        ],
-    }
-
-    content = json.dumps(backup, ensure_ascii=False, indent=2)
-    filename = f"book-tracker-backup-{date.today().isoformat()}.json"
-    return StreamingResponse(
-        io.BytesIO(content.encode("utf-8")),
-        media_type="application/json",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+def export_backup(
+    gzip: bool = Query(False, description="Compress with gzip when the client accepts it"),
+    inline_assets: bool = Query(True, description="Embed stored cover images as data: URLs so the backup restores anywhere"),
+    accept_encoding: Optional[str] = Header(None),
+):
+    today = date.today().isoformat()
+    filename = f"book-tracker-backup-{today}.json"
+    return stream_download(
+        encode_chunks(backup_chunks(today, inline_assets)), "application/json", filename, gzip, accept_encoding
     )
 
 
@@ -107,128 +172,56 @@ def import_json(request: ImportRequest, db: Session = Depends(get_db)):
     """
     Import books (and optionally author profiles) from a JSON payload.
     Set replace=true to wipe existing books first.
+    Runs as one transaction with batched inserts; see utils.importer.
     """
-    if request.replace:
-        db.query(Book).delete()
-        db.commit()
-        existing_keys: set = set()
-    else:
-        existing_books = db.query(Book.title, Book.author).all()
-        existing_keys = {f"{b.title}|{b.author}" for b in existing_books}
-
-    imported = 0
-    skipped = 0
-
-    for book_data in request.readings:
-        key = f"{book_data.title}|{book_data.author}"
-        if key in existing_keys:
-            skipped += 1
-            continue
-
-        book_id = book_data.id or str(uuid.uuid4())
-        # Avoid duplicate PK if the same id appears twice in the payload
-        if db.query(Book).filter(Book.id == book_id).first():
-            book_id = str(uuid.uuid4())
-
-        db_book = Book(**dict_to_book_kwargs(book_data, book_id))
-        db.add(db_book)
-        existing_keys.add(key)
-        imported += 1
-
-    # Import author profiles if supplied
-    if request.author_profiles:
-        for pd in request.author_profiles:
-            existing = db.query(AuthorProfile).filter(AuthorProfile.name == pd.name).first()
-            if not existing:
-                db.add(AuthorProfile(
-                    name=pd.name,
-                    nationality=pd.nationality,
-                    primary_genre=pd.primary_genre,
-                    favorite_book=pd.favorite_book,
-                    bio=pd.bio,
-                ))
-
+    result = bulk_import_books(db, request.readings, request.author_profiles, request.replace)
     db.commit()
     return {
-        "imported": imported,
-        "skipped": skipped,
-        "total": len(request.readings),
-        "message": f"Imported {imported} books, skipped {skipped} duplicates.",
+        **result,
+        "message": f"Imported {result['imported']} books, skipped {result['skipped']} duplicates.",
     }
 
 
+def _goodreads_progress_stream(upload: BinaryIO, total_bytes: Optional[int]) -> Iterator[str]:
+    db = open_session()
+    try:
+        for event in iter_goodreads_import(db, upload, total_bytes):
+            if event["done"]:
+                event["message"] = goodreads_message(event)
+            yield json.dumps(event) + "\n"
+    except Exception as exc:
+        db.rollback()
+        yield json.dumps({"done": True, "error": str(exc)}) + "\n"
+    finally:
+        db.close()
+        upload.close()
+
+
+def goodreads_message(result: dict) -> str:
+    return f"Imported {result['imported']} books from Goodreads, skipped {result['skipped']} duplicates."
+
+
 @router.post("/import/goodreads", response_model=BulkImportResponse)
-async def import_goodreads_csv(
+def import_goodreads_csv(
     file: UploadFile = File(...),
+    progress: bool = Query(False, description="Stream NDJSON progress events instead of a single summary"),
     db: Session = Depends(get_db),
 ):
-    """Parse a Goodreads CSV export and import books."""
-    content = await file.read()
-    text = content.decode("utf-8-sig")  # Handle BOM from Goodreads export
-
-    reader = csv.DictReader(io.StringIO(text))
-
-    existing_books = db.query(Book.title, Book.author).all()
-    existing_keys = {f"{b.title}|{b.author}" for b in existing_books}
-
-    imported = 0
-    skipped = 0
-
-    for row in reader:
-        title = (row.get("Title") or "").strip()
-        author = (row.get("Author") or "").strip()
-        if not title or not author:
-            continue
-
-        key = f"{title}|{author}"
-        if key in existing_keys:
-            skipped += 1
-            continue
-
-        try:
-            pages = int(row.get("Number of Pages") or 0) or 0
-        except (ValueError, TypeError):
-            pages = 0
-
-        try:
-            raw_rating = float(row.get("My Rating") or 0)
-            rating: float | None = raw_rating if raw_rating > 0 else None
-        except (ValueError, TypeError):
-            rating = None
-
-        try:
-            year_published = int(row.get("Year Published") or 0) or None
-        except (ValueError, TypeError):
-            year_published = None
-
-        date_finished = (row.get("Date Read") or "").strip() or date.today().isoformat()
-        shelf = (row.get("Bookshelves") or "").strip() or "Unknown"
-        isbn_raw = (row.get("ISBN13") or row.get("ISBN") or "").strip()
-        isbn = isbn_raw.lstrip("=").strip('"') or None
-
-        db_book = Book(
-            id=str(uuid.uuid4()),
-            title=title,
-            author=author,
-            pages=pages or 200,
-            genre=shelf,
-            nationality="Unknown",
-            date_finished=date_finished,
-            rating=rating,
-            collections=json.dumps([]),
-            isbn=isbn,
-            year_published=year_published,
-            notes=(row.get("My Review") or "").strip() or None,
-            favorite=False,
+    """
+    Parse a Goodreads CSV export and import books.
+    The upload is decoded and parsed in chunks on a worker thread and committed
+    in batches. With progress=true the response is an NDJSON stream with one
+    event per committed batch; the last event has done=true.
+    """
+    if progress:
+        # The upload is closed once this handler returns, so hand the stream its own copy
+        upload = tempfile.TemporaryFile()
+        shutil.copyfileobj(file.file, upload, READ_CHUNK_SIZE)
+        upload.seek(0)
+        return StreamingResponse(
+            _goodreads_progress_stream(upload, file.size),
+            media_type="application/x-ndjson",
         )
-        db.add(db_book)
-        existing_keys.add(key)
-        imported += 1
 
-    db.commit()
-    return {
-        "imported": imported,
-        "skipped": skipped,
-        "total": imported + skipped,
-        "message": f"Imported {imported} books from Goodreads, skipped {skipped} duplicates.",
-    }
+    *_, result = iter_goodreads_import(db, file.file, file.size)
+    return {**result, "message": goodreads_message(result)}
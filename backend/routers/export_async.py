@@ -0,0 +1,126 @@
+"""Async (aiosqlite) version of routers/export.py, mounted when BOOKTRACKER_DB_MODE=async."""
+from datetime import date
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db, open_async_session
+from models import AuthorProfile, Book, ReadingGoal
+from routers import export
+from routers.authors import profile_to_dict
+from routers.export import CSV_HEADER, backup_book, backup_preamble, csv_row, stream_download
+from schemas import BulkImportResponse, ImportRequest
+from utils.helpers import book_to_dict
+from utils.importer import bulk_import_books
+from utils.streaming import BATCH_SIZE, CsvEncoder, JsonArrayEncoder, encode_chunks
+
+router = APIRouter()
+
+
+# ─── Export endpoints ────────────────────────────────────────────────────────
+
+async def _stream_json_array(db: AsyncSession, stmt, to_dict, level: int = 0) -> AsyncIterator[str]:
+    encoder = JsonArrayEncoder(level)
+    result = await db.stream_scalars(stmt.execution_options(yield_per=BATCH_SIZE))
+    async for batch in result.partitions():
+        yield encoder.encode(to_dict(row) for row in batch)
+    yield encoder.close()
+
+
+async def _json_export_chunks() -> AsyncIterator[str]:
+    async with open_async_session() as db:
+        stmt = select(Book).order_by(Book.date_finished.desc())
+        async for chunk in _stream_json_array(db, stmt, book_to_dict):
+            yield chunk
+
+
+async def _csv_export_chunks() -> AsyncIterator[str]:
+    async with open_async_session() as db:
+        encoder = CsvEncoder()
+        yield encoder.encode([CSV_HEADER])
+        stmt = select(Book).order_by(Book.date_finished.desc()).execution_options(yield_per=BATCH_SIZE)
+        result = await db.stream_scalars(stmt)
+        async for batch in result.partitions():
+            yield encoder.encode(csv_row(b) for b in batch)
+
+
+async def _backup_chunks(exported_at: str, inline_assets: bool) -> AsyncIterator[str]:
+    async with open_async_session() as db:
+        yield backup_preamble(exported_at)
+        to_dict = lambda b: backup_book(b, inline_assets)  # noqa: E731
+        async for chunk in _stream_json_array(db, select(Book), to_dict, level=1):
+            yield chunk
+        yield ',\n  "author_profiles": '
+        async for chunk in _stream_json_array(db, select(AuthorProfile), profile_to_dict, level=1):
+            yield chunk
+        yield ',\n  "reading_goals": '
+        goal_to_dict = lambda g: {"year": g.year, "target_books": g.target_books}  # noqa: E731
+        async for chunk in _stream_json_array(db, select(ReadingGoal), goal_to_dict, level=1):
+            yield chunk
+        yield "\n}"
+
+
+@router.get("/json", summary="Download all books as JSON")
+async def export_json(
+    gzip: bool = Query(False, description="Compress with gzip when the client accepts it"),
+    accept_encoding: Optional[str] = Header(None),
+):
+    filename = f"book-readings-{date.today().isoformat()}.json"
+    return stream_download(
+        encode_chunks(_json_export_chunks()), "application/json", filename, gzip, accept_encoding
+    )
+
+
+@router.get("/csv", summary="Download all books as CSV")
+async def export_csv(
+    gzip: bool = Query(False, description="Compress with gzip when the client accepts it"),
+    accept_encoding: Optional[str] = Header(None),
+):
+    filename = f"book-readings-{date.today().isoformat()}.csv"
+    return stream_download(
+        encode_chunks(_csv_export_chunks(), "utf-8-sig"),   # utf-8-sig for Excel BOM
+        "text/csv", filename, gzip, accept_encoding,
+    )
+
+
+@router.get("/backup", summary="Download full backup (books + authors + goals)")
+async def export_backup(
+    gzip: bool = Query(False, description="Compress with gzip when the client accepts it"),
+    inline_assets: bool = Query(True, description="Embed stored cover images as data: URLs so the backup restores anywhere"),
+    accept_encoding: Optional[str] = Header(None),
+):
+    today = date.today().isoformat()
+    filename = f"book-tracker-backup-{today}.json"
+    return stream_download(
+        encode_chunks(_backup_chunks(today, inline_assets)), "application/json", filename, gzip, accept_encoding
+    )
+
+
+# ─── Import endpoints ────────────────────────────────────────────────────────
+
+@router.post("/import/json", response_model=BulkImportResponse)
+async def import_json(request: ImportRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Import books (and optionally author profiles) from a JSON payload.
+    Set replace=true to wipe existing books first.
+    """
+    result = await db.run_sync(
+        bulk_import_books, request.readings, request.author_profiles, request.replace
+    )
+    await db.commit()
+    return {
+        **result,
+        "message": f"Imported {result['imported']} books, skipped {result['skipped']} duplicates.",
+    }
+
+
+# The Goodreads importer parses on a worker thread with its own sync session,
+# so the async mode serves the same handler.
+router.add_api_route(
+    "/import/goodreads",
+    export.import_goodreads_csv,
+    methods=["POST"],
+    response_model=BulkImportResponse,
+)
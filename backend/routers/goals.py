@@ -1,19 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from database import get_db
 from models import ReadingGoal
-from schemas import ReadingGoalCreate, ReadingGoalResponse
+from schemas import GoalProgressResponse, ReadingGoalCreate, ReadingGoalResponse
+from utils.cache import cache_response, cached_response
+from utils.stats import goal_progress
+from utils.versions import BOOKS, GOALS, bump, current_etag, not_modified
 
 router = APIRouter()
 
 
 @router.get("/{year}", response_model=ReadingGoalResponse)
-def get_goal(year: int, db: Session = Depends(get_db)):
+def get_goal(
+    year: int,
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    etag = current_etag(db, GOALS)
+    cached = not_modified(etag, if_none_match, response) or cached_response(request, etag)
+    if cached:
+        return cached
     goal = db.query(ReadingGoal).filter(ReadingGoal.year == year).first()
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found for this year")
-    return {"year": goal.year, "target_books": goal.target_books}
+    content = {"year": goal.year, "target_books": goal.target_books}
+    return cache_response(request, [GOALS], etag, content, ReadingGoalResponse)
+
+
+@router.get("/{year}/progress", response_model=GoalProgressResponse)
+def get_goal_progress(
+    year: int,
+    request: Request,
+    response: Response,
+    as_of: Optional[date] = Query(None, description="Day the pace is measured at (default: today)"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Books read in the year against its goal; a range scan over finished_on."""
+    as_of = as_of or date.today()
+    # The pace depends on the day too, so it is part of the validator
+    etag = current_etag(db, BOOKS, GOALS)[:-1] + f'-{as_of.isoformat()}"'
+    cached = not_modified(etag, if_none_match, response) or cached_response(request, etag)
+    if cached:
+        return cached
+    goal = db.query(ReadingGoal).filter(ReadingGoal.year == year).first()
+    content = goal_progress(db, year, goal.target_books if goal else None, as_of)
+    return cache_response(request, [BOOKS, GOALS], etag, content, GoalProgressResponse)
 
 
 @router.post("/", response_model=ReadingGoalResponse)
@@ -21,12 +59,14 @@ def set_goal(goal: ReadingGoalCreate, db: Session = Depends(get_db)):
     existing = db.query(ReadingGoal).filter(ReadingGoal.year == goal.year).first()
     if existing:
         existing.target_books = goal.target_books
+        bump(db, GOALS)
         db.commit()
         db.refresh(existing)
         return {"year": existing.year, "target_books": existing.target_books}
 
     new_goal = ReadingGoal(year=goal.year, target_books=goal.target_books)
     db.add(new_goal)
+    bump(db, GOALS)
     db.commit()
     db.refresh(new_goal)
     return {"year": new_goal.year, "target_books": new_goal.target_books}
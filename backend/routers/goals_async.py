@@ -0,0 +1,70 @@
+"""Async (aiosqlite) version of routers/goals.py, mounted when BOOKTRACKER_DB_MODE=async."""
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+from models import ReadingGoal
+from schemas import GoalProgressResponse, ReadingGoalCreate, ReadingGoalResponse
+from utils.cache import cache_response, cached_response
+from utils.stats import goal_progress
+from utils.versions import BOOKS, GOALS, bump, current_etag, not_modified
+
+router = APIRouter()
+
+
+@router.get("/{year}", response_model=ReadingGoalResponse)
+async def get_goal(
+    year: int,
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    etag = await db.run_sync(current_etag, GOALS)
+    cached = not_modified(etag, if_none_match, response) or cached_response(request, etag)
+    if cached:
+        return cached
+    goal = await db.get(ReadingGoal, year)
+    if not goal:
+        raise HTTPException(status_code=404, detail="Goal not found for this year")
+    content = {"year": goal.year, "target_books": goal.target_books}
+    return cache_response(request, [GOALS], etag, content, ReadingGoalResponse)
+
+
+@router.get("/{year}/progress", response_model=GoalProgressResponse)
+async def get_goal_progress(
+    year: int,
+    request: Request,
+    response: Response,
+    as_of: Optional[date] = Query(None, description="Day the pace is measured at (default: today)"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    as_of = as_of or date.today()
+    etag = (await db.run_sync(current_etag, BOOKS, GOALS))[:-1] + f'-{as_of.isoformat()}"'
+    cached = not_modified(etag, if_none_match, response) or cached_response(request, etag)
+    if cached:
+        return cached
+    goal = await db.get(ReadingGoal, year)
+    target = goal.target_books if goal else None
+    content = await db.run_sync(goal_progress, year, target, as_of)
+    return cache_response(request, [BOOKS, GOALS], etag, content, GoalProgressResponse)
+
+
+@router.post("/", response_model=ReadingGoalResponse)
+async def set_goal(goal: ReadingGoalCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.get(ReadingGoal, goal.year)
+    if existing:
+        existing.target_books = goal.target_books
+        await db.run_sync(bump, GOALS)
+        await db.commit()
+        return {"year": existing.year, "target_books": existing.target_books}
+
+    new_goal = ReadingGoal(year=goal.year, target_books=goal.target_books)
+    db.add(new_goal)
+    await db.run_sync(bump, GOALS)
+    await db.commit()
+    return {"year": new_goal.year, "target_books": new_goal.target_books}
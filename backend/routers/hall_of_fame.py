@@ -1,39 +1,132 @@
-from fastapi import APIRouter, Depends
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-import json
 
 from database import get_db
-from models import HallOfFame
-from schemas import HallOfFamePayload
+from schemas import HallOfFamePatchResult, HallOfFamePayload, JsonPatchOperation
+from utils import hall_of_fame as store
+from utils.cache import cached_response, store_response
+from utils.versions import HALL_OF_FAME, bump, current_etag, not_modified, validator_headers
 
 router = APIRouter()
 
-_EMPTY: dict = {
-    "badges": [],
-    "categories": [],
-    "nominations": [],
-    "annualAwards": [],
-    "rankings": [],
-    "authorPhotos": {},
-}
 
+def _raise_patch_error(e: store.PatchError):
+    raise HTTPException(status_code=409 if isinstance(e, store.PatchConflict) else 422, detail=str(e))
+
+
+def _check_section(section: str):
+    if section not in store.SECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown section; expected one of {', '.join(store.SECTIONS)}")
+
+
+# ─── Whole document ──────────────────────────────────────────────────────────
 
 @router.get("/")
-def get_hall_of_fame(db: Session = Depends(get_db)):
-    record = db.query(HallOfFame).first()
-    if not record:
-        return {"data": _EMPTY}
-    return {"data": json.loads(record.data)}
+def get_hall_of_fame(
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    etag = current_etag(db, HALL_OF_FAME)
+    cached = not_modified(etag, if_none_match, response) or cached_response(request, etag)
+    if cached:
+        return cached
+    return store_response(request, [HALL_OF_FAME], etag, store.document_body(db))
 
 
 @router.put("/")
 def set_hall_of_fame(payload: HallOfFamePayload, db: Session = Depends(get_db)):
-    record = db.query(HallOfFame).first()
-    serialized = json.dumps(payload.data)
-    if record:
-        record.data = serialized
-    else:
-        record = HallOfFame(id=1, data=serialized)
-        db.add(record)
-    db.commit()
+    """Replace the whole document; only the entries that differ are written."""
+    try:
+        written = store.write_document(db, payload.data)
+    except store.PatchError as e:
+        db.rollback()
+        _raise_patch_error(e)
+    if written:
+        bump(db, HALL_OF_FAME)
+        db.commit()
     return {"data": payload.data}
+
+
+@router.patch("/", response_model=HallOfFamePatchResult)
+def patch_hall_of_fame(operations: List[JsonPatchOperation], db: Session = Depends(get_db)):
+    """
+    Apply a JSON Patch (RFC 6902), e.g. [{"op": "add", "path": "/badges/-", "value": {...}}].
+    All operations apply or none do: 409 when one does not apply to the current document.
+    """
+    try:
+        sections, written = store.patch_document(db, operations)
+    except store.PatchError as e:
+        db.rollback()
+        _raise_patch_error(e)
+    if written:
+        bump(db, HALL_OF_FAME)
+        db.commit()
+    return {"sections": sections, "rows_written": written}
+
+
+# ─── Sections and single entries ─────────────────────────────────────────────
+# Entry keys: badges {bookId}/{badgeId}, nominations {categoryId}/{bookId},
+# annualAwards {year}/{type}, categories and rankings {id}, authorPhotos the author name.
+
+@router.get("/{section}")
+def get_section(
+    section: str,
+    request: Request,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    _check_section(section)
+    etag = current_etag(db, HALL_OF_FAME)
+    cached = not_modified(etag, if_none_match, response) or cached_response(request, etag)
+    if cached:
+        return cached
+    return store_response(request, [HALL_OF_FAME], etag, store.section_body(db, section))
+
+
+@router.get("/{section}/{key:path}")
+def get_entry(
+    section: str,
+    key: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    _check_section(section)
+    etag = current_etag(db, HALL_OF_FAME)
+    cached = not_modified(etag, if_none_match, response)
+    if cached:
+        return cached
+    data = store.load_item(db, section, key)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    return Response(data, media_type="application/json", headers=validator_headers(etag))
+
+
+@router.put("/{section}/{key:path}")
+def put_entry(section: str, key: str, response: Response, value: Any = Body(...), db: Session = Depends(get_db)):
+    """Create or replace one entry, e.g. PUT /rankings/{id} or PUT /authorPhotos/{author}."""
+    _check_section(section)
+    try:
+        created = store.put_item(db, section, key, value)
+    except store.PatchError as e:
+        _raise_patch_error(e)
+    bump(db, HALL_OF_FAME)
+    db.commit()
+    if created:
+        response.status_code = 201
+    return value
+
+
+@router.delete("/{section}/{key:path}")
+def delete_entry(section: str, key: str, db: Session = Depends(get_db)):
+    _check_section(section)
+    if not store.delete_item(db, section, key):
+        raise HTTPException(status_code=404, detail="Entry not found")
+    bump(db, HALL_OF_FAME)
+    db.commit()
+    return {"message": "Entry deleted", "section": section, "key": key}
@@ -0,0 +1,132 @@
+import json
+import os
+import shutil
+import uuid
+from typing import Literal, Optional
+
+from fastapi import APIRouter, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+from config import JOB_DIR
+from utils import jobs
+from utils.goodreads import READ_CHUNK_SIZE
+from utils.jobs import store
+from utils.tenants import current_tenant
+
+router = APIRouter()
+
+EXPORT_KINDS = {"json": "export_json", "csv": "export_csv", "backup": "backup"}
+MEDIA_TYPES = {".json": "application/json", ".csv": "text/csv", ".gz": "application/gzip"}
+
+
+def _tenant() -> str:
+    return current_tenant() or ""
+
+
+def _check_capacity():
+    if jobs.runner.full():
+        raise HTTPException(status_code=429, detail="Too many jobs pending; retry later",
+                            headers={"Retry-After": "5"})
+
+
+def _submit(response: Response, kind: str, params: dict, job_id: Optional[str] = None) -> dict:
+    job = store.create(kind, params, _tenant(), job_id)
+    jobs.runner.submit(job)
+    response.headers["Location"] = f"/api/jobs/{job['id']}"
+    return jobs.job_to_dict(job)
+
+
+def _get_job(job_id: str) -> dict:
+    job = store.get(job_id, _tenant())
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+# ─── Submitting ──────────────────────────────────────────────────────────────
+
+@router.post("/import/json", status_code=202, summary="Queue a JSON import (body as for /api/import/json)")
+async def queue_import_json(request: Request, response: Response):
+    """
+    The body is spooled to disk unparsed: validation happens in the job, and a
+    malformed payload fails the job rather than the request.
+    """
+    _check_capacity()
+    job_id = uuid.uuid4().hex
+    os.makedirs(JOB_DIR, exist_ok=True)
+    try:
+        with open(jobs.input_path(job_id), "wb") as f:
+            async for chunk in request.stream():
+                f.write(chunk)
+    except BaseException:
+        os.remove(jobs.input_path(job_id))
+        raise
+    return await run_in_threadpool(_submit, response, "import_json", {}, job_id)
+
+
+@router.post("/import/goodreads", status_code=202, summary="Queue a Goodreads CSV import")
+def queue_import_goodreads(response: Response, file: UploadFile = File(...)):
+    _check_capacity()
+    job_id = uuid.uuid4().hex
+    os.makedirs(JOB_DIR, exist_ok=True)
+    with open(jobs.input_path(job_id), "wb") as f:
+        shutil.copyfileobj(file.file, f, READ_CHUNK_SIZE)
+    return _submit(response, "import_goodreads", {"filename": file.filename}, job_id)
+
+
+@router.post("/export/{kind}", status_code=202, summary="Queue a JSON, CSV or full backup export")
+def queue_export(
+    kind: Literal["json", "csv", "backup"],
+    response: Response,
+    gzip: bool = Query(False, description="Store the result gzip-compressed (.gz)"),
+    inline_assets: bool = Query(True, description="Backups only: embed stored cover images as data: URLs"),
+):
+    _check_capacity()
+    params = {"gzip": gzip, **({"inline_assets": inline_assets} if kind == "backup" else {})}
+    return _submit(response, EXPORT_KINDS[kind], params)
+
+
+# ─── Status, results, cancelling ─────────────────────────────────────────────
+
+@router.get("/", summary="Recent jobs, newest first")
+def list_jobs(
+    status: Optional[Literal["queued", "running", "succeeded", "failed", "cancelled"]] = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    return [jobs.job_to_dict(j) for j in store.list(_tenant(), status, limit)]
+
+
+@router.get("/runner", summary="Job workers and pending jobs of this server process")
+def get_runner():
+    return jobs.runner.info()
+
+
+@router.get("/{job_id}", summary="Status, progress and result of a job")
+def get_job(job_id: str):
+    return jobs.job_to_dict(_get_job(job_id))
+
+
+@router.get("/{job_id}/result", summary="Download the file an export job produced")
+def get_job_result(job_id: str):
+    job = _get_job(job_id)
+    if job["result_file"] is None or job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, with no file to download")
+    path = jobs.job_path(job["result_file"])
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="The result file has been deleted")
+    filename = json.loads(job["result"])["filename"]
+    return FileResponse(path, media_type=MEDIA_TYPES[os.path.splitext(filename)[1]], filename=filename)
+
+
+@router.delete("/{job_id}", summary="Cancel a queued or running job")
+def cancel_job(job_id: str):
+    """
+    A queued job is dropped. A running job stops at its next progress report:
+    JSON imports roll back, Goodreads imports keep the batches already committed.
+    """
+    job = _get_job(job_id)
+    if job["status"] not in jobs.ACTIVE:
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+    jobs.runner.cancel(job_id)
+    return jobs.job_to_dict(store.get(job_id))
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from utils import metrics
+
+router = APIRouter()
+
+
+@router.get("", summary="Request, SQL and cache metrics in the Prometheus text format",
+            response_class=PlainTextResponse)
+def get_metrics():
+    """Counters of this worker process since it started; scrape every worker for totals."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
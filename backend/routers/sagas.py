@@ -0,0 +1,41 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from database import get_db
+from routers.stats import get_filters
+from utils import sagas
+from utils.cache import cache_response, cached_response
+from utils.stats import build_filters
+from utils.versions import BOOKS, current_etag, not_modified
+
+router = APIRouter()
+
+
+@router.get("/", summary="Books grouped into sagas, with saga influence scores")
+def get_sagas(
+    request: Request,
+    response: Response,
+    include_academic: bool = Query(False, description="Group academic/reference books too (computed on the fly)"),
+    filters: list = Depends(get_filters),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """
+    The default view (non-academic, no dashboard filters) is read from the sagas
+    table, which the book writes keep up to date. Filtered views group the stored
+    saga keys on the fly.
+    """
+    etag = current_etag(db, BOOKS)
+    cached = not_modified(etag, if_none_match, response) or cached_response(request, etag)
+    if cached:
+        return cached
+    if filters or include_academic:
+        if not include_academic:
+            filters = filters + build_filters(exclude_academic=True)
+        grouped = sagas.group_into_sagas(sagas.query_rows(db, filters))
+        content = {**grouped, "influence": sagas.rank_saga_influence(grouped["sagas"])}
+    else:
+        content = sagas.read(db)
+    return cache_response(request, [BOOKS], etag, content)
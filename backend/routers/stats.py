@@ -0,0 +1,117 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from database import get_db
+from utils import aggregates
+from utils import dates
+from utils import relations
+from utils import stats as stats_utils
+
+router = APIRouter()
+
+
+def get_filters(
+    genre: Optional[str] = None,
+    nationality: Optional[str] = None,
+    reading_type: Optional[str] = None,
+    year: Optional[int] = None,
+) -> list:
+    return stats_utils.build_filters(genre, nationality, reading_type, year)
+
+
+@router.get("/", summary="All dashboard aggregates in one payload")
+def get_stats(filters: list = Depends(get_filters), db: Session = Depends(get_db)):
+    return {
+        **stats_utils.summary(db, filters),
+        "authors_by_books": stats_utils.by_author(db, filters),
+        "authors_by_nationality": stats_utils.by_nationality(db, filters),
+        "genre_distribution": stats_utils.by_genre(db, filters),
+        "collection_stats": stats_utils.by_collection(db, filters),
+        "monthly_reading": stats_utils.by_month(db, filters),
+        "rating_distribution": stats_utils.rating_distribution(db, filters),
+        "academic_by_field": stats_utils.by_academic_field(db, filters),
+    }
+
+
+@router.get("/summary")
+def get_summary(filters: list = Depends(get_filters), db: Session = Depends(get_db)):
+    return stats_utils.summary(db, filters)
+
+
+@router.get("/genres")
+def get_genre_stats(filters: list = Depends(get_filters), db: Session = Depends(get_db)):
+    return stats_utils.by_genre(db, filters)
+
+
+@router.get("/nationalities")
+def get_nationality_stats(filters: list = Depends(get_filters), db: Session = Depends(get_db)):
+    return stats_utils.by_nationality(db, filters)
+
+
+@router.get("/authors")
+def get_author_stats(
+    limit: int = Query(100, ge=1, le=1000),
+    filters: list = Depends(get_filters),
+    db: Session = Depends(get_db),
+):
+    return stats_utils.by_author(db, filters, limit)
+
+
+@router.get("/years")
+def get_year_stats(filters: list = Depends(get_filters), db: Session = Depends(get_db)):
+    return stats_utils.by_year(db, filters)
+
+
+@router.get("/months")
+def get_month_stats(filters: list = Depends(get_filters), db: Session = Depends(get_db)):
+    return stats_utils.by_month(db, filters)
+
+
+@router.get("/timeline", summary="Books and pages per month or ISO week, from the normalized finished_on dates")
+def get_timeline(
+    granularity: Literal["month", "week"] = "month",
+    year: Optional[int] = None,
+    genre: Optional[str] = None,
+    nationality: Optional[str] = None,
+    reading_type: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    filters = stats_utils.build_filters(genre, nationality, reading_type)
+    if year is not None:
+        filters += dates.year_range(year)
+    return stats_utils.timeline(db, granularity, filters)
+
+
+@router.get("/collections")
+def get_collection_stats(filters: list = Depends(get_filters), db: Session = Depends(get_db)):
+    return stats_utils.by_collection(db, filters)
+
+
+@router.get("/chapters", summary="Chapter progress of every book with total_chapters set")
+def get_chapter_progress(status: Optional[str] = None, db: Session = Depends(get_db)):
+    return relations.chapter_progress(db, status)
+
+
+@router.get("/aggregates/{dimension}", summary="Materialized per-group totals (no scan over books)")
+def get_aggregates(
+    dimension: Literal["year", "genre", "nationality", "author"],
+    db: Session = Depends(get_db),
+):
+    return aggregates.read(db, dimension)
+
+
+@router.get("/influence/{dimension}", summary="Weighted influence ranking")
+def get_influence(
+    dimension: Literal["author", "nationality", "genre"],
+    include_academic: bool = False,
+    genre: Optional[str] = None,
+    nationality: Optional[str] = None,
+    year: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    filters = stats_utils.build_filters(
+        genre, nationality, year=year, exclude_academic=not include_academic
+    )
+    return stats_utils.influence(db, dimension, filters)
@@ -0,0 +1,151 @@
+import asyncio
+import json
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database import current_engine, get_db
+from models import AuthorProfile, Book, HallOfFameItem, ReadingGoal
+from routers.authors import profile_to_dict
+from utils import changelog
+from utils.helpers import book_to_dict
+
+router = APIRouter()
+
+# Seconds between keep-alive comments on an idle event stream; also how soon
+# writes made by other server processes are noticed
+KEEPALIVE = 15
+_CHUNK = 500
+
+
+def _chunks(keys: List, size: int = _CHUNK):
+    for i in range(0, len(keys), size):
+        yield keys[i:i + size]
+
+
+# ─── Current rows of the changed keys ────────────────────────────────────────
+# Each loader returns {log key: row as the entity's own endpoint returns it};
+# keys without a row are reported as deleted.
+
+def _load_books(db: Session, keys: List[str]) -> Dict[str, dict]:
+    rows = {}
+    for chunk in _chunks(keys):
+        rows.update((b.id, book_to_dict(b)) for b in db.scalars(select(Book).where(Book.id.in_(chunk))))
+    return rows
+
+
+def _load_authors(db: Session, keys: List[str]) -> Dict[str, dict]:
+    rows = {}
+    for chunk in _chunks(keys):
+        rows.update(
+            (p.name, profile_to_dict(p))
+            for p in db.scalars(select(AuthorProfile).where(AuthorProfile.name.in_(chunk)))
+        )
+    return rows
+
+
+def _load_goals(db: Session, keys: List[str]) -> Dict[str, dict]:
+    years = [int(k) for k in keys]
+    return {
+        str(g.year): {"year": g.year, "target_books": g.target_books}
+        for g in db.scalars(select(ReadingGoal).where(ReadingGoal.year.in_(years)))
+    }
+
+
+def _load_hall_of_fame(db: Session, keys: List[str]) -> Dict[str, dict]:
+    rows = {}
+    for chunk in _chunks([tuple(k.split("/", 1)) for k in keys]):
+        for item in db.scalars(
+            select(HallOfFameItem).where(tuple_(HallOfFameItem.section, HallOfFameItem.key).in_(chunk))
+        ):
+            rows[f"{item.section}/{item.key}"] = {
+                "section": item.section,
+                "key": item.key,
+                "position": item.position,
+                "value": json.loads(item.data),
+            }
+    return rows
+
+
+LOADERS = {
+    "books": _load_books,
+    "authors": _load_authors,
+    "goals": _load_goals,
+    "hall_of_fame": _load_hall_of_fame,
+}
+
+
+# ─── Endpoints ───────────────────────────────────────────────────────────────
+
+@router.get("/", summary="Rows changed since a sequence number of the change log")
+def get_changes(
+    since: int = Query(0, ge=0, description="Last seq the client applied; 0 for a full sync"),
+    limit: int = Query(1000, ge=1, le=10000, description="Log entries read per call"),
+    db: Session = Depends(get_db),
+):
+    """
+    For each entity with changes, the current rows ("upserted") and the keys of
+    rows that no longer exist ("deleted"; Hall of Fame keys are "<section>/<key>").
+    Store "seq" and call again while "more" is true. With "reset" the log no longer
+    covers `since`: drop the local copy and sync again from since=0.
+    """
+    conn = db.connection()
+    if changelog.must_reset(conn, since):
+        return {"seq": changelog.head(conn), "reset": True, "more": False, "changes": {}}
+
+    keys, last, more = changelog.window(conn, since, limit)
+    changes = {}
+    for entity, entity_keys in keys.items():
+        rows = LOADERS[entity](db, entity_keys)
+        changes[entity] = {
+            "upserted": [rows[k] for k in entity_keys if k in rows],
+            "deleted": [k for k in entity_keys if k not in rows],
+        }
+    return {"seq": last if last is not None else since, "reset": False, "more": more, "changes": changes}
+
+
+def _head() -> int:
+    with current_engine().connect() as conn:
+        return changelog.head(conn)
+
+
+@router.get("/head", summary="Current seq of the change log")
+def get_head():
+    """Read before a full load (e.g. GET /api/books), then sync from it."""
+    return {"seq": _head()}
+
+
+@router.get("/events", summary="Server-sent events carrying the change log's head seq")
+async def sync_events(request: Request, last_event_id: Optional[str] = Header(None)):
+    """
+    An `event: change` with {"seq": head} whenever the log moves, and right away
+    unless Last-Event-ID already is the head. Clients then call /api/sync?since=.
+    """
+    async def stream():
+        wake = changelog.subscribe()
+        try:
+            last = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+            yield "retry: 3000\n\n"
+            while not changelog.closing() and not await request.is_disconnected():
+                wake.clear()   # before reading the head, so a commit in between is not missed
+                seq = await run_in_threadpool(_head)
+                if seq != last:
+                    last = seq
+                    yield f"id: {seq}\nevent: change\ndata: {json.dumps({'seq': seq})}\n\n"
+                try:
+                    await asyncio.wait_for(wake.wait(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+            # on server shutdown the stream just ends; EventSource reconnects with Last-Event-ID
+        finally:
+            changelog.unsubscribe(wake)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List, Literal
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Optional, List, Literal
 
 
 class BookCreate(BaseModel):
@@ -35,6 +35,78 @@ class BookResponse(BookCreate):
         from_attributes = True
 
 
+class BookPatch(BaseModel):
+    """Partial book update: only the fields present in the payload are written."""
+    title: Optional[str] = None
+    author: Optional[str] = None
+    pages: Optional[int] = None
+    genre: Optional[str] = None
+    nationality: Optional[str] = None
+    date_finished: Optional[str] = None
+    timestamp: Optional[str] = None
+    rating: Optional[float] = None
+    collections: Optional[List[str]] = None
+    isbn: Optional[str] = None
+    year_published: Optional[int] = None
+    read_count: Optional[int] = None
+    cover_url: Optional[str] = None
+    notes: Optional[str] = None
+    start_date: Optional[str] = None
+    favorite: Optional[bool] = None
+    reading_type: Optional[Literal["complete", "academic", "reference"]] = None
+    academic_field: Optional[str] = None
+    academic_level: Optional[Literal["undergraduate", "graduate", "reference"]] = None
+    chapters_read: Optional[List[int]] = None
+    total_chapters: Optional[int] = None
+    status: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _required_fields_not_null(self):
+        for field in ("title", "author", "pages", "genre", "nationality", "favorite"):
+            if field in self.model_fields_set and getattr(self, field) is None:
+                raise ValueError(f"{field} cannot be null")
+        return self
+
+
+class BookBatchOperation(BaseModel):
+    op: Literal["create", "patch", "delete"]
+    id: Optional[str] = None                # required for patch and delete
+    book: Optional[BookCreate] = None       # create
+    changes: Optional[BookPatch] = None     # patch
+
+    @model_validator(mode="after")
+    def _payload_matches_op(self):
+        if self.op == "create" and self.book is None:
+            raise ValueError("create needs 'book'")
+        if self.op in ("patch", "delete") and not self.id:
+            raise ValueError(f"{self.op} needs 'id'")
+        if self.op == "patch" and self.changes is None:
+            raise ValueError("patch needs 'changes'")
+        return self
+
+
+class BookBatchRequest(BaseModel):
+    operations: List[BookBatchOperation] = Field(..., max_length=5000)
+    atomic: bool = False    # roll everything back if any operation fails
+
+
+class BookBatchResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[str] = None
+    status: Literal["created", "updated", "deleted", "not_found", "duplicate"]
+
+
+class BookBatchResponse(BaseModel):
+    committed: bool
+    created: int
+    updated: int
+    deleted: int
+    failed: int
+    results: List[BookBatchResult]
+    elapsed_ms: Optional[float] = None
+
+
 class AuthorProfileCreate(BaseModel):
     name: str
     nationality: str
@@ -58,6 +130,27 @@ class ReadingGoalResponse(ReadingGoalCreate):
         from_attributes = True
 
 
+class GoalProgressMonth(BaseModel):
+    month: int
+    count: int
+    pages: int
+    cumulative: int        # books read from January through this month
+
+
+class GoalProgressResponse(BaseModel):
+    year: int
+    target_books: Optional[int] = None      # None (and so every target-derived field) without a goal
+    books_read: int
+    pages_read: int
+    books_remaining: Optional[int] = None
+    percent: Optional[float] = None
+    expected_books: Optional[float] = None  # pace of target_books spread evenly over the year, at as_of
+    ahead_by: Optional[float] = None
+    on_track: Optional[bool] = None
+    as_of: str
+    monthly: List[GoalProgressMonth]
+
+
 class ImportRequest(BaseModel):
     readings: List[BookCreate]
     author_profiles: Optional[List[AuthorProfileCreate]] = None
@@ -69,7 +162,30 @@ class BulkImportResponse(BaseModel):
     skipped: int
     total: int
     message: str
+    elapsed_ms: Optional[float] = None
+    rows_per_second: Optional[float] = None
 
 
 class HallOfFamePayload(BaseModel):
     data: dict
+
+
+class JsonPatchOperation(BaseModel):
+    """One RFC 6902 operation; `from` is only used by move and copy."""
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    value: Any = None
+    from_: Optional[str] = Field(None, alias="from")
+
+    @model_validator(mode="after")
+    def _check_operands(self):
+        if self.op in ("add", "replace", "test") and "value" not in self.model_fields_set:
+            raise ValueError(f"'{self.op}' needs a value")
+        if self.op in ("move", "copy") and self.from_ is None:
+            raise ValueError(f"'{self.op}' needs from")
+        return self
+
+
+class HallOfFamePatchResult(BaseModel):
+    sections: List[str]
+    rows_written: int
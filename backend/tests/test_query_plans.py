@@ -0,0 +1,40 @@
+"""EXPLAIN QUERY PLAN of the hot queries, on a schema built by the migrations (cases in utils.query_plans)."""
+import pytest
+
+from database import create_sqlite_engine
+from migrations import has_table, migrate
+from utils.query_plans import CASES, explain
+from utils.search import SEARCH_SQL, search_params
+
+
+@pytest.fixture(scope="module")
+def conn(tmp_path_factory):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'books.db'}")
+    migrate(engine)
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+
+def _full_scans(plan):
+    # A pass over a whole table; walking an index in order ("SCAN books USING INDEX ...") is fine
+    return [step for step in plan if step.startswith("SCAN ") and "USING" not in step and "VIRTUAL TABLE" not in step]
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.name)
+def test_plan_uses_index(conn, case):
+    plan = explain(conn, case.statement())
+    if case.index:
+        assert any(f"INDEX {case.index}" in step for step in plan), plan
+    assert not _full_scans(plan), plan
+    if not case.sorts:
+        assert not any("USE TEMP B-TREE" in step for step in plan), plan
+
+
+def test_search_uses_fts_index(conn):
+    if not has_table(conn, "books_fts"):
+        pytest.skip("SQLite built without FTS5")
+    plan = explain(conn, SEARCH_SQL.bindparams(**search_params("dune", 20)))
+    assert any(step.startswith("SCAN books_fts VIRTUAL TABLE INDEX") and ":M" in step for step in plan), plan
+    assert any("USING INTEGER PRIMARY KEY (rowid=?)" in step for step in plan), plan
+    assert not _full_scans(plan), plan
@@ -0,0 +1,223 @@
+"""
+Incrementally maintained statistics (the stat_aggregates table).
+
+Every book write records its change in an AggregateDelta (add the new row,
+remove the old one) and applies it in the same transaction, so dashboard
+reads cost O(groups) instead of a scan over books.
+
+Consistency check / rebuild from the command line (run from backend/):
+
+    python -m utils.aggregates --check
+    python -m utils.aggregates --rebuild
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from models import Book, StatAggregate
+from utils.dates import normalize_date
+
+DIMENSIONS = ("year", "genre", "nationality", "author")
+
+# Same expressions as utils.stats, so a rebuild and the incremental path agree
+_YEAR_KEY = func.substr(Book.finished_on, 1, 4)
+_DATED_SQL = Book.finished_on.isnot(None)
+
+
+def _year_of(date_finished: Optional[str]) -> Optional[str]:
+    finished_on = normalize_date(date_finished)
+    return finished_on[:4] if finished_on else None
+
+
+def group_keys(book) -> List[Tuple[str, str]]:
+    """(dimension, key) pairs a book contributes to. Works on ORM rows, dicts or schemas."""
+    get = book.get if isinstance(book, dict) else lambda f: getattr(book, f, None)
+    keys = [
+        ("genre", get("genre")),
+        ("nationality", get("nationality")),
+        ("author", get("author")),
+    ]
+    year = _year_of(get("date_finished"))
+    if year:
+        keys.append(("year", year))
+    return [(d, k) for d, k in keys if k is not None]
+
+
+class AggregateDelta:
+    """
+    Accumulates per-group changes in memory, then applies them with one executemany
+    upsert. Also collects the saga keys of the books seen, whose stored sagas are
+    recomputed on apply (see utils.sagas).
+    """
+
+    def __init__(self):
+        self._deltas: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0, 0, 0, 0.0])
+        self._sagas: Set[str] = set()
+
+    def _record(self, book, sign: int):
+        get = book.get if isinstance(book, dict) else lambda f: getattr(book, f, None)
+        if get("saga_key"):
+            self._sagas.add(get("saga_key"))
+        pages = get("pages") or 0
+        rating = get("rating")
+        for group in group_keys(book):
+            d = self._deltas[group]
+            d[0] += sign
+            d[1] += sign * pages
+            if rating is not None:
+                d[2] += sign
+                d[3] += sign * rating
+
+    def add(self, book):
+        self._record(book, 1)
+
+    def remove(self, book):
+        self._record(book, -1)
+
+    def apply(self, db: Session):
+        if self._sagas:
+            from utils import sagas
+            db.flush()   # the sessions don't autoflush; refresh reads the books as written
+            sagas.refresh(db, self._sagas)
+            self._sagas.clear()
+        rows = [
+            {"dimension": dim, "key": key, "book_count": c, "page_sum": p,
+             "rated_count": rc, "rating_sum": rs}
+            for (dim, key), (c, p, rc, rs) in self._deltas.items()
+            if c or p or rc or rs
+        ]
+        self._deltas.clear()
+        if not rows:
+            return
+        table = StatAggregate.__table__
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.dimension, table.c.key],
+            set_={
+                "book_count": table.c.book_count + stmt.excluded.book_count,
+                "page_sum": table.c.page_sum + stmt.excluded.page_sum,
+                "rated_count": table.c.rated_count + stmt.excluded.rated_count,
+                "rating_sum": table.c.rating_sum + stmt.excluded.rating_sum,
+            },
+        )
+        db.execute(stmt, rows)
+        db.query(StatAggregate).filter(StatAggregate.book_count <= 0).delete(synchronize_session=False)
+
+
+# Book columns that feed the aggregates (saga_key: the saga whose summary the book is part of)
+AGGREGATED_FIELDS = ("genre", "nationality", "author", "date_finished", "pages", "rating", "saga_key")
+
+
+def snapshot(book: Book) -> dict:
+    """Copy the aggregated fields of a book before it is modified in place."""
+    return {f: getattr(book, f) for f in AGGREGATED_FIELDS}
+
+
+def clear(db: Session):
+    db.query(StatAggregate).delete(synchronize_session=False)
+
+
+def read(db: Session, dimension: str) -> List[dict]:
+    rows = (
+        db.query(StatAggregate)
+        .filter(StatAggregate.dimension == dimension)
+        .order_by(StatAggregate.book_count.desc(), StatAggregate.key)
+        .all()
+    )
+    return [
+        {
+            "key": r.key,
+            "count": r.book_count,
+            "pages": r.page_sum,
+            "average_rating": r.rating_sum / r.rated_count if r.rated_count else 0,
+        }
+        for r in rows
+    ]
+
+
+# ─── Rebuild / consistency check ─────────────────────────────────────────────
+
+def compute_from_books(db: Session) -> Dict[Tuple[str, str], Tuple[int, int, int, float]]:
+    """Recompute every group from scratch with one GROUP BY per dimension."""
+    expected = {}
+    columns = {
+        "year": (_YEAR_KEY, [_DATED_SQL]),
+        "genre": (Book.genre, []),
+        "nationality": (Book.nationality, []),
+        "author": (Book.author, []),
+    }
+    for dim, (key, filters) in columns.items():
+        rows = (
+            db.query(key, func.count(Book.id), func.coalesce(func.sum(Book.pages), 0),
+                     func.count(Book.rating), func.coalesce(func.sum(Book.rating), 0))
+            .filter(*filters)
+            .group_by(key)
+            .all()
+        )
+        for k, c, p, rc, rs in rows:
+            if k is not None:
+                expected[(dim, k)] = (c, p, rc, float(rs))
+    return expected
+
+
+def check(db: Session) -> List[dict]:
+    """Compare stored aggregates with a fresh recomputation; returns one entry per drifting group."""
+    expected = compute_from_books(db)
+    stored = {
+        (r.dimension, r.key): (r.book_count, r.page_sum, r.rated_count, float(r.rating_sum))
+        for r in db.query(StatAggregate).all()
+    }
+    drift = []
+    for group in sorted(set(expected) | set(stored)):
+        want = expected.get(group, (0, 0, 0, 0.0))
+        have = stored.get(group, (0, 0, 0, 0.0))
+        if want[:3] != have[:3] or abs(want[3] - have[3]) > 1e-6:
+            drift.append({"dimension": group[0], "key": group[1], "expected": want, "stored": have})
+    return drift
+
+
+def rebuild(db: Session) -> int:
+    """Replace the aggregate table with a fresh recomputation. Returns the number of groups."""
+    expected = compute_from_books(db)
+    clear(db)
+    if expected:
+        db.execute(insert(StatAggregate.__table__), [
+            {"dimension": dim, "key": key, "book_count": c, "page_sum": p,
+             "rated_count": rc, "rating_sum": rs}
+            for (dim, key), (c, p, rc, rs) in expected.items()
+        ])
+    return len(expected)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from database import SessionLocal, init_db
+    from utils import sagas
+    from utils.versions import BOOKS, bump
+
+    parser = argparse.ArgumentParser(description="Check or rebuild the materialized statistics.")
+    parser.add_argument("--rebuild", action="store_true", help="recompute all aggregates from the books table")
+    args = parser.parse_args()
+
+    init_db()
+    session = SessionLocal()
+    try:
+        drift = check(session)
+        for d in drift:
+            print(f"drift {d['dimension']}={d['key']!r}: stored {d['stored']} expected {d['expected']}")
+        print(f"{len(drift)} drifting group(s)")
+        if args.rebuild:
+            groups = rebuild(session)
+            saga_count = sagas.rebuild_table(session)
+            bump(session, BOOKS)   # cached /api/sagas responses predate the rebuild
+            session.commit()
+            print(f"Rebuilt {groups} group(s), {saga_count} saga(s)")
+        elif drift:
+            sys.exit(1)
+    finally:
+        session.close()
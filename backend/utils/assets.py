@@ -0,0 +1,194 @@
+"""
+Content-addressed store for cover images and author photos.
+
+Images that arrive inline as data: URLs (Book.cover_url, Hall of Fame
+authorPhotos) are written once to ASSET_DIR as <sha256>.<ext> and replaced by
+a short reference, /api/assets/<sha256>.<ext>. Book lists, search results and
+the Hall of Fame document then carry ~90 bytes per image instead of the image,
+and routers/assets.py serves the bytes straight from the file (Range requests,
+immutable caching).
+
+Files are never modified: the same bytes always get the same name. Writes are
+atomic (temp file + rename) and happen outside the database transaction, so a
+rolled-back write can leave an unreferenced file behind; gc() removes those.
+
+    python -m utils.assets         # count files and references
+    python -m utils.assets --gc    # also delete the files nothing refers to
+
+In multi-tenant mode every shard shares the store (a file's name is its
+content), so references are collected from all of them before deleting.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import Iterable, Optional, Set, Tuple
+from urllib.parse import unquote_to_bytes
+
+from sqlalchemy import text
+
+from config import ASSET_DIR, ASSET_MAX_BYTES
+
+URL_PREFIX = "/api/assets/"
+NAME = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]+$")
+
+# extension <-> media type; anything else is stored as .bin / application/octet-stream
+MEDIA_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "avif": "image/avif",
+    "svg": "image/svg+xml",
+    "bmp": "image/bmp",
+    "ico": "image/x-icon",
+}
+_EXTENSIONS = {media: ext for ext, media in MEDIA_TYPES.items()}
+_EXTENSIONS["image/jpg"] = "jpg"
+
+
+class AssetTooLarge(ValueError):
+    pass
+
+
+def path_for(name: str) -> str:
+    return os.path.join(ASSET_DIR, name[:2], name)
+
+
+def media_type_for(name: str) -> str:
+    return MEDIA_TYPES.get(name.rsplit(".", 1)[-1], "application/octet-stream")
+
+
+def put(data: bytes, media_type: Optional[str]) -> str:
+    """Store the bytes (no-op when already stored); returns the asset name."""
+    if len(data) > ASSET_MAX_BYTES:
+        raise AssetTooLarge(f"asset larger than {ASSET_MAX_BYTES} bytes")
+    ext = _EXTENSIONS.get((media_type or "").split(";")[0].strip().lower(), "bin")
+    name = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+    path = path_for(name)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return name
+
+
+def decode_data_url(value: str) -> Optional[Tuple[bytes, str]]:
+    """(bytes, media type) of a data: URL, or None when it is not a valid one."""
+    if not value[:5].lower() == "data:" or "," not in value:
+        return None
+    header, payload = value[5:].split(",", 1)
+    params = header.split(";")
+    media_type = params[0] or "text/plain"
+    try:
+        if len(params) > 1 and params[-1].lower() == "base64":
+            return base64.b64decode("".join(payload.split()), validate=True), media_type
+        return unquote_to_bytes(payload), media_type
+    except (binascii.Error, ValueError):
+        return None
+
+
+def externalize(value: Optional[str]) -> Optional[str]:
+    """Replace an inline data: URL by a reference to the stored asset; other values pass through."""
+    if not isinstance(value, str) or value[:5].lower() != "data:":
+        return value
+    decoded = decode_data_url(value)
+    if decoded is None:
+        return value
+    try:
+        return URL_PREFIX + put(*decoded)
+    except AssetTooLarge:
+        return value
+
+
+def inline(value: Optional[str]) -> Optional[str]:
+    """Inverse of externalize, for exports that must stand on their own."""
+    if not isinstance(value, str) or not value.startswith(URL_PREFIX):
+        return value
+    name = value[len(URL_PREFIX):]
+    if not NAME.match(name) or not os.path.exists(path_for(name)):
+        return value
+    with open(path_for(name), "rb") as f:
+        data = base64.b64encode(f.read()).decode("ascii")
+    return f"data:{media_type_for(name)};base64,{data}"
+
+
+# ─── Garbage collection ──────────────────────────────────────────────────────
+
+_REFERENCE_QUERIES = (
+    f"SELECT cover_url FROM books WHERE cover_url LIKE '{URL_PREFIX}%'",
+    # photo values are stored as JSON strings: "/api/assets/..."
+    f"SELECT substr(data, 2, length(data) - 2) FROM hall_of_fame_items "
+    f"WHERE section = 'authorPhotos' AND data LIKE '\"{URL_PREFIX}%'",
+)
+
+
+def referenced(conn) -> Set[str]:
+    names = set()
+    for query in _REFERENCE_QUERIES:
+        names.update(url[len(URL_PREFIX):] for (url,) in conn.execute(text(query)))
+    return names
+
+
+def stored() -> Iterable[str]:
+    if not os.path.isdir(ASSET_DIR):
+        return
+    for prefix in os.listdir(ASSET_DIR):
+        directory = os.path.join(ASSET_DIR, prefix)
+        if os.path.isdir(directory):
+            yield from (n for n in os.listdir(directory) if NAME.match(n))
+
+
+def gc(keep: Set[str], min_age: float = 3600) -> Tuple[int, int]:
+    """
+    Delete the files not in `keep` (see referenced()); returns (kept, removed). Files newer
+    than min_age seconds are kept: their referencing write may not be committed yet.
+    """
+    cutoff = time.time() - min_age
+    kept = removed = 0
+    for name in stored():
+        path = path_for(name)
+        if name in keep or os.path.getmtime(path) > cutoff:
+            kept += 1
+        else:
+            os.unlink(path)
+            removed += 1
+    return kept, removed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from config import TENANCY
+    from database import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Inspect or garbage-collect the asset store.")
+    parser.add_argument("--gc", action="store_true", help="delete unreferenced files")
+    parser.add_argument("--min-age", type=float, default=3600, help="seconds an unreferenced file is kept")
+    args = parser.parse_args()
+
+    if TENANCY == "multi":
+        from utils.tenants import fan_out
+
+        found, errors = fan_out(referenced)
+        if errors:   # a missed shard's files would look unreferenced
+            raise SystemExit(f"could not read {len(errors)} shard(s): {errors}")
+        refs = set().union(*found.values())
+    else:
+        init_db()
+        with engine.connect() as conn:
+            refs = referenced(conn)
+    files = set(stored())
+    print(f"{len(files)} file(s) in {ASSET_DIR}, {len(refs)} referenced, {len(refs - files)} missing")
+    if args.gc:
+        kept, removed = gc(refs, args.min_age)
+        print(f"removed {removed} unreferenced file(s), kept {kept}")
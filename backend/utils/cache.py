@@ -0,0 +1,330 @@
+"""
+Response cache for the read endpoints.
+
+Entries hold the already-serialized JSON body plus its headers, keyed by route,
+query string and the data-version ETag (utils.versions). Because the version
+lives in the database, a key can never serve data older than the last
+committed write, in any worker. Writes additionally drop the entries tagged
+with the tables they bumped, right after commit, so memory is reclaimed
+instead of waiting for LRU/TTL eviction.
+
+Backends:
+    MemoryCache  per-process LRU bounded by body bytes, with a TTL
+    SQLiteCache  one cache file shared by every uvicorn worker (same bounds)
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from config import CACHE_BACKEND, CACHE_MAX_BYTES, CACHE_PATH, CACHE_TTL, TENANCY
+from utils.tenants import current_tenant
+from utils.versions import BUMPED_KEY, validator_headers
+
+
+class Entry(NamedTuple):
+    body: bytes
+    headers: Dict[str, str]
+    tags: Tuple[str, ...]
+    expires: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers.items())
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def to_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+# ─── Backends ────────────────────────────────────────────────────────────────
+
+class MemoryCache:
+    """Thread-safe LRU over an OrderedDict, bounded by the total entry size."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, ttl: float = CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            if entry.expires <= time.monotonic():
+                self._drop(key)
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry
+
+    def set(self, key: str, body: bytes, headers: Dict[str, str], tags: Iterable[str]):
+        entry = Entry(body, headers, tuple(tags), time.monotonic() + self.ttl)
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self.stats.stores += 1
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats.evictions += 1
+
+    def invalidate(self, tags: Iterable[str]):
+        tags = set(tags)
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if tags.intersection(e.tags)]
+            for key in stale:
+                self._drop(key)
+            self.stats.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+    def _drop(self, key: str):
+        self._bytes -= self._entries.pop(key).size
+
+
+class SQLiteCache:
+    """
+    Cache stored in its own SQLite file, so every worker process shares entries
+    and invalidations. LRU order is the last_used column; counters are per process.
+    """
+
+    name = "sqlite"
+
+    _DDL = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            headers TEXT NOT NULL,
+            tags TEXT NOT NULL,        -- ",books,author_profiles,"
+            size INTEGER NOT NULL,
+            expires REAL NOT NULL,     -- wall clock, shared between processes
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_entries_last_used ON entries (last_used);
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES, ttl: float = CACHE_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._local = threading.local()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")   # a lost entry is only a miss
+            conn.executescript(self._DDL)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Entry]:
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT body, headers, tags, expires FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+        body, headers, tags, expires = row
+        if expires <= now:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+        self._conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+        self.stats.hits += 1
+        return Entry(body, json.loads(headers), tuple(filter(None, tags.split(","))), expires)
+
+    def set(self, key: str, body: bytes, headers: Dict[str, str], tags: Iterable[str]):
+        now = time.time()
+        entry = Entry(body, headers, tuple(tags), now + self.ttl)
+        if entry.size > self.max_bytes:
+            return
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, body, json.dumps(headers), "," + ",".join(entry.tags) + ",",
+                 entry.size, entry.expires, now),
+            )
+            self.stats.stores += 1
+            conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+            excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0] - self.max_bytes
+            if excess > 0:
+                victims = []
+                for victim, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+                    victims.append((victim,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+                self.stats.evictions += len(victims)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def invalidate(self, tags: Iterable[str]):
+        for tag in tags:
+            cur = self._conn.execute("DELETE FROM entries WHERE instr(tags, ?) > 0", (f",{tag},",))
+            self.stats.invalidations += cur.rowcount
+
+    def clear(self):
+        self._conn.execute("DELETE FROM entries")
+
+    def info(self) -> dict:
+        entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": entries, "bytes": size, "path": self.path}
+
+
+def create_cache(backend: str = CACHE_BACKEND):
+    if backend == "off":
+        return None
+    if backend == "sqlite":
+        return SQLiteCache()
+    return MemoryCache()
+
+
+response_cache = create_cache()
+
+
+# ─── Write invalidation ──────────────────────────────────────────────────────
+# utils.versions.bump() records the tables a session wrote; once the
+# transaction commits, their entries are dropped (sync and async sessions alike).
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session):
+    tables = session.info.pop(BUMPED_KEY, None)
+    if tables and response_cache is not None:
+        response_cache.invalidate(_tags(tables))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_after_rollback(session: Session):
+    session.info.pop(BUMPED_KEY, None)
+
+
+# ─── Endpoint helpers ────────────────────────────────────────────────────────
+
+_adapters: Dict[object, TypeAdapter] = {}
+
+
+def _render(content, model) -> bytes:
+    """Serialize as FastAPI does for a response_model: validate, then compact JSON."""
+    if model is not None:
+        adapter = _adapters.get(model)
+        if adapter is None:
+            adapter = _adapters[model] = TypeAdapter(model)
+        content = adapter.dump_python(adapter.validate_python(content), mode="json", by_alias=True)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _tags(tables: Iterable[str]) -> Iterable[str]:
+    # Per tenant, so one tenant's writes leave the others' entries alone
+    return [f"{current_tenant()}/{t}" for t in tables] if TENANCY == "multi" else tables
+
+
+def cache_key(request: Request, etag: str) -> str:
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    key = f"{request.url.path}?{query}#{etag}"
+    # Shards have their own version counters: the same ETag can mean different data
+    return f"{current_tenant()}:{key}" if TENANCY == "multi" else key
+
+
+def cached_response(request: Request, etag: str) -> Optional[Response]:
+    """The stored response for this route, query and data version, if any."""
+    if response_cache is None:
+        return None
+    entry = response_cache.get(cache_key(request, etag))
+    if entry is None:
+        return None
+    return Response(entry.body, media_type="application/json", headers={**entry.headers, "X-Cache": "HIT"})
+
+
+def cache_response(
+    request: Request,
+    tables: Iterable[str],
+    etag: str,
+    content,
+    model=None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Serialize `content` (validated against `model` when given), store it and return it."""
+    return store_response(request, tables, etag, _render(content, model), headers)
+
+
+def store_response(
+    request: Request,
+    tables: Iterable[str],
+    etag: str,
+    body: bytes,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Store an already-encoded JSON body and return it as the response."""
+    headers = {**(headers or {}), **validator_headers(etag)}
+    if response_cache is not None:
+        response_cache.set(cache_key(request, etag), body, headers, _tags(tables))
+    return Response(body, media_type="application/json", headers={**headers, "X-Cache": "MISS"})
+
+
+def cache_info() -> dict:
+    if response_cache is None:
+        return {"backend": "off"}
+    return {
+        "backend": response_cache.name,
+        "max_bytes": response_cache.max_bytes,
+        "ttl_seconds": response_cache.ttl,
+        **response_cache.info(),
+        **response_cache.stats.to_dict(),
+    }
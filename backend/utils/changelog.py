@@ -0,0 +1,212 @@
+"""
+Change log for delta sync (the change_log table).
+
+Triggers on books, author_profiles, reading_goals and hall_of_fame_items append
+(seq, entity, key, op) for every insert, update and delete, whatever the write
+path: ORM, bulk imports, batches, raw DELETEs such as delete-all. seq is an
+AUTOINCREMENT key, so it only grows and is never reused.
+
+A client remembers the last seq it has applied and asks /api/sync?since=<seq>
+for the current state of the rows changed after it (since=0 is a full sync);
+/api/sync/events pushes the head seq whenever it moves.
+
+Compaction keeps the log bounded. An entry superseded by a later one for the
+same row is dropped, which loses nothing. Tombstones older than the retention
+period are dropped too, and the highest of them becomes the horizon: a client
+whose since is below it may have missed a delete and is told to reset. The
+server compacts every BOOKTRACKER_CHANGELOG_COMPACT_INTERVAL seconds, or:
+
+    python -m utils.changelog              # size, head and horizon of the log
+    python -m utils.changelog --compact    # compact now
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from utils.helpers import BOOK_FIELDS
+
+# entity -> (table, key expression over {row}, columns whose updates are logged; None = all)
+ENTITIES: Dict[str, Tuple[str, str, Optional[Tuple[str, ...]]]] = {
+    # derived columns (saga_key, finished_on) are left out: rebuilding them is not a change
+    "books": ("books", "{row}.id", BOOK_FIELDS),
+    "authors": ("author_profiles", "{row}.name", None),
+    "goals": ("reading_goals", "CAST({row}.year AS TEXT)", None),
+    # section names contain no "/", so the first one separates section and key
+    "hall_of_fame": ("hall_of_fame_items", "{row}.section || '/' || {row}.key", None),
+}
+
+_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+_LOG = "INSERT INTO change_log (entity, key, op, changed_at) "
+
+
+def _trigger_ddl(entity: str, table: str, key: str, columns: Optional[Tuple[str, ...]]) -> List[str]:
+    new, old = key.format(row="new"), key.format(row="old")
+    of = f" OF {', '.join(columns)}" if columns else ""
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_log_ai AFTER INSERT ON {table} BEGIN
+            {_LOG}VALUES ('{entity}', {new}, 'upsert', {_NOW});
+        END""",
+        # a changed primary key is a delete of the old row plus an upsert of the new one
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_log_au AFTER UPDATE{of} ON {table} BEGIN
+            {_LOG}SELECT '{entity}', {old}, 'delete', {_NOW} WHERE {old} IS NOT {new};
+            {_LOG}VALUES ('{entity}', {new}, 'upsert', {_NOW});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {table}_log_ad AFTER DELETE ON {table} BEGIN
+            {_LOG}VALUES ('{entity}', {old}, 'delete', {_NOW});
+        END""",
+    ]
+
+
+TRIGGER_DDL = [ddl for entity, spec in ENTITIES.items() for ddl in _trigger_ddl(entity, *spec)]
+
+
+def ensure_triggers(conn: Connection):
+    for stmt in TRIGGER_DDL:
+        conn.execute(text(stmt))
+
+
+def backfill(conn: Connection, entity: str, after: Optional[int] = None, upto: Optional[int] = None):
+    """Log an upsert for every row of the entity (books: those with after < rowid <= upto)."""
+    table, key, _ = ENTITIES[entity]
+    where, params = "", {}
+    if after is not None:
+        where, params = " WHERE rowid > :after AND rowid <= :upto", {"after": after, "upto": upto}
+    conn.execute(
+        text(f"{_LOG}SELECT '{entity}', {key.format(row=table)}, 'upsert', {_NOW} FROM {table}{where}"),
+        params,
+    )
+
+
+# ─── Reading the log ─────────────────────────────────────────────────────────
+
+def head(conn: Connection) -> int:
+    """Highest seq ever assigned (0 for an empty log), without scanning the table."""
+    seq = conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")).scalar()
+    return seq or 0
+
+
+def horizon(conn: Connection) -> int:
+    return conn.execute(text("SELECT coalesce(max(horizon), 0) FROM change_log_compactions")).scalar()
+
+
+def must_reset(conn: Connection, since: int) -> bool:
+    """True when entries after `since` may be missing: compacted away, or a log from another database."""
+    return since > head(conn) or 0 < since < horizon(conn)
+
+
+def window(conn: Connection, since: int, limit: int) -> Tuple[Dict[str, List[str]], Optional[int], bool]:
+    """
+    The rows changed in the next `limit` entries after `since`: ({entity: [keys]},
+    seq of the last entry read or None, whether more entries follow).
+    """
+    rows = conn.execute(
+        text("SELECT seq, entity, key FROM change_log WHERE seq > :since ORDER BY seq LIMIT :n"),
+        {"since": since, "n": limit + 1},
+    ).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    keys: Dict[str, Dict[str, None]] = defaultdict(dict)   # ordered set per entity
+    for _, entity, key in rows:
+        keys[entity][key] = None
+    return {e: list(k) for e, k in keys.items()}, (rows[-1].seq if rows else None), more
+
+
+# ─── Compaction ──────────────────────────────────────────────────────────────
+
+def compact(conn: Connection, retention: timedelta) -> Tuple[int, int]:
+    """Drop superseded entries and tombstones older than `retention`; returns (removed, horizon)."""
+    removed = conn.execute(text(
+        "DELETE FROM change_log WHERE EXISTS (SELECT 1 FROM change_log AS newer "
+        "WHERE newer.entity = change_log.entity AND newer.key = change_log.key AND newer.seq > change_log.seq)"
+    )).rowcount
+    cutoff = (datetime.now(timezone.utc) - retention).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"   # as _NOW
+    dropped = conn.execute(
+        text("SELECT max(seq) FROM change_log WHERE op = 'delete' AND changed_at < :cutoff"), {"cutoff": cutoff}
+    ).scalar()
+    if dropped is not None:
+        removed += conn.execute(
+            text("DELETE FROM change_log WHERE op = 'delete' AND seq <= :seq"), {"seq": dropped}
+        ).rowcount
+    if removed:
+        conn.execute(
+            text("INSERT INTO change_log_compactions (compacted_at, horizon, removed) VALUES (:at, :h, :n)"),
+            {"at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+             "h": max(dropped or 0, horizon(conn)), "n": removed},
+        )
+    return removed, horizon(conn)
+
+
+# ─── Change notifications ────────────────────────────────────────────────────
+# Each /api/sync/events stream of this process holds an asyncio.Event; commits
+# (from any thread) set them all so the streams re-read the head right away.
+# Writes by other processes are seen when the stream's keep-alive timeout fires.
+
+_subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+_subscribers_lock = threading.Lock()
+_closing = threading.Event()
+
+
+def subscribe() -> asyncio.Event:
+    wake = asyncio.Event()
+    with _subscribers_lock:
+        _subscribers.add((asyncio.get_running_loop(), wake))
+    return wake
+
+
+def unsubscribe(wake: asyncio.Event):
+    with _subscribers_lock:
+        _subscribers.difference_update({s for s in _subscribers if s[1] is wake})
+
+
+def notify():
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for loop, wake in subscribers:
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:   # loop already closed
+            unsubscribe(wake)
+
+
+def close_streams():
+    """End every event stream (server shutdown: uvicorn waits for open responses first)."""
+    _closing.set()
+    notify()
+
+
+def closing() -> bool:
+    return _closing.is_set()
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session: Session):
+    # Cheap enough to do for every commit: a stream only emits when the head moved
+    if _subscribers:
+        notify()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from config import CHANGELOG_RETENTION_DAYS
+    from database import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Inspect or compact the change log.")
+    parser.add_argument("--compact", action="store_true", help="drop superseded entries and expired tombstones")
+    parser.add_argument("--retention-days", type=float, default=CHANGELOG_RETENTION_DAYS,
+                        help="age after which tombstones are dropped")
+    args = parser.parse_args()
+
+    init_db()
+    with engine.begin() as conn:
+        size = conn.execute(text("SELECT count(*) FROM change_log")).scalar()
+        print(f"{size} entries, head {head(conn)}, horizon {horizon(conn)}")
+        if args.compact:
+            removed, new_horizon = compact(conn, timedelta(days=args.retention_days))
+            print(f"removed {removed} entries, horizon {new_horizon}")
@@ -0,0 +1,106 @@
+"""
+Normalized reading dates.
+
+Book.date_finished is stored as the client sent it: "2023-05-14" from the
+frontend, "2023/05/14" from Goodreads, sometimes a full timestamp or just
+"2023-05". Book.finished_on holds the same date as ISO "YYYY-MM-DD" (a bare
+month becomes its first day), or NULL when the value is not a date. Every
+write path sets it through normalize_date(), and ix_books_finished_on makes
+year / month / week queries range scans over that index.
+
+    python -m utils.dates             # rows whose finished_on disagrees with date_finished
+    python -m utils.dates --rebuild   # recompute them
+"""
+import re
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import literal_column, select, text
+from sqlalchemy.orm import Session
+
+from models import Book
+
+# YYYY[-/]MM[-/DD], optionally followed by a time ("T10:00:00Z", " 10:00")
+_DATE = re.compile(r"^\s*(\d{4})[-/](\d{1,2})(?:[-/](\d{1,2}))?(?:[T\s].*)?$")
+
+
+def normalize_date(value: Optional[str]) -> Optional[str]:
+    """ISO "YYYY-MM-DD" for a date string in any of the stored formats; None when it is not a date."""
+    if not value:
+        return None
+    m = _DATE.match(value)
+    if not m:
+        return None
+    try:
+        return date(int(m.group(1)), int(m.group(2)), int(m.group(3) or 1)).isoformat()
+    except ValueError:
+        return None
+
+
+def year_range(year: int) -> list:
+    """Filter clauses selecting the books finished in `year` (a range over ix_books_finished_on)."""
+    return [Book.finished_on >= f"{year:04d}-01-01", Book.finished_on < f"{year + 1:04d}-01-01"]
+
+
+def period_start(day: str, granularity: str) -> str:
+    """First day of the month, or Monday of the ISO week, containing the ISO date `day`."""
+    if granularity == "month":
+        return day[:8] + "01"
+    d = date.fromisoformat(day)
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+
+# ─── Consistency check / rebuild ─────────────────────────────────────────────
+
+def check(db: Session) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """(id, stored, expected) for every book whose finished_on is out of date."""
+    rows = db.execute(select(Book.id, Book.date_finished, Book.finished_on)).all()
+    return [
+        (book_id, stored, expected)
+        for book_id, raw, stored in rows
+        if (expected := normalize_date(raw)) != stored
+    ]
+
+
+def rebuild(db: Session) -> int:
+    """Recompute finished_on where it differs; returns the number of rows changed."""
+    rows = db.execute(select(literal_column("books.rowid"), Book.date_finished, Book.finished_on)).all()
+    changed = [
+        {"r": rowid, "d": expected}
+        for rowid, raw, stored in rows
+        if (expected := normalize_date(raw)) != stored
+    ]
+    if changed:
+        db.execute(text("UPDATE books SET finished_on = :d WHERE rowid = :r"), changed)
+    return len(changed)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from database import SessionLocal, init_db
+    from utils import aggregates
+    from utils.versions import BOOKS, bump
+
+    parser = argparse.ArgumentParser(description="Check or rebuild Book.finished_on.")
+    parser.add_argument("--rebuild", action="store_true", help="recompute finished_on for every book")
+    args = parser.parse_args()
+
+    init_db()
+    session = SessionLocal()
+    try:
+        drift = check(session)
+        for book_id, stored, expected in drift[:20]:
+            print(f"drift {book_id}: stored {stored!r} expected {expected!r}")
+        print(f"{len(drift)} drifting row(s)")
+        if args.rebuild:
+            changed = rebuild(session)
+            aggregates.rebuild(session)   # the year groups are keyed on finished_on
+            bump(session, BOOKS)
+            session.commit()
+            print(f"Updated {changed} row(s)")
+        elif drift:
+            sys.exit(1)
+    finally:
+        session.close()
@@ -0,0 +1,166 @@
+"""
+Streaming Goodreads CSV importer.
+
+The upload is read in fixed-size chunks through an incremental UTF-8 decoder
+and parsed row by row, so memory does not grow with the file. Rows are
+inserted and committed in batches; after each batch a progress dict is yielded.
+"""
+import codecs
+import csv
+import io
+import json
+import time
+import uuid
+from datetime import date
+from typing import BinaryIO, Iterator, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models import Book
+from utils.aggregates import AggregateDelta
+from utils.dates import normalize_date
+from utils.sagas import saga_key_for
+from utils.versions import BOOKS, bump
+
+READ_CHUNK_SIZE = 64 * 1024
+COMMIT_BATCH_SIZE = 1000
+
+
+class _CountingReader:
+    """Wraps a binary file, decoding it chunk by chunk into CSV lines."""
+
+    def __init__(self, binary: BinaryIO, chunk_size: int = READ_CHUNK_SIZE):
+        self.binary = binary
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+
+    def lines(self) -> Iterator[str]:
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()  # Handle BOM from Goodreads export
+        pending = ""
+        while True:
+            chunk = self.binary.read(self.chunk_size)
+            self.bytes_read += len(chunk)
+            pending += decoder.decode(chunk, final=not chunk)
+            if not chunk:
+                break
+            # Only hand complete lines to the csv module; keep the tail for the next chunk
+            cut = pending.rfind("\n") + 1
+            if cut:
+                yield from io.StringIO(pending[:cut], newline="")
+                pending = pending[cut:]
+        if pending:
+            yield from io.StringIO(pending, newline="")
+
+
+def parse_row(row: dict) -> Optional[dict]:
+    """Map one Goodreads CSV row to Book column values, or None if it lacks a title/author."""
+    title = (row.get("Title") or "").strip()
+    author = (row.get("Author") or "").strip()
+    if not title or not author:
+        return None
+
+    try:
+        pages = int(row.get("Number of Pages") or 0) or 0
+    except (ValueError, TypeError):
+        pages = 0
+
+    try:
+        raw_rating = float(row.get("My Rating") or 0)
+        rating: float | None = raw_rating if raw_rating > 0 else None
+    except (ValueError, TypeError):
+        rating = None
+
+    try:
+        year_published = int(row.get("Year Published") or 0) or None
+    except (ValueError, TypeError):
+        year_published = None
+
+    date_finished = (row.get("Date Read") or "").strip() or date.today().isoformat()
+    shelf = (row.get("Bookshelves") or "").strip() or "Unknown"
+    isbn_raw = (row.get("ISBN13") or row.get("ISBN") or "").strip()
+    isbn = isbn_raw.lstrip("=").strip('"') or None
+
+    return {
+        "id": str(uuid.uuid4()),
+        "title": title,
+        "author": author,
+        "pages": pages or 200,
+        "genre": shelf,
+        "nationality": "Unknown",
+        "date_finished": date_finished,
+        "rating": rating,
+        "collections": json.dumps([]),
+        "isbn": isbn,
+        "year_published": year_published,
+        "notes": (row.get("My Review") or "").strip() or None,
+        "favorite": False,
+        "saga_key": saga_key_for(title, author),
+        "finished_on": normalize_date(date_finished),
+    }
+
+
+def iter_goodreads_import(
+    db: Session,
+    binary: BinaryIO,
+    total_bytes: Optional[int] = None,
+    batch_size: int = COMMIT_BATCH_SIZE,
+) -> Iterator[dict]:
+    """
+    Import a Goodreads CSV from a binary file object, committing every `batch_size` new books.
+    Yields a progress dict after each commit; the last one has done=True.
+    """
+    started = time.perf_counter()
+    source = _CountingReader(binary)
+
+    existing_keys = {f"{title}|{author}" for title, author in db.query(Book.title, Book.author)}
+
+    imported = 0
+    skipped = 0
+    batch: List[dict] = []
+
+    def progress(done: bool = False) -> dict:
+        elapsed = time.perf_counter() - started
+        processed = imported + skipped
+        return {
+            "done": done,
+            "imported": imported,
+            "skipped": skipped,
+            "total": processed,
+            "bytes_read": source.bytes_read,
+            "total_bytes": total_bytes,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "rows_per_second": round(processed / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    def flush():
+        delta = AggregateDelta()
+        for values in batch:
+            delta.add(values)
+        db.execute(insert(Book.__table__), batch)
+        delta.apply(db)
+        bump(db, BOOKS)
+        db.commit()
+        batch.clear()
+
+    for row in csv.DictReader(source.lines()):
+        values = parse_row(row)
+        if values is None:
+            continue
+
+        key = f"{values['title']}|{values['author']}"
+        if key in existing_keys:
+            skipped += 1
+            continue
+
+        batch.append(values)
+        existing_keys.add(key)
+        imported += 1
+
+        if len(batch) >= batch_size:
+            flush()
+            yield progress()
+
+    if batch:
+        flush()
+    yield progress(done=True)
@@ -0,0 +1,303 @@
+"""
+Hall of Fame storage: one row per entry instead of one JSON blob.
+
+Each section of the document (badges, categories, nominations, annualAwards,
+rankings, authorPhotos) is stored in hall_of_fame_items, one row per entry,
+keyed by what identifies the entry in the frontend types:
+
+    badges        {bookId}/{badgeId}
+    categories    {id}
+    nominations   {categoryId}/{bookId}
+    annualAwards  {year}/{type}
+    rankings      {id}
+    authorPhotos  the author name (the value is the photo URL; inline data: URLs
+                  are moved to the asset store, see utils.assets)
+
+Entries are stored as JSON text and spliced back into the whole document
+without being decoded, so editing one badge no longer rewrites (or re-reads)
+megabytes of author photo data URLs. Whole-section writes only touch the rows
+that changed. Entries without the fields of their key (older free-form data)
+are keyed by position, "#<index>".
+
+JSON Patch (RFC 6902) operations are applied to the sections they name only;
+/authorPhotos/<name> paths load just those photos.
+"""
+import json
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+
+from models import HallOfFameItem
+from utils.assets import externalize
+
+_KEY_FIELDS = {
+    "badges": ("bookId", "badgeId"),
+    "categories": ("id",),
+    "nominations": ("categoryId", "bookId"),
+    "annualAwards": ("year", "type"),
+    "rankings": ("id",),
+}
+PHOTOS = "authorPhotos"
+SECTIONS = ("badges", "categories", "nominations", "annualAwards", "rankings", PHOTOS)
+
+_TABLE = HallOfFameItem.__table__
+_CHUNK = 500
+
+
+class PatchError(ValueError):
+    """A malformed patch or path (422)."""
+
+
+class PatchConflict(PatchError):
+    """A patch that does not apply to the current document: failed test, missing target (409)."""
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def item_key(section: str, item) -> Optional[str]:
+    """The key of an entry of a list section, or None when the entry lacks its key fields."""
+    if not isinstance(item, dict):
+        return None
+    parts = [item.get(f) for f in _KEY_FIELDS[section]]
+    if any(p is None or p == "" for p in parts):
+        return None
+    return "/".join(str(p) for p in parts)
+
+
+def split_section(section: str, value) -> List[Tuple[str, int, str]]:
+    """(key, position, json text) rows for a section value; later duplicates of a key win."""
+    if section == PHOTOS:
+        if not isinstance(value, dict):
+            raise PatchError(f"{PHOTOS} must be an object")
+        items = ((author, externalize(photo)) for author, photo in value.items())
+    else:
+        if not isinstance(value, list):
+            raise PatchError(f"{section} must be an array")
+        items = ((item_key(section, item) or f"#{i}", item) for i, item in enumerate(value))
+    rows = {}
+    for position, (key, item) in enumerate(items):
+        rows[key] = (key, position, _dumps(item))
+    return sorted(rows.values(), key=lambda r: r[1])
+
+
+# ─── Reads ───────────────────────────────────────────────────────────────────
+
+def _rows(db, section: Optional[str] = None, keys: Optional[Sequence[str]] = None):
+    stmt = select(HallOfFameItem.section, HallOfFameItem.key, HallOfFameItem.data)
+    if section is not None:
+        stmt = stmt.where(HallOfFameItem.section == section)
+    if keys is not None:
+        stmt = stmt.where(HallOfFameItem.key.in_(keys))
+    return db.execute(stmt.order_by(HallOfFameItem.section, HallOfFameItem.position)).all()
+
+
+def _splice(section: str, rows: Iterable) -> str:
+    if section == PHOTOS:
+        return "{" + ",".join(_dumps(key) + ":" + data for _, key, data in rows) + "}"
+    return "[" + ",".join(data for _, _, data in rows) + "]"
+
+
+def document_body(db) -> bytes:
+    """The whole document as {"data": {...}} JSON, spliced from the stored entries."""
+    by_section: Dict[str, list] = {s: [] for s in SECTIONS}
+    for row in _rows(db):
+        by_section.setdefault(row.section, []).append(row)
+    parts = [_dumps(s) + ":" + _splice(s, by_section[s]) for s in SECTIONS]
+    return ('{"data":{' + ",".join(parts) + "}}").encode("utf-8")
+
+
+def section_body(db, section: str) -> bytes:
+    return _splice(section, _rows(db, section)).encode("utf-8")
+
+
+def load_section(db, section: str, keys: Optional[Sequence[str]] = None):
+    rows = _rows(db, section, keys)
+    if section == PHOTOS:
+        return {key: json.loads(data) for _, key, data in rows}
+    return [json.loads(data) for _, _, data in rows]
+
+
+def load_item(db, section: str, key: str) -> Optional[str]:
+    """The stored JSON text of one entry."""
+    return db.execute(
+        select(HallOfFameItem.data).where(HallOfFameItem.section == section, HallOfFameItem.key == key)
+    ).scalar()
+
+
+# ─── Writes ──────────────────────────────────────────────────────────────────
+
+def write_section(db, section: str, value, only_keys: Optional[Iterable[str]] = None) -> int:
+    """
+    Store a section value, writing only the rows that changed; returns that count.
+    With only_keys, value holds just those entries and the rest of the section
+    is left alone; new entries go after the existing ones.
+    """
+    new = split_section(section, value)
+    stmt = select(HallOfFameItem.key, HallOfFameItem.position, HallOfFameItem.data).where(
+        HallOfFameItem.section == section
+    )
+    if only_keys is not None:
+        only_keys = list(only_keys)
+        stmt = stmt.where(HallOfFameItem.key.in_(only_keys))
+    old = {key: (position, data) for key, position, data in db.execute(stmt)}
+
+    if only_keys is not None:
+        end = db.execute(
+            select(func.coalesce(func.max(HallOfFameItem.position), -1)).where(HallOfFameItem.section == section)
+        ).scalar() + 1
+        new = [(key, old[key][0] if key in old else end + i, data) for i, (key, _, data) in enumerate(new)]
+
+    new_keys = {key for key, _, _ in new}
+    removed = [key for key in old if key not in new_keys]
+    inserts = [{"section": section, "key": k, "position": p, "data": d} for k, p, d in new if k not in old]
+    changed = [{"_key": k, "_position": p, "_data": d} for k, p, d in new if k in old and old[k] != (p, d)]
+
+    for i in range(0, len(removed), _CHUNK):
+        db.execute(delete(_TABLE).where(_TABLE.c.section == section, _TABLE.c.key.in_(removed[i:i + _CHUNK])))
+    if inserts:
+        db.execute(insert(_TABLE), inserts)
+    if changed:
+        db.execute(
+            update(_TABLE)
+            .where(_TABLE.c.section == section, _TABLE.c.key == bindparam("_key"))
+            .values(position=bindparam("_position"), data=bindparam("_data")),
+            changed,
+        )
+    return len(removed) + len(inserts) + len(changed)
+
+
+def write_document(db, document: dict) -> int:
+    unknown = set(document) - set(SECTIONS)
+    if unknown:
+        raise PatchError(f"unknown section(s): {', '.join(sorted(unknown))}")
+    return sum(
+        write_section(db, s, document.get(s, {} if s == PHOTOS else [])) for s in SECTIONS
+    )
+
+
+def put_item(db, section: str, key: str, value) -> bool:
+    """Insert or replace one entry, keeping its position; returns True when it was created."""
+    if section != PHOTOS and item_key(section, value) != key:
+        fields = ", ".join(_KEY_FIELDS[section])
+        raise PatchError(f"the entry's {fields} must match the key {key!r}")
+    created = load_item(db, section, key) is None
+    write_section(db, section, {key: value} if section == PHOTOS else [value], only_keys=[key])
+    return created
+
+
+def delete_item(db, section: str, key: str) -> bool:
+    result = db.execute(delete(_TABLE).where(_TABLE.c.section == section, _TABLE.c.key == key))
+    return result.rowcount > 0
+
+
+# ─── JSON Patch ──────────────────────────────────────────────────────────────
+
+def parse_pointer(pointer: str) -> List[str]:
+    if not pointer.startswith("/"):
+        raise PatchError(f"invalid JSON pointer {pointer!r}: the whole document cannot be patched")
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/")]
+
+
+def _index(token: str, size: int, allow_end: bool = False) -> int:
+    if token == "-" and allow_end:
+        return size
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0"):
+        raise PatchError(f"invalid array index {token!r}")
+    i = int(token)
+    if i > size or (i == size and not allow_end):
+        raise PatchConflict(f"array index {i} out of range")
+    return i
+
+
+def _child(container, token: str):
+    if isinstance(container, dict):
+        if token not in container:
+            raise PatchConflict(f"path member {token!r} not found")
+        return container[token]
+    if isinstance(container, list):
+        return container[_index(token, len(container))]
+    raise PatchConflict(f"cannot descend into a scalar at {token!r}")
+
+
+def _get(doc, tokens: List[str]):
+    for token in tokens:
+        doc = _child(doc, token)
+    return doc
+
+
+def _add(doc, tokens: List[str], value):
+    parent, last = _get(doc, tokens[:-1]), tokens[-1]
+    if isinstance(parent, dict):
+        parent[last] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(last, len(parent), allow_end=True), value)
+    else:
+        raise PatchConflict(f"cannot add to a scalar at {last!r}")
+
+
+def _remove(doc, tokens: List[str]):
+    parent, last = _get(doc, tokens[:-1]), tokens[-1]
+    if isinstance(parent, list):
+        return parent.pop(_index(last, len(parent)))
+    _child(parent, last)   # must exist
+    return parent.pop(last)
+
+
+def apply_patch(doc: dict, operations: Sequence) -> dict:
+    """Apply RFC 6902 operations (objects with op, path, value, from_) to doc, in place."""
+    for operation in operations:
+        tokens = parse_pointer(operation.path)
+        if operation.op == "add":
+            _add(doc, tokens, operation.value)
+        elif operation.op == "remove":
+            _remove(doc, tokens)
+        elif operation.op == "replace":
+            _remove(doc, tokens)
+            _add(doc, tokens, operation.value)
+        elif operation.op == "move":
+            source = parse_pointer(operation.from_)
+            if tokens[:len(source)] == source and tokens != source:
+                raise PatchError(f"cannot move {operation.from_!r} into itself")
+            _add(doc, tokens, _remove(doc, source))
+        elif operation.op == "copy":
+            _add(doc, tokens, json.loads(_dumps(_get(doc, parse_pointer(operation.from_)))))
+        elif operation.op == "test":
+            if _get(doc, tokens) != operation.value:
+                raise PatchConflict(f"test failed at {operation.path!r}")
+        else:
+            raise PatchError(f"unknown operation {operation.op!r}")
+    return doc
+
+
+def patch_document(db, operations: Sequence) -> Tuple[List[str], int]:
+    """
+    Apply a JSON Patch to the stored document, loading only the sections the
+    operations name. Nothing is written unless every operation applies.
+    Returns (sections touched, rows written).
+    """
+    pointers = [parse_pointer(o.path) for o in operations]
+    pointers += [parse_pointer(o.from_) for o in operations if o.op in ("move", "copy")]
+    sections = []
+    for tokens in pointers:
+        if tokens[0] not in SECTIONS:
+            raise PatchError(f"unknown section {tokens[0]!r}")
+        if tokens[0] not in sections:
+            sections.append(tokens[0])
+
+    photo_keys = None   # None: the whole section is loaded
+    photo_pointers = [t for t in pointers if t[0] == PHOTOS]
+    if photo_pointers and all(len(t) > 1 for t in photo_pointers):
+        photo_keys = sorted({t[1] for t in photo_pointers})
+
+    doc = {s: load_section(db, s, photo_keys if s == PHOTOS else None) for s in sections}
+    apply_patch(doc, operations)
+    missing = [s for s in sections if s not in doc]
+    if missing:
+        raise PatchError(f"sections cannot be removed: {', '.join(missing)}")
+
+    written = sum(
+        write_section(db, s, doc[s], only_keys=photo_keys if s == PHOTOS else None) for s in sections
+    )
+    return sections, written
@@ -1,5 +1,19 @@
+import base64
 import json
+from typing import Optional, Tuple
+
 from models import Book
+from utils.assets import externalize
+from utils.dates import normalize_date
+from utils.sagas import saga_key_for
+
+# Public field names of a book, in response order
+BOOK_FIELDS: Tuple[str, ...] = (
+    "id", "title", "author", "pages", "genre", "nationality", "date_finished",
+    "timestamp", "rating", "collections", "isbn", "year_published", "read_count",
+    "cover_url", "notes", "start_date", "favorite", "reading_type",
+    "academic_field", "academic_level", "chapters_read", "total_chapters", "status",
+)
 
 
 def book_to_dict(book: Book) -> dict:
@@ -47,7 +61,7 @@ def dict_to_book_kwargs(data, book_id: str) -> dict:
         "isbn": data.isbn,
         "year_published": data.year_published,
         "read_count": data.read_count,
-        "cover_url": data.cover_url,
+        "cover_url": externalize(data.cover_url),   # inline images go to the asset store
         "notes": data.notes,
         "start_date": data.start_date,
         "favorite": data.favorite,
@@ -57,4 +71,46 @@ def dict_to_book_kwargs(data, book_id: str) -> dict:
         "chapters_read": json.dumps(data.chapters_read) if data.chapters_read is not None else None,
         "total_chapters": data.total_chapters,
         "status": data.status,
+        "saga_key": saga_key_for(data.title, data.author),
+        "finished_on": normalize_date(data.date_finished),
     }
+
+
+def patch_to_columns(changes: dict, current: Optional[dict] = None) -> dict:
+    """
+    Convert the supplied fields of a BookPatch to Book column values (plus the
+    derived saga_key / finished_on). When the title or author changes, `current`
+    (the stored title and author) is needed to recompute saga_key.
+    """
+    columns = dict(changes)
+    if "cover_url" in columns:
+        columns["cover_url"] = externalize(columns["cover_url"])
+    if "collections" in columns:
+        columns["collections"] = json.dumps(columns["collections"] or [])
+    if "chapters_read" in columns:
+        value = columns["chapters_read"]
+        columns["chapters_read"] = json.dumps(value) if value is not None else None
+    if "title" in columns or "author" in columns:
+        merged = {**(current or {}), **columns}
+        columns["saga_key"] = saga_key_for(merged.get("title"), merged.get("author"))
+    if "date_finished" in columns:
+        columns["finished_on"] = normalize_date(columns["date_finished"])
+    return columns
+
+
+def encode_cursor(date_finished: Optional[str], book_id: str) -> str:
+    """Encode a keyset position (date_finished, id) as an opaque URL-safe token."""
+    raw = json.dumps([date_finished, book_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[str], str]:
+    """Inverse of encode_cursor. Raises ValueError on a malformed token."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_finished, book_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(book_id, str):
+        raise ValueError("Invalid cursor")
+    return date_finished, book_id
@@ -0,0 +1,106 @@
+"""
+Set-based bulk import for JSON restores.
+
+Existing ids and title|author keys are prefetched in one query and duplicates
+are resolved in memory; new rows go in through executemany batches and author
+profiles through INSERT … ON CONFLICT, all inside the caller's transaction.
+"""
+import time
+import uuid
+from typing import Iterable, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import AuthorProfile, Book
+from utils.aggregates import AggregateDelta, clear as clear_aggregates
+from utils.helpers import dict_to_book_kwargs
+from utils.sagas import clear as clear_sagas
+from utils.versions import AUTHORS, BOOKS, bump
+
+INSERT_BATCH_SIZE = 1000
+
+
+def bulk_import_books(
+    db: Session,
+    readings: Iterable,
+    author_profiles: Optional[Iterable] = None,
+    replace: bool = False,
+) -> dict:
+    """Import BookCreate-like readings (and optional profiles). Does not commit."""
+    started = time.perf_counter()
+
+    if replace:
+        db.query(Book).delete(synchronize_session=False)
+        clear_aggregates(db)
+        clear_sagas(db)
+        existing_ids: set = set()
+        existing_keys: set = set()
+    else:
+        existing_ids = set()
+        existing_keys = set()
+        for book_id, title, author in db.query(Book.id, Book.title, Book.author):
+            existing_ids.add(book_id)
+            existing_keys.add(f"{title}|{author}")
+
+    imported = 0
+    skipped = 0
+    total = 0
+    delta = AggregateDelta()
+    batch: List[dict] = []
+    table = Book.__table__
+
+    for book_data in readings:
+        total += 1
+        key = f"{book_data.title}|{book_data.author}"
+        if key in existing_keys:
+            skipped += 1
+            continue
+
+        book_id = book_data.id or str(uuid.uuid4())
+        # Avoid duplicate PKs, whether already stored or repeated in the payload
+        if book_id in existing_ids:
+            book_id = str(uuid.uuid4())
+
+        row = dict_to_book_kwargs(book_data, book_id)
+        batch.append(row)
+        delta.add(row)
+        existing_ids.add(book_id)
+        existing_keys.add(key)
+        imported += 1
+
+        if len(batch) >= INSERT_BATCH_SIZE:
+            db.execute(insert(table), batch)
+            batch = []
+
+    if batch:
+        db.execute(insert(table), batch)
+
+    if author_profiles:
+        profiles = [
+            {
+                "name": pd.name,
+                "nationality": pd.nationality,
+                "primary_genre": pd.primary_genre,
+                "favorite_book": pd.favorite_book,
+                "bio": pd.bio,
+            }
+            for pd in author_profiles
+        ]
+        if profiles:
+            # Existing profiles win, as before: the import never overwrites user edits
+            db.execute(sqlite_insert(AuthorProfile.__table__).on_conflict_do_nothing(), profiles)
+            bump(db, AUTHORS)
+
+    delta.apply(db)
+    bump(db, BOOKS)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "imported": imported,
+        "skipped": skipped,
+        "total": total,
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "rows_per_second": round(total / elapsed, 1) if elapsed > 0 else None,
+    }
@@ -0,0 +1,447 @@
+"""
+Background jobs: imports and exports run in a process pool, outside the request.
+
+POST /api/jobs/... records a job and returns its id right away. The work runs
+in one of BOOKTRACKER_JOB_WORKERS spawned processes, so parsing and encoding a
+large library holds neither an API worker nor the API's GIL. The job process
+opens its own engine on the library (the tenant's shard in multi-tenant mode)
+and reports status, progress and result to the JobStore, which GET
+/api/jobs/{id} reads. Export results are files in BOOKTRACKER_JOB_DIR,
+downloaded from /api/jobs/{id}/result.
+
+Job state lives in its own SQLite file (BOOKTRACKER_JOB_DIR/jobs.db), not in
+the library: a JSON import holds the library's write lock until it commits,
+and progress, cancelling and new jobs must not wait for it.
+
+Limits, per server process:
+  - at most BOOKTRACKER_JOB_WORKERS jobs run at once;
+  - imports into one database run one after another: SQLite has a single
+    writer, and a JSON import is one transaction;
+  - past BOOKTRACKER_JOB_MAX_PENDING queued and running jobs, new ones get a 429.
+
+Cancelling sets cancel_requested. A job that has not started is dropped; a
+running one checks the flag each time it reports progress and stops there. A
+JSON import then rolls back entirely, a Goodreads import keeps the batches it
+already committed, an export deletes its partial file.
+
+At startup, jobs left queued or running by a server process that is gone are
+marked failed. Finished jobs and their files are deleted after
+BOOKTRACKER_JOB_RETENTION_HOURS.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from config import JOB_DIR, JOB_MAX_PENDING, JOB_WORKERS
+from database import open_session
+from models import Book
+from utils.tenants import tenant_context
+
+logger = logging.getLogger("booktracker.jobs")
+
+IMPORTS = ("import_json", "import_goodreads")
+EXPORTS = ("export_json", "export_csv", "backup")
+KINDS = IMPORTS + EXPORTS
+ACTIVE = ("queued", "running")
+PROGRESS_INTERVAL = 0.5   # seconds between progress writes of a running job
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def job_path(name: str) -> str:
+    return os.path.join(JOB_DIR, name)
+
+
+def input_path(job_id: str) -> str:
+    """Where the request body of an import job is spooled for the job process."""
+    return job_path(f"{job_id}.input")
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _alive(pid: int) -> bool:
+    if os.name != "posix":
+        return False   # no cheap liveness check: treat what is left over as orphaned
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ─── Job store ───────────────────────────────────────────────────────────────
+
+class JobStore:
+    """
+    Jobs of every tenant in one SQLite file shared by the server and job
+    processes; tenant is "" in single-tenant mode. Rows are returned as dicts.
+    """
+
+    _DDL = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            tenant TEXT NOT NULL,
+            kind TEXT NOT NULL,          -- import_json | import_goodreads | export_json | export_csv | backup
+            status TEXT NOT NULL,        -- queued | running | succeeded | failed | cancelled
+            params TEXT NOT NULL,        -- JSON
+            progress TEXT,               -- JSON, as last reported by the job
+            result TEXT,                 -- JSON
+            error TEXT,
+            result_file TEXT,            -- file name in BOOKTRACKER_JOB_DIR, for exports
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            owner_pid INTEGER NOT NULL,  -- server process that queued it
+            created_at TEXT NOT NULL,    -- ISO 8601, UTC
+            started_at TEXT,
+            finished_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS ix_jobs_tenant_created_at ON jobs (tenant, created_at);
+        CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status);
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or job_path("jobs.db")
+        self._local = threading.local()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._DDL)
+            self._local.conn = conn
+        return conn
+
+    def create(self, kind: str, params: dict, tenant: Optional[str], job_id: Optional[str] = None) -> dict:
+        job_id = job_id or uuid.uuid4().hex
+        self._conn.execute(
+            "INSERT INTO jobs (id, tenant, kind, status, params, owner_pid, created_at) "
+            "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+            (job_id, tenant or "", kind, json.dumps(params), os.getpid(), _now()),
+        )
+        return self.get(job_id)
+
+    def get(self, job_id: str, tenant: Optional[str] = None) -> Optional[dict]:
+        """The job; with a tenant, only if it belongs to that tenant ("" in single mode)."""
+        row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or (tenant is not None and row["tenant"] != tenant):
+            return None
+        return dict(row)
+
+    def list(self, tenant: str, status: Optional[str] = None, limit: int = 50) -> List[dict]:
+        sql, args = "SELECT * FROM jobs WHERE tenant = ?", [tenant]
+        if status is not None:
+            sql += " AND status = ?"
+            args.append(status)
+        rows = self._conn.execute(sql + " ORDER BY created_at DESC LIMIT ?", (*args, limit))
+        return [dict(row) for row in rows]
+
+    def start(self, job_id: str) -> bool:
+        """Move a queued job to running; False if it was cancelled or finished before it got here."""
+        started = self._conn.execute(
+            "UPDATE jobs SET status = 'running', started_at = ? "
+            "WHERE id = ? AND status = 'queued' AND NOT cancel_requested",
+            (_now(), job_id),
+        ).rowcount
+        if not started:
+            self.finish(job_id, "cancelled")   # no-op unless it is still queued, i.e. cancel_requested
+        return bool(started)
+
+    def report(self, job_id: str, progress: dict) -> bool:
+        """Record progress; returns whether cancelling was requested."""
+        self._conn.execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(progress), job_id))
+        return self.cancel_requested(job_id)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def request_cancel(self, job_id: str):
+        self._conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+
+    def finish(self, job_id: str, status: str, result: Optional[dict] = None,
+               result_file: Optional[str] = None, error: Optional[str] = None):
+        """Move a still-active job to a final status; a job finished meanwhile is left alone."""
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, result_file = ?, error = ?, finished_at = ? "
+            "WHERE id = ? AND status IN ('queued', 'running')",
+            (status, json.dumps(result) if result is not None else None, result_file, error, _now(), job_id),
+        )
+        _remove(input_path(job_id))
+
+    def recover(self) -> int:
+        """Fail the queued and running jobs of server processes that no longer exist; returns how many."""
+        rows = self._conn.execute("SELECT id, owner_pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        orphaned = [job_id for job_id, pid in rows if pid == os.getpid() or not _alive(pid)]
+        for job_id in orphaned:
+            self.finish(job_id, "failed", error="Interrupted: the server stopped before the job finished")
+        return len(orphaned)
+
+    def prune(self, retention: timedelta) -> int:
+        """Delete finished jobs older than `retention`, with their files; returns how many."""
+        cutoff = (datetime.now(timezone.utc) - retention).isoformat(timespec="milliseconds")
+        rows = self._conn.execute(
+            "SELECT id, result_file FROM jobs WHERE status NOT IN ('queued', 'running') AND created_at < ?",
+            (cutoff,),
+        ).fetchall()
+        for job_id, result_file in rows:
+            if result_file:
+                _remove(job_path(result_file))
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return len(rows)
+
+
+store = JobStore()
+
+
+def job_to_dict(job: dict) -> dict:
+    return {
+        "id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "params": json.loads(job["params"]),
+        "progress": json.loads(job["progress"]) if job["progress"] else None,
+        "result": json.loads(job["result"]) if job["result"] else None,
+        "error": job["error"],
+        "cancel_requested": bool(job["cancel_requested"]),
+        "result_url": f"/api/jobs/{job['id']}/result" if job["result_file"] and job["status"] == "succeeded" else None,
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+# ─── In the job process ──────────────────────────────────────────────────────
+
+class Progress:
+    """Records a running job's progress at most every PROGRESS_INTERVAL; raises JobCancelled when asked to stop."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._last = 0.0
+
+    def report(self, progress: dict, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last < PROGRESS_INTERVAL:
+            return
+        self._last = now
+        if store.report(self.job_id, progress):
+            raise JobCancelled
+
+    def check(self):
+        if store.cancel_requested(self.job_id):
+            raise JobCancelled
+
+
+def _import_json(job_id: str, params: dict, progress: Progress) -> Tuple[dict, Optional[str]]:
+    from schemas import ImportRequest
+    from utils.importer import bulk_import_books
+
+    progress.report({"phase": "parsing"}, force=True)
+    with open(input_path(job_id), "rb") as f:
+        request = ImportRequest.model_validate_json(f.read())
+    progress.report({"phase": "importing", "books": len(request.readings)}, force=True)
+    with closing(open_session()) as db:
+        result = bulk_import_books(db, request.readings, request.author_profiles, request.replace)
+        progress.check()   # the import is still uncommitted: cancelling now rolls all of it back
+        db.commit()
+    return {**result, "message": f"Imported {result['imported']} books, skipped {result['skipped']} duplicates."}, None
+
+
+def _import_goodreads(job_id: str, params: dict, progress: Progress) -> Tuple[dict, Optional[str]]:
+    from routers.export import goodreads_message
+    from utils.goodreads import iter_goodreads_import
+
+    with open(input_path(job_id), "rb") as f, closing(open_session()) as db:
+        for event in iter_goodreads_import(db, f, os.fstat(f.fileno()).st_size):
+            progress.report(event, force=event["done"])   # each event follows a commit
+    return {**event, "message": goodreads_message(event)}, None
+
+
+def _export(job_id: str, params: dict, progress: Progress, kind: str) -> Tuple[dict, Optional[str]]:
+    from routers import export
+    from utils.streaming import encode_chunks, gzip_chunks
+
+    today = date.today().isoformat()
+    if kind == "export_json":
+        chunks, filename = encode_chunks(export.json_export_chunks()), f"book-readings-{today}.json"
+    elif kind == "export_csv":
+        chunks, filename = encode_chunks(export.csv_export_chunks(), "utf-8-sig"), f"book-readings-{today}.csv"
+    else:
+        chunks = encode_chunks(export.backup_chunks(today, params.get("inline_assets", True)))
+        filename = f"book-tracker-backup-{today}.json"
+    if params.get("gzip"):
+        chunks, filename = gzip_chunks(chunks), filename + ".gz"
+
+    with closing(open_session()) as db:
+        books = db.execute(select(func.count()).select_from(Book)).scalar()
+    result_file = f"{job_id}.{filename.split('.', 1)[1]}"
+    part = job_path(result_file + ".part")
+    written = 0
+    try:
+        with closing(chunks), open(part, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+                progress.report({"books": books, "bytes_written": written})
+        progress.report({"books": books, "bytes_written": written}, force=True)
+        os.replace(part, job_path(result_file))
+    finally:
+        _remove(part)
+    return {"books": books, "bytes": written, "filename": filename}, result_file
+
+
+TASKS: Dict[str, Callable[[str, dict, Progress], Tuple[dict, Optional[str]]]] = {
+    "import_json": _import_json,
+    "import_goodreads": _import_goodreads,
+    **{kind: partial(_export, kind=kind) for kind in EXPORTS},
+}
+
+
+def run(job_id: str) -> str:
+    """Entry point in the job process: run one job to a final status, which is returned."""
+    if not store.start(job_id):
+        return store.get(job_id)["status"]
+    job = store.get(job_id)
+    with tenant_context(job["tenant"] or None):
+        try:
+            result, result_file = TASKS[job["kind"]](job_id, json.loads(job["params"]), Progress(job_id))
+        except JobCancelled:
+            store.finish(job_id, "cancelled")
+        except Exception as exc:
+            logger.exception("job %s (%s) failed", job_id, job["kind"])
+            store.finish(job_id, "failed", error=f"{type(exc).__name__}: {exc}")
+        else:
+            store.finish(job_id, "succeeded", result=result, result_file=result_file)
+    return store.get(job_id)["status"]
+
+
+# ─── In the server process ───────────────────────────────────────────────────
+
+class JobRunner:
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = JOB_MAX_PENDING):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        self._pending = 0
+        # Database (tenant, "" in single mode) -> (id, kind) of the imports waiting for the one running there
+        self._writers: Dict[str, Deque[Tuple[str, str]]] = {}
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def full(self) -> bool:
+        with self._lock:
+            return self._pending >= self.max_pending
+
+    def submit(self, job: dict):
+        with self._lock:
+            self._pending += 1
+            if job["kind"] in IMPORTS:
+                waiting = self._writers.get(job["tenant"])
+                if waiting is not None:
+                    waiting.append((job["id"], job["kind"]))
+                    return
+                self._writers[job["tenant"]] = deque()
+        self._start(job["id"], job["kind"], job["tenant"])
+
+    def _start(self, job_id: str, kind: str, tenant: str):
+        with self._lock:
+            if self._closed:
+                return   # left queued; failed by the next startup's recovery
+            if self._pool is None:
+                # spawn: a forked child would inherit the server's engines, threads and locks
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            future = self._pool.submit(run, job_id)
+            self._futures[job_id] = future
+        future.add_done_callback(partial(self._done, job_id, kind, tenant))
+
+    def _done(self, job_id: str, kind: str, tenant: str, future: Future):
+        broken = False
+        if future.cancelled():
+            store.finish(job_id, "cancelled")
+        elif future.exception() is not None:
+            exc = future.exception()
+            broken = isinstance(exc, BrokenProcessPool)
+            logger.error("job %s (%s) crashed: %r", job_id, kind, exc)
+            store.finish(job_id, "failed", error=f"The job process failed: {type(exc).__name__}: {exc}")
+        with self._lock:
+            self._futures.pop(job_id, None)
+            self._pending -= 1
+            if broken:
+                self._pool = None   # the next job starts a new pool
+            following = None
+            if kind in IMPORTS:
+                waiting = self._writers.get(tenant)
+                if waiting:
+                    following = waiting.popleft()
+                else:
+                    self._writers.pop(tenant, None)
+        if following is not None:
+            self._start(*following, tenant)
+        if kind in IMPORTS:
+            from utils import changelog
+            changelog.notify()   # let this process's /api/sync/events streams see the import now
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancelling; True if the job had not started and was dropped here."""
+        store.request_cancel(job_id)
+        with self._lock:
+            for waiting in self._writers.values():
+                for entry in waiting:
+                    if entry[0] == job_id:
+                        waiting.remove(entry)
+                        self._pending -= 1
+                        store.finish(job_id, "cancelled")
+                        return True
+            future = self._futures.get(job_id)
+        return future is not None and future.cancel()   # _done records it
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "waiting_imports": sum(len(w) for w in self._writers.values()),
+            }
+
+    def shutdown(self):
+        """Drop the queued jobs; running ones finish first."""
+        with self._lock:
+            self._closed = True
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+runner = JobRunner()
@@ -0,0 +1,265 @@
+"""
+Per-request instrumentation: route latency, SQL statements, rows and bytes.
+
+MetricsMiddleware wraps the whole app. For each request it keeps a
+RequestStats in a context variable, which follows the request into the
+threadpool (sync endpoints, streaming generators). Engine hooks add every SQL
+statement's count and time to it, and the sqlite3 cursor of the sync engine
+counts the rows fetched. When the response ends, the totals go into
+process-wide counters and histograms labelled by method and route template
+(/api/books/{book_id}, not the concrete path), rendered by /api/metrics in the
+Prometheus text format. Each worker process keeps its own counters.
+
+Every response also carries a Server-Timing header, shown by browser devtools:
+
+    Server-Timing: app;dur=41.2, sql;dur=12.7;desc="9 queries"
+
+It is sent with the response headers, so a streaming response only reports
+the work done before its first byte. A high sql count for a route that should
+need one or two queries is the N+1 pattern to look for.
+"""
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+from config import PROFILE_DIR, PROFILE_INTERVAL_MS, PROFILE_SLOW_MS
+from utils.profiler import SamplingProfiler
+
+
+class RequestStats:
+    __slots__ = ("started", "sql_count", "sql_seconds", "rows_returned", "rows_written")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.rows_returned = 0
+        self.rows_written = 0
+
+    def server_timing(self) -> str:
+        app_ms = (time.perf_counter() - self.started) * 1000
+        return f'app;dur={app_ms:.1f}, sql;dur={self.sql_seconds * 1000:.1f};desc="{self.sql_count} queries"'
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+# ─── SQL hooks ───────────────────────────────────────────────────────────────
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None or context is None:
+        return
+    stats.sql_count += 1
+    stats.sql_seconds += time.perf_counter() - context._metrics_started
+    if cursor.rowcount > 0:   # INSERT/UPDATE/DELETE; SELECTs report -1
+        stats.rows_written += cursor.rowcount
+
+
+def instrument_engine(engine: Engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _count_rows(n: int):
+    stats = _current.get()
+    if stats is not None:
+        stats.rows_returned += n
+
+
+class _CountingCursor(sqlite3.Cursor):
+    """Counts fetched rows; SQLAlchemy reads results only through these three calls."""
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            _count_rows(1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        _count_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        _count_rows(len(rows))
+        return rows
+
+
+class CountingConnection(sqlite3.Connection):
+    """sqlite3 connection factory (connect_args={"factory": ...}) whose cursors count fetched rows."""
+
+    def cursor(self, factory=_CountingCursor):
+        return super().cursor(factory)
+
+
+# ─── Registry ────────────────────────────────────────────────────────────────
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500, 1000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.series: Dict[Labels, List] = {}   # labels -> [per-bucket counts incl. +Inf, sum, count]
+
+    def observe(self, labels: Labels, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels((*labels, ('le', str(bound))))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(labels)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.series: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, value: float = 1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_labels(labels)} {value}" for labels, value in sorted(self.series.items()))
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}" if labels else ""
+
+
+REQUEST_SECONDS = Histogram(
+    "booktracker_http_request_duration_seconds", "Time from request to the last response byte.", LATENCY_BUCKETS)
+RESPONSE_BYTES = Counter("booktracker_http_response_bytes_total", "Response body bytes sent.")
+SQL_PER_REQUEST = Histogram(
+    "booktracker_sql_statements_per_request", "SQL statements executed by one request.", STATEMENT_BUCKETS)
+SQL_STATEMENTS = Counter("booktracker_sql_statements_total", "SQL statements executed.")
+SQL_SECONDS = Counter("booktracker_sql_duration_seconds_total", "Time spent executing SQL statements.")
+ROWS_RETURNED = Counter("booktracker_sql_rows_returned_total", "Rows fetched from SQL results (sync engine).")
+ROWS_WRITTEN = Counter("booktracker_sql_rows_written_total", "Rows inserted, updated or deleted.")
+PROFILES = Counter("booktracker_profiles_written_total", "Stack profiles written for slow requests.")
+
+METRICS = (REQUEST_SECONDS, RESPONSE_BYTES, SQL_PER_REQUEST, SQL_STATEMENTS, SQL_SECONDS,
+           ROWS_RETURNED, ROWS_WRITTEN, PROFILES)
+
+_lock = threading.Lock()
+_in_flight = 0
+
+
+def record(method: str, route: str, status: int, seconds: float, stats: RequestStats, response_bytes: int):
+    labels = (("method", method), ("route", route))
+    with _lock:
+        REQUEST_SECONDS.observe((*labels, ("status", str(status))), seconds)
+        RESPONSE_BYTES.inc(labels, response_bytes)
+        SQL_PER_REQUEST.observe(labels, stats.sql_count)
+        SQL_STATEMENTS.inc(labels, stats.sql_count)
+        SQL_SECONDS.inc(labels, stats.sql_seconds)
+        ROWS_RETURNED.inc(labels, stats.rows_returned)
+        ROWS_WRITTEN.inc(labels, stats.rows_written)
+
+
+def render() -> str:
+    from utils.cache import cache_info
+
+    with _lock:
+        lines = [
+            "# HELP booktracker_http_requests_in_flight Requests being served.",
+            "# TYPE booktracker_http_requests_in_flight gauge",
+            f"booktracker_http_requests_in_flight {_in_flight}",
+        ]
+        for metric in METRICS:
+            lines.extend(metric.render())
+    cache = cache_info()
+    for key in ("hits", "misses", "evictions", "invalidations"):
+        if key in cache:
+            lines.append(f"# TYPE booktracker_response_cache_{key}_total counter")
+            lines.append(f"booktracker_response_cache_{key}_total {cache[key]}")
+    return "\n".join(lines) + "\n"
+
+
+# ─── Middleware ──────────────────────────────────────────────────────────────
+
+profiler = SamplingProfiler(PROFILE_INTERVAL_MS, PROFILE_SLOW_MS, PROFILE_DIR) if PROFILE_SLOW_MS > 0 else None
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        profile = profiler.begin() if profiler is not None else None
+        status, response_bytes, streaming = 500, 0, False
+
+        async def send_with_timing(message):
+            nonlocal status, response_bytes, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing())
+                streaming = headers.get("content-type", "").startswith("text/event-stream")
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        with _lock:
+            _in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - stats.started
+            _current.reset(token)
+            with _lock:
+                _in_flight -= 1
+            # scope["route"] is set by the router once a route matched
+            route = getattr(scope.get("route"), "path", "unmatched")
+            record(scope["method"], route, status, elapsed, stats, response_bytes)
+            if profile is not None:
+                stacks = profiler.end(profile)
+                if stacks and not streaming:   # event streams are slow by design
+                    await run_in_threadpool(profiler.write, stacks, scope["method"], route, elapsed)
+                    with _lock:
+                        PROFILES.inc(())
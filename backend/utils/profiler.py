@@ -0,0 +1,105 @@
+"""
+Opt-in sampling profiler for slow requests (BOOKTRACKER_PROFILE_SLOW_MS > 0).
+
+While requests are in flight, a daemon thread records the Python stack of every
+other thread each BOOKTRACKER_PROFILE_INTERVAL_MS. When a request takes longer
+than the threshold, the samples taken during it are written to
+BOOKTRACKER_PROFILE_DIR in the folded-stack format ("root;...;leaf count" per
+line) read by flamegraph.pl, inferno and speedscope:
+
+    flamegraph.pl profiles/20250101T120000-GET-api_books-812ms.folded > books.svg
+
+A sync endpoint hops between the event loop and the threadpool, so samples
+are not tied to one thread: requests running at the same time as the slow one
+show up in its profile too. Idle threads (waiting on a lock, a queue or the
+selector) are skipped. Nothing runs while no request is in flight.
+"""
+import itertools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger("booktracker.profiler")
+
+# (file name, function) of the innermost frame of a thread with nothing to do
+IDLE_LEAVES = {("threading.py", "wait"), ("selectors.py", "select"), ("queue.py", "get")}
+
+
+def fold(frame) -> Optional[str]:
+    """The stack of `frame`, root first, as "func (file:line);..."; None for an idle thread."""
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+        return None
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    def __init__(self, interval_ms: float, threshold_ms: float, directory: str):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.directory = directory
+        self._samples: Deque[Tuple[float, str]] = deque()
+        self._active: Dict[int, float] = {}   # request token -> start
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+        self._busy = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self) -> int:
+        with self._lock:
+            token = next(self._tokens)
+            self._active[token] = time.perf_counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+            self._busy.set()
+        return token
+
+    def end(self, token: int) -> Counter:
+        """Stop tracking a request; its samples if it was slower than the threshold, else none."""
+        now = time.perf_counter()
+        with self._lock:
+            start = self._active.pop(token)
+            stacks = Counter(s for t, s in self._samples if t >= start) if now - start >= self.threshold else Counter()
+            # Keep only what a request still in flight may need
+            oldest = min(self._active.values(), default=now)
+            while self._samples and self._samples[0][0] < oldest:
+                self._samples.popleft()
+            if not self._active:
+                self._busy.clear()
+        return stacks
+
+    def write(self, stacks: Counter, method: str, route: str, elapsed: float) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        path = os.path.join(
+            self.directory,
+            f"{datetime.now():%Y%m%dT%H%M%S}-{method}-{name}-{round(elapsed * 1000)}ms.folded",
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info("profile of a %.0f ms %s %s written to %s", elapsed * 1000, method, route, path)
+        return path
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            self._busy.wait()
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            stacks = [fold(frame) for ident, frame in sys._current_frames().items() if ident != own]
+            with self._lock:
+                if self._active:
+                    self._samples.extend((now, s) for s in stacks if s)
@@ -0,0 +1,119 @@
+"""
+Query-plan regression checks.
+
+Runs EXPLAIN QUERY PLAN on the statements behind the hot endpoints and asserts
+that each one is answered from its intended index and never sorts through a
+temporary B-tree. Run from backend/ (exit status 1 on any regression):
+
+    python -m utils.query_plans            # against a fresh, empty schema
+    python -m utils.query_plans --current  # against the configured database
+
+tests/test_query_plans.py asserts the same cases (plus full-text search) on a
+schema built by the migrations:
+
+    python -m pytest
+"""
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+from models import Book
+from utils.dates import year_range
+from utils.helpers import encode_cursor
+
+
+class PlanCase(NamedTuple):
+    name: str
+    statement: Callable[[], object]
+    index: Optional[str]   # index the plan must use; None = only forbid temp B-trees
+    sorts: bool = False    # a temp B-tree sort is expected (small, index-selected result set)
+
+
+def _page(**filters):
+    from routers.books import list_statements
+
+    def build():
+        _, page = list_statements(
+            filters.get("genre"), filters.get("nationality"), filters.get("reading_type"),
+            filters.get("cursor"), 100, None,
+            status=filters.get("status"), collection=filters.get("collection"),
+        )
+        return page
+    return build
+
+
+def _timeline(filters):
+    from utils.stats import timeline_statement
+    return timeline_statement(filters)
+
+
+CASES: List[PlanCase] = [
+    PlanCase("get_books, no filter", _page(), "ix_books_date_finished_id"),
+    PlanCase("get_books, next page", _page(cursor=encode_cursor("2024-01-01", "x")), "ix_books_date_finished_id"),
+    PlanCase("get_books ?genre=", _page(genre="Fiction"), "ix_books_genre_date_finished"),
+    PlanCase(
+        "get_books ?genre= next page",
+        _page(genre="Fiction", cursor=encode_cursor("2024-01-01", "x")),
+        "ix_books_genre_date_finished",
+    ),
+    PlanCase("get_books ?nationality=", _page(nationality="Spain"), "ix_books_nationality_date_finished"),
+    PlanCase("get_books ?reading_type=", _page(reading_type="academic"), "ix_books_reading_type_date_finished"),
+    PlanCase("get_books ?status=", _page(status="reading"), "ix_books_status_date_finished"),
+    # One collection holds a handful of books: select them through the index, then sort
+    PlanCase("get_books ?collection=", _page(collection="Dune"), "ix_book_collections_name", sorts=True),
+    PlanCase(
+        "import dedupe lookup",
+        lambda: select(Book.id).where(Book.title == "Dune", Book.author == "Frank Herbert"),
+        "ix_books_title_author",
+    ),
+    PlanCase("stats timeline", lambda: _timeline([]), "ix_books_finished_on"),
+    PlanCase("goal progress (one year)", lambda: _timeline(year_range(2024)), "ix_books_finished_on"),
+]
+
+
+def explain(conn: Connection, statement) -> List[str]:
+    compiled = statement.compile(dialect=conn.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[-1] for row in rows]
+
+
+def check_plans(conn: Connection) -> List[str]:
+    """Return one message per failing case (empty list = all plans as expected)."""
+    failures = []
+    for case in CASES:
+        plan = explain(conn, case.statement())
+        text = " | ".join(plan)
+        if not case.sorts and any("USE TEMP B-TREE" in step for step in plan):
+            failures.append(f"{case.name}: sorts with a temp B-tree ({text})")
+        elif case.index and not any(f"INDEX {case.index}" in step for step in plan):
+            failures.append(f"{case.name}: expected {case.index} ({text})")
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from sqlalchemy import create_engine
+
+    from database import Base, engine, init_db
+
+    parser = argparse.ArgumentParser(description="Check query plans of the hot endpoints.")
+    parser.add_argument("--current", action="store_true", help="check the configured database instead of a fresh schema")
+    args = parser.parse_args()
+
+    if args.current:
+        init_db()
+        target = engine
+    else:
+        target = create_engine("sqlite://")
+        Base.metadata.create_all(target)
+
+    with target.connect() as conn:
+        problems = check_plans(conn)
+    for p in problems:
+        print(f"FAIL {p}")
+    print(f"{len(CASES) - len(problems)}/{len(CASES)} query plans OK")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,171 @@
+"""
+Normalized, indexed copies of the JSON list columns of books.
+
+Book.collections and Book.chapters_read stay the JSON text the API returns
+(utils.serialization splices them in as-is), but every query by collection or
+by chapter goes through book_collections / book_chapters. SQLite triggers keep
+the two tables in step with books on every write path (ORM, bulk inserts,
+batch updates, raw DELETEs), the same way books_fts is maintained.
+
+    python -m utils.relations            # compare the tables with the JSON columns
+    python -m utils.relations --rebuild  # and repopulate them from the JSON columns
+"""
+from typing import List, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from models import Book, BookChapter, BookCollection
+
+# json_each() raises on malformed JSON, which would abort the write that fired
+# the trigger; treat anything unparsable as an empty list instead.
+# {row} is "new" inside a trigger, or "books" when joined against the whole table.
+_COLLECTIONS_OF = (
+    "SELECT {row}.id, value, key FROM {source}"
+    "json_each(CASE WHEN json_valid({row}.collections) THEN {row}.collections ELSE '[]' END) "
+    "WHERE type = 'text'"
+)
+_CHAPTERS_OF = (
+    "SELECT {row}.id, value FROM {source}"
+    "json_each(CASE WHEN json_valid({row}.chapters_read) THEN {row}.chapters_read ELSE '[]' END) "
+    "WHERE type = 'integer'"
+)
+_INSERT_COLLECTIONS = "INSERT OR IGNORE INTO book_collections (book_id, name, position) " + _COLLECTIONS_OF
+_INSERT_CHAPTERS = "INSERT OR IGNORE INTO book_chapters (book_id, chapter) " + _CHAPTERS_OF
+
+_NEW = {"row": "new", "source": ""}
+_ALL = {"row": "books", "source": "books, "}
+
+# The WHEN clauses skip the trigger program entirely for books without entries,
+# which keeps bulk imports of plain books close to their trigger-free speed.
+TRIGGER_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS books_collections_ai AFTER INSERT ON books
+        WHEN new.collections IS NOT NULL AND new.collections <> '[]' BEGIN
+        {_INSERT_COLLECTIONS.format(**_NEW)};
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_chapters_ai AFTER INSERT ON books
+        WHEN new.chapters_read IS NOT NULL AND new.chapters_read <> '[]' BEGIN
+        {_INSERT_CHAPTERS.format(**_NEW)};
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS books_lists_ad AFTER DELETE ON books
+        WHEN (old.collections IS NOT NULL AND old.collections <> '[]')
+          OR (old.chapters_read IS NOT NULL AND old.chapters_read <> '[]') BEGIN
+        DELETE FROM book_collections WHERE book_id = old.id;
+        DELETE FROM book_chapters WHERE book_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_collections_au AFTER UPDATE OF collections ON books BEGIN
+        DELETE FROM book_collections WHERE book_id = old.id;
+        {_INSERT_COLLECTIONS.format(**_NEW)};
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_chapters_au AFTER UPDATE OF chapters_read ON books BEGIN
+        DELETE FROM book_chapters WHERE book_id = old.id;
+        {_INSERT_CHAPTERS.format(**_NEW)};
+    END""",
+]
+
+
+def ensure_triggers(conn: Connection):
+    for stmt in TRIGGER_DDL:
+        conn.execute(text(stmt))
+
+
+def clear(conn: Connection):
+    conn.execute(text("DELETE FROM book_collections"))
+    conn.execute(text("DELETE FROM book_chapters"))
+
+
+def backfill(conn: Connection, after: Optional[int] = None, upto: Optional[int] = None):
+    """Insert the entries of every book, or of the books with after < rowid <= upto."""
+    where, params = "", {}
+    if after is not None:
+        where, params = " AND books.rowid > :after AND books.rowid <= :upto", {"after": after, "upto": upto}
+    conn.execute(text(_INSERT_COLLECTIONS.format(**_ALL) + where), params)
+    conn.execute(text(_INSERT_CHAPTERS.format(**_ALL) + where), params)
+
+
+def rebuild(conn: Connection):
+    """Repopulate both tables from the JSON columns in two set-based statements."""
+    clear(conn)
+    backfill(conn)
+
+
+def check(conn: Connection) -> List[str]:
+    """Rows that differ between the normalized tables and the JSON columns (empty = in sync)."""
+    expected_collections = f"SELECT id, value FROM ({_COLLECTIONS_OF.format(**_ALL)})"
+    problems = []
+    for table, column, expected in (
+        ("book_collections", "name", expected_collections),
+        ("book_chapters", "chapter", _CHAPTERS_OF.format(**_ALL)),
+    ):
+        actual = f"SELECT book_id, {column} FROM {table}"
+        for book_id, value in conn.execute(text(f"{expected} EXCEPT {actual}")):
+            problems.append(f"{table}: missing ({book_id!r}, {value!r})")
+        for book_id, value in conn.execute(text(f"{actual} EXCEPT {expected}")):
+            problems.append(f"{table}: stale ({book_id!r}, {value!r})")
+    return problems
+
+
+# ─── Queries ─────────────────────────────────────────────────────────────────
+
+def in_collection(name: str):
+    """Filter clause for books that belong to the collection (uses ix_book_collections_name)."""
+    return Book.id.in_(select(BookCollection.book_id).where(BookCollection.name == name))
+
+
+def collection_counts(db: Session, min_count: int = 1) -> List[dict]:
+    rows = db.execute(
+        select(BookCollection.name, func.count(), func.sum(Book.pages),
+               func.min(Book.date_finished), func.max(Book.date_finished))
+        .join(Book, Book.id == BookCollection.book_id)
+        .group_by(BookCollection.name)
+        .having(func.count() >= min_count)
+        .order_by(func.count().desc(), BookCollection.name)
+    ).all()
+    return [
+        {"name": name, "book_count": count, "pages": pages or 0,
+         "first_finished": first, "last_finished": last}
+        for name, count, pages, first, last in rows
+    ]
+
+
+def chapter_progress(db: Session, status: Optional[str] = None) -> List[dict]:
+    """Chapters read vs total_chapters for every book that tracks chapters, least complete first."""
+    read = func.count(BookChapter.chapter)
+    stmt = (
+        select(Book.id, Book.title, Book.author, Book.status, Book.total_chapters, read)
+        .outerjoin(BookChapter, BookChapter.book_id == Book.id)
+        .where(Book.total_chapters > 0)
+        .group_by(Book.id)
+    )
+    if status:
+        stmt = stmt.where(Book.status == status)
+    rows = db.execute(stmt).all()
+    out = [
+        {"id": book_id, "title": title, "author": author, "status": book_status,
+         "chapters_read": n, "total_chapters": total, "percent": round(100 * min(n, total) / total, 1)}
+        for book_id, title, author, book_status, total, n in rows
+    ]
+    out.sort(key=lambda r: (r["percent"], r["title"]))
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from database import engine, init_db
+
+    parser = argparse.ArgumentParser(description="Check (or rebuild) book_collections and book_chapters.")
+    parser.add_argument("--rebuild", action="store_true", help="repopulate the tables from the JSON columns")
+    args = parser.parse_args()
+
+    init_db()
+    with engine.begin() as conn:
+        if args.rebuild:
+            rebuild(conn)
+        problems = check(conn)
+    for p in problems[:50]:
+        print(p)
+    print(f"{len(problems)} differences")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,261 @@
+"""
+Saga / series detection, ported from the frontend's sagaUtils.ts.
+
+Titles are parsed with the same patterns ("Title (Series #1)", "Series: Title",
+"Title, Vol. 2" …) and books by the same author sharing a saga name are grouped.
+
+The parsing happens once per book, on write: Book.saga_key holds
+"<saga name>|||<author>" (lower-cased) or NULL for standalone books. Every
+write path records the keys it touches in its AggregateDelta, which refreshes
+just those rows of the sagas table (summary + influence over non-academic
+books), so /api/sagas is a read of precomputed rows.
+
+    python -m utils.sagas --rebuild   # recompute every saga_key and the sagas table
+"""
+import json
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import delete, insert, literal_column, or_, select, text
+from sqlalchemy.orm import Session
+
+from models import Book, Saga
+from utils.stats import build_filters, get_genre_weight, js_round
+
+KEY_SEPARATOR = "|||"
+
+# Columns build_saga() reads, in insertion (rowid) order so groups are deterministic
+SAGA_COLUMNS = (
+    Book.id, Book.title, Book.author, Book.pages, Book.genre, Book.nationality,
+    Book.rating, Book.year_published, Book.date_finished, Book.saga_key,
+)
+ROWID_ORDER = literal_column("books.rowid")
+
+_PAREN = re.compile(r"\(([^)]+?)(?:\s*[#,]\s*\d+|\s+Book\s+\d+|\s+Vol\.?\s*\d+)?\)$", re.I)
+_COLON = re.compile(r"^([^:–—-]+?)(?:\s*[:–—-]\s+)")
+_VOLUME = re.compile(r"^(.+?)(?:\s*,?\s*(?:Vol\.?|Volume|#|Book)\s*\d+)$", re.I)
+
+
+def extract_saga_name(title: str) -> Optional[str]:
+    """Return the saga a title belongs to, or None for standalone books."""
+    m = _PAREN.search(title)
+    if m:
+        name = re.sub(r"[#,]\s*\d+$", "", m.group(1))
+        name = re.sub(r"\s+Book\s+\d+$", "", name, flags=re.I).strip()
+        if len(name) > 2:
+            return name
+
+    m = _COLON.match(title)
+    if m and 2 < len(m.group(1)) < 50:
+        if len(title) - len(m.group(0)) > 3:
+            return m.group(1).strip()
+
+    m = _VOLUME.match(title)
+    if m and len(m.group(1)) > 2:
+        return m.group(1).strip()
+
+    return None
+
+
+def saga_key_for(title: Optional[str], author: Optional[str]) -> Optional[str]:
+    """The Book.saga_key of a title/author pair: same saga name and author, same key."""
+    name = extract_saga_name(title) if title else None
+    if not name or author is None:
+        return None
+    return f"{name.lower()}{KEY_SEPARATOR}{author.lower()}"
+
+
+def _format_name(name: str) -> str:
+    return " ".join(w[:1].upper() + w[1:].lower() for w in name.split(" "))
+
+
+def build_saga(name: str, books: List) -> dict:
+    """Aggregate a group of book rows (title/author/pages/genre/rating/...) into a saga summary."""
+    total_pages = sum(b.pages for b in books)
+    weighted_pages = 0.0
+    genre_counts: Dict[str, int] = defaultdict(int)
+    for b in books:
+        weighted_pages += b.pages * get_genre_weight(b.genre)
+        genre_counts[b.genre] += 1
+
+    primary_genre = books[0].genre
+    best = 0
+    for genre, count in genre_counts.items():
+        if count > best:
+            best, primary_genre = count, genre
+
+    rated = [b.rating for b in books if b.rating is not None]
+    avg_rating = sum(rated) / len(rated) if rated else 0
+    years = sorted(b.year_published for b in books if b.year_published and b.year_published > 0)
+    ordered = sorted(books, key=lambda b: (b.year_published or 0, b.date_finished or ""))
+
+    return {
+        "id": "saga-" + re.sub(r"\s+", "-", name.lower()),
+        "name": _format_name(name),
+        "author": books[0].author,
+        "book_ids": [b.id for b in ordered],
+        "book_count": len(books),
+        "total_pages": total_pages,
+        "weighted_pages": js_round(weighted_pages),
+        "avg_rating": avg_rating,
+        "avg_genre_weight": weighted_pages / total_pages if total_pages else 0,
+        "primary_genre": primary_genre,
+        "nationality": books[0].nationality,
+        "start_year": years[0] if years else None,
+        "end_year": years[-1] if years else None,
+    }
+
+
+def group_into_sagas(books: Iterable) -> dict:
+    """Group rows (with saga_key) into sagas of 2+ books; everything else is returned as standalone ids."""
+    saga_map: Dict[str, list] = defaultdict(list)
+    standalone: List[str] = []
+    for b in books:
+        if b.saga_key:
+            saga_map[b.saga_key].append(b)
+        else:
+            standalone.append(b.id)
+
+    sagas = []
+    for key, members in saga_map.items():
+        if len(members) >= 2:
+            sagas.append(build_saga(key.split(KEY_SEPARATOR)[0], members))
+        else:
+            standalone.extend(b.id for b in members)
+    sagas.sort(key=lambda s: -s["total_pages"])
+    return {"sagas": sagas, "standalone_ids": standalone}
+
+
+def saga_influence(saga: dict) -> dict:
+    """Influence of a saga treated as one "super-book" (calculateSagaInfluence)."""
+    avg_rating = saga["avg_rating"]
+    rating_bonus = 0.6 + (avg_rating - 1) * 0.225 if avg_rating > 0 else 1.0
+    completion_bonus = min(1.5, 1 + (saga["book_count"] - 1) * 0.1)
+    length_bonus = min(1.3, 1 + (saga["total_pages"] // 1000) * 0.1)
+    raw = saga["weighted_pages"] * rating_bonus * completion_bonus * length_bonus
+    return {
+        "saga": saga,
+        "raw_score": raw,
+        "normalized_score": 0,
+        "breakdown": {
+            "total_pages": saga["total_pages"],
+            "weighted_pages": saga["weighted_pages"],
+            "avg_rating": avg_rating,
+            "rating_bonus": rating_bonus,
+            "genre_bonus": saga["avg_genre_weight"],
+            "completion_bonus": completion_bonus,
+            "length_bonus": length_bonus,
+        },
+    }
+
+
+def rank_saga_influence(sagas: List[dict]) -> List[dict]:
+    scores = [saga_influence(s) for s in sagas]
+    max_score = max([s["raw_score"] for s in scores] + [1])
+    for s in scores:
+        s["normalized_score"] = js_round(s["raw_score"] / max_score * 100)
+    scores.sort(key=lambda s: -s["normalized_score"])
+    return scores
+
+
+# ─── Persistent index ────────────────────────────────────────────────────────
+
+def _non_academic() -> list:
+    return build_filters(exclude_academic=True)
+
+
+def _store(db: Session, rows: Iterable):
+    groups: Dict[str, list] = defaultdict(list)
+    for row in rows:
+        groups[row.saga_key].append(row)
+    values = []
+    for key, members in groups.items():
+        if len(members) < 2:
+            continue
+        saga = build_saga(key.split(KEY_SEPARATOR)[0], members)
+        values.append({
+            "key": key,
+            "total_pages": saga["total_pages"],
+            "raw_score": saga_influence(saga)["raw_score"],
+            "data": json.dumps(saga, ensure_ascii=False),
+        })
+    if values:
+        db.execute(insert(Saga), values)
+
+
+def refresh(db: Session, keys: Iterable[str]):
+    """Recompute the stored sagas for the given keys from their current books."""
+    keys = sorted(k for k in set(keys) if k)
+    for i in range(0, len(keys), 500):
+        chunk = keys[i:i + 500]
+        db.execute(delete(Saga).where(Saga.key.in_(chunk)))
+        _store(db, db.execute(
+            select(*SAGA_COLUMNS).where(Book.saga_key.in_(chunk), *_non_academic()).order_by(ROWID_ORDER)
+        ))
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every saga_key from the titles, then the whole sagas table. Returns the saga count."""
+    rows = db.execute(select(ROWID_ORDER, Book.title, Book.author, Book.saga_key)).all()
+    changed = [
+        {"r": rowid, "key": key}
+        for rowid, title, author, stored in rows
+        if (key := saga_key_for(title, author)) != stored
+    ]
+    if changed:
+        db.execute(text("UPDATE books SET saga_key = :key WHERE rowid = :r"), changed)
+    return rebuild_table(db)
+
+
+def clear(db: Session):
+    db.execute(delete(Saga))
+
+
+def rebuild_table(db: Session) -> int:
+    """Recompute the whole sagas table from the stored saga_keys. Returns the saga count."""
+    clear(db)
+    _store(db, db.execute(
+        select(*SAGA_COLUMNS).where(Book.saga_key.isnot(None), *_non_academic()).order_by(ROWID_ORDER)
+    ))
+    return db.query(Saga).count()
+
+
+def read(db: Session) -> dict:
+    """The stored sagas (largest first), the non-academic books outside them, and the influence ranking."""
+    sagas = [json.loads(d) for d in db.execute(select(Saga.data).order_by(Saga.total_pages.desc(), Saga.key)).scalars()]
+    standalone = db.execute(
+        select(Book.id)
+        .where(*_non_academic(), or_(Book.saga_key.is_(None), Book.saga_key.notin_(select(Saga.key))))
+        .order_by(ROWID_ORDER)
+    ).scalars().all()
+    return {"sagas": sagas, "standalone_ids": standalone, "influence": rank_saga_influence(sagas)}
+
+
+def query_rows(db: Session, filters: Sequence):
+    """Rows for group_into_sagas() under arbitrary stats filters (no title parsing involved)."""
+    return db.execute(select(*SAGA_COLUMNS).where(*filters).order_by(ROWID_ORDER).execution_options(yield_per=1000))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from database import SessionLocal, init_db
+    from utils.versions import BOOKS, bump
+
+    parser = argparse.ArgumentParser(description="Rebuild the saga index.")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every saga_key and the sagas table")
+    args = parser.parse_args()
+
+    init_db()
+    session = SessionLocal()
+    try:
+        if args.rebuild:
+            saga_count = rebuild(session)
+            bump(session, BOOKS)   # cached /api/sagas and /api/books responses predate the rebuild
+            session.commit()
+            print(f"Rebuilt {saga_count} saga(s)")
+        else:
+            print(f"{session.query(Saga).count()} saga(s) stored")
+    finally:
+        session.close()
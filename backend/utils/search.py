@@ -0,0 +1,115 @@
+"""
+Full-text search over books (SQLite FTS5).
+
+books_fts is an external-content FTS5 index over books.title, author, notes,
+genre and collections, keyed by the books rowid and kept in sync by triggers,
+so every write path (ORM, bulk inserts, raw DELETEs) updates it for free.
+"""
+import re
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+FTS_COLUMNS = ("title", "author", "notes", "genre", "collections")
+
+# bm25 column weights, in FTS_COLUMNS order: a title hit outranks a hit in the notes
+BM25_WEIGHTS = (10.0, 5.0, 1.0, 2.0, 3.0)
+
+_COLS = ", ".join(FTS_COLUMNS)
+_NEW = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+_OLD = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        {_COLS},
+        content='books', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, {_COLS}) VALUES (new.rowid, {_NEW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, {_COLS}) VALUES ('delete', old.rowid, {_OLD});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF {_COLS} ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, {_COLS}) VALUES ('delete', old.rowid, {_OLD});
+        INSERT INTO books_fts(rowid, {_COLS}) VALUES (new.rowid, {_NEW});
+    END""",
+]
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_fts(conn: Connection) -> bool:
+    """
+    Create the FTS index and its triggers if missing (books already in the table
+    are not indexed, see index_rows). Returns False when this SQLite build lacks FTS5.
+    """
+    try:
+        for stmt in FTS_DDL:
+            conn.execute(text(stmt))
+    except OperationalError:
+        return False
+    return True
+
+
+def index_rows(conn: Connection, after: int, upto: int):
+    """Index the books with after < rowid <= upto."""
+    conn.execute(
+        text(f"INSERT INTO books_fts(rowid, {_COLS}) SELECT rowid, {_COLS} FROM books "
+             "WHERE rowid > :after AND rowid <= :upto"),
+        {"after": after, "upto": upto},
+    )
+
+
+def rebuild(conn: Connection):
+    """Re-index every book; needed after a VACUUM, which may renumber the books rowids."""
+    conn.execute(text("INSERT INTO books_fts(books_fts) VALUES ('rebuild')"))
+
+
+def build_match(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression: every word must match,
+    as a prefix, so "tolk hob" finds Tolkien's hobbit books while typing.
+    """
+    return " ".join(f'"{t}"*' for t in _TOKEN.findall(query))
+
+
+SEARCH_SQL = text(f"""
+    SELECT b.id, b.title, b.author, b.genre, b.date_finished, b.rating, b.cover_url,
+           snippet(books_fts, -1, :open, :close, '…', 12) AS snippet,
+           bm25(books_fts, {", ".join(map(str, BM25_WEIGHTS))}) AS score
+    FROM books_fts
+    JOIN books b ON b.rowid = books_fts.rowid
+    WHERE books_fts MATCH :match
+    ORDER BY score
+    LIMIT :limit
+""")
+
+
+def search_params(match: str, limit: int, highlight: bool = True) -> dict:
+    return {
+        "match": match,
+        "limit": limit,
+        "open": "<mark>" if highlight else "",
+        "close": "</mark>" if highlight else "",
+    }
+
+
+def rows_to_results(rows) -> List[dict]:
+    return [
+        {
+            "id": r.id,
+            "title": r.title,
+            "author": r.author,
+            "genre": r.genre,
+            "date_finished": r.date_finished,
+            "rating": r.rating,
+            "cover_url": r.cover_url,
+            "snippet": r.snippet,
+            "score": -r.score,   # bm25() is lower-is-better; expose higher-is-better
+        }
+        for r in rows
+    ]
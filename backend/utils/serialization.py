@@ -0,0 +1,121 @@
+"""
+Fast JSON encoding for book lists.
+
+The regular path builds an ORM object per row, turns it into a dict with
+book_to_dict (json.loads on collections and chapters_read), lets FastAPI
+validate every dict against BookResponse and finally re-encodes the lot. Here
+rows arrive as plain tuples and are written straight to JSON: collections and
+chapters_read are already stored as JSON text, so that text is spliced in
+without being decoded.
+
+Two encoders, picked at import time:
+    orjson   when orjson >= 3.9 is installed: one dumps() call per page, with the
+             stored JSON passed through as orjson.Fragment
+    stdlib   otherwise: per-field string building on the C string encoder
+
+The output is the same JSON as the regular path; only the whitespace inside the
+spliced arrays may differ. Compare the paths with:
+
+    python -m benchmarks.serialization
+"""
+import json
+from json.encoder import encode_basestring
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:   # optional speed-up, see requirements.txt
+    orjson = None
+
+_Fragment = getattr(orjson, "Fragment", None)
+
+ENCODER = "orjson" if _Fragment is not None else "stdlib"
+
+# Columns stored as JSON text, and the JSON to emit when the column is NULL/empty
+_JSON_TEXT_DEFAULTS = {"collections": "[]", "chapters_read": "null"}
+
+_NUMERIC = {"pages", "rating", "year_published", "read_count", "total_chapters"}
+
+
+# ─── stdlib encoder ──────────────────────────────────────────────────────────
+
+def _encode_str(value) -> str:
+    return "null" if value is None else encode_basestring(value)
+
+
+def _encode_number(value) -> str:
+    return "null" if value is None else repr(value)   # repr() is what json uses for floats
+
+
+def _encode_bool(value) -> str:
+    return "true" if value else "false"
+
+
+def _splice(default: str) -> Callable:
+    def encode(value) -> str:
+        return value or default
+    return encode
+
+
+def _encoder_for(field: str) -> Callable:
+    if field in _JSON_TEXT_DEFAULTS:
+        return _splice(_JSON_TEXT_DEFAULTS[field])
+    if field == "favorite":
+        return _encode_bool
+    if field in _NUMERIC:
+        return _encode_number
+    return _encode_str
+
+
+_plans: Dict[Tuple[str, ...], List[tuple]] = {}
+
+
+def _plan(fields: Sequence[str]) -> List[tuple]:
+    """(key prefix, encoder) per field, cached per field list."""
+    key = tuple(fields)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = [
+            (("{" if i == 0 else ",") + json.dumps(f) + ":", _encoder_for(f))
+            for i, f in enumerate(fields)
+        ]
+    return plan
+
+
+def _encode_stdlib(rows: Iterable[Sequence], fields: Sequence[str]) -> bytes:
+    plan = _plan(fields)
+    objects = []
+    for row in rows:
+        parts = [prefix + encode(value) for (prefix, encode), value in zip(plan, row)]
+        parts.append("}")
+        objects.append("".join(parts))
+    return ("[" + ",".join(objects) + "]").encode("utf-8")
+
+
+# ─── orjson encoder ──────────────────────────────────────────────────────────
+
+def _encode_orjson(rows: Iterable[Sequence], fields: Sequence[str]) -> bytes:
+    n = len(fields)
+    fixups = [
+        (i, _JSON_TEXT_DEFAULTS[f]) for i, f in enumerate(fields) if f in _JSON_TEXT_DEFAULTS
+    ]
+    favorite = fields.index("favorite") if "favorite" in fields else None
+    objects = []
+    for row in rows:
+        values = list(row[:n])
+        for i, default in fixups:
+            values[i] = _Fragment(values[i] or default)
+        if favorite is not None:
+            values[favorite] = bool(values[favorite])
+        objects.append(dict(zip(fields, values)))
+    return orjson.dumps(objects)
+
+
+def encode_book_rows(rows: Iterable[Sequence], fields: Sequence[str]) -> bytes:
+    """
+    Encode rows whose leading columns are `fields` (in that order) as a JSON
+    array of objects, e.g. the rows of a list_statements() projection.
+    """
+    if _Fragment is not None:
+        return _encode_orjson(rows, list(fields))
+    return _encode_stdlib(rows, fields)
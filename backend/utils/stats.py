@@ -0,0 +1,440 @@
+"""
+Server-side reading statistics.
+
+Mirrors the frontend's statsCalculator / influenceCalculator, but pushes the
+per-book work into SQL GROUP BY queries so only small aggregate payloads leave
+the server. Python only ever loops over groups, never over books.
+"""
+import calendar
+import math
+from collections import defaultdict
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from models import AuthorProfile, Book, BookCollection, StatAggregate
+from utils import aggregates
+from utils.dates import period_start, year_range
+
+# Genre weights - higher = more "influential" intellectually (kept in sync with influenceCalculator.ts)
+GENRE_WEIGHTS: Dict[str, float] = {
+    # High influence - dense, complex, transformative
+    "Philosophy": 1.5, "Filosofía": 1.5,
+    "Classic": 1.5, "Clásico": 1.5, "Classics": 1.5, "Clásicos": 1.5,
+    "History": 1.4, "Historia": 1.4,
+    "Essays": 1.4, "Ensayo": 1.4, "Ensayos": 1.4,
+    # Medium-high influence - challenging, educational
+    "Science": 1.3, "Ciencia": 1.3,
+    "Psychology": 1.3, "Psicología": 1.3,
+    "Biography": 1.3, "Biografía": 1.3,
+    "Politics": 1.3, "Política": 1.3,
+    "Economics": 1.3, "Economía": 1.3,
+    "Sociology": 1.3, "Sociología": 1.3,
+    # Medium influence - literary value
+    "Literary Fiction": 1.2, "Ficción Literaria": 1.2,
+    "Poetry": 1.2, "Poesía": 1.2,
+    "Drama": 1.2, "Theater": 1.2, "Teatro": 1.2,
+    "Memoir": 1.2, "Memorias": 1.2,
+    # Standard influence - good reading
+    "Fiction": 1.0, "Ficción": 1.0,
+    "Novel": 1.0, "Novela": 1.0,
+    "Mystery": 1.0, "Misterio": 1.0,
+    "Thriller": 1.0, "Horror": 1.0, "Terror": 1.0,
+    "Sci-Fi": 1.0, "Science Fiction": 1.0, "Ciencia Ficción": 1.0,
+    "Fantasy": 1.0, "Fantasía": 1.0,
+    "Historical Fiction": 1.0, "Ficción Histórica": 1.0,
+    # Lower influence - lighter reading
+    "Romance": 0.8,
+    "YA": 0.8, "Young Adult": 0.8, "Juvenil": 0.8,
+    "Sports": 0.8, "Deportes": 0.8,
+    "Self-Help": 0.8, "Autoayuda": 0.8,
+    "Comedy": 0.8, "Comedia": 0.8, "Humor": 0.8,
+}
+
+ACADEMIC_TYPES = ("academic", "reference")
+
+# Year / month keys of the normalized finish date (utils.dates), so these views,
+# the timeline and goal progress count the same books
+MONTH_KEY = func.substr(Book.finished_on, 1, 7)
+YEAR_KEY = func.substr(Book.finished_on, 1, 4)
+_DATED = Book.finished_on.isnot(None)
+
+# Per-book rating multiplier used by the influence score
+RATING_MULTIPLIER = case(
+    ((Book.rating.is_(None)) | (Book.rating == 0), 1.0),
+    (Book.rating >= 5, 1.5),
+    (Book.rating >= 4, 1.2),
+    (Book.rating >= 3, 1.0),
+    (Book.rating >= 2, 0.8),
+    else_=0.6,
+)
+
+
+@lru_cache(maxsize=1024)
+def get_genre_weight(genre: str) -> float:
+    """Exact, then case-insensitive, then partial match against GENRE_WEIGHTS; 1.0 otherwise."""
+    if genre in GENRE_WEIGHTS:
+        return GENRE_WEIGHTS[genre]
+    lower = genre.lower()
+    for key, value in GENRE_WEIGHTS.items():
+        if key.lower() == lower:
+            return value
+    for key, value in GENRE_WEIGHTS.items():
+        if lower in key.lower() or key.lower() in lower:
+            return value
+    return 1.0
+
+
+def js_round(value: float) -> int:
+    """Round half up, like JavaScript's Math.round (Python's round() is banker's rounding)."""
+    return int(math.floor(value + 0.5))
+
+
+def build_filters(
+    genre: Optional[str] = None,
+    nationality: Optional[str] = None,
+    reading_type: Optional[str] = None,
+    year: Optional[int] = None,
+    exclude_academic: bool = False,
+) -> list:
+    """Translate the common stats query parameters into SQLAlchemy filter clauses."""
+    filters = []
+    if genre:
+        filters.append(Book.genre == genre)
+    if nationality:
+        filters.append(Book.nationality == nationality)
+    if reading_type:
+        filters.append(Book.reading_type == reading_type)
+    if year is not None:
+        filters.extend(year_range(year))
+    if exclude_academic:
+        filters.append(
+            (Book.reading_type.is_(None)) | (Book.reading_type.notin_(ACADEMIC_TYPES))
+        )
+    return filters
+
+
+def _avg(total: Optional[float], count: int) -> float:
+    return (total or 0) / count if count else 0
+
+
+# ─── Distributions ───────────────────────────────────────────────────────────
+
+def summary(db: Session, filters: list) -> dict:
+    if filters:
+        row = db.query(
+            func.count(Book.id),
+            func.coalesce(func.sum(Book.pages), 0),
+            func.count(func.distinct(Book.author)),
+            func.count(Book.rating),
+            func.sum(Book.rating),
+        ).filter(*filters).one()
+    else:
+        # Unfiltered totals come from the materialized per-author groups
+        row = db.query(
+            func.coalesce(func.sum(StatAggregate.book_count), 0),
+            func.coalesce(func.sum(StatAggregate.page_sum), 0),
+            func.count(StatAggregate.key),
+            func.coalesce(func.sum(StatAggregate.rated_count), 0),
+            func.sum(StatAggregate.rating_sum),
+        ).filter(StatAggregate.dimension == "author").one()
+    total_books, total_pages, unique_authors, rated, rating_sum = row
+    academic = db.query(func.count(Book.id)).filter(
+        *filters, Book.reading_type.in_(ACADEMIC_TYPES)
+    ).scalar()
+
+    def _book_ref(order):
+        b = db.query(Book.id, Book.title, Book.author, Book.pages).filter(*filters).order_by(order).first()
+        return {"id": b.id, "title": b.title, "author": b.author, "pages": b.pages} if b else None
+
+    favorites = db.query(func.count(Book.id)).filter(
+        *filters, (Book.rating == 5) | (Book.favorite.is_(True))
+    ).scalar()
+
+    return {
+        "total_books": total_books,
+        "total_pages": total_pages,
+        "unique_authors": unique_authors,
+        "average_pages": js_round(total_pages / total_books) if total_books else 0,
+        "average_rating": _avg(rating_sum, rated),
+        "complete_books_count": total_books - academic,
+        "academic_books_count": academic,
+        "favorite_books_count": favorites,
+        "longest_book": _book_ref(Book.pages.desc()),
+        "shortest_book": _book_ref(Book.pages.asc()),
+    }
+
+
+def by_genre(db: Session, filters: list) -> List[dict]:
+    if not filters:
+        return [
+            {"genre": g["key"], "count": g["count"], "pages": g["pages"], "average_rating": g["average_rating"]}
+            for g in aggregates.read(db, "genre")
+        ]
+    rows = (
+        db.query(Book.genre, func.count(Book.id), func.sum(Book.pages),
+                 func.count(Book.rating), func.sum(Book.rating))
+        .filter(*filters)
+        .group_by(Book.genre)
+        .order_by(func.count(Book.id).desc())
+        .all()
+    )
+    return [
+        {"genre": g, "count": c, "pages": p or 0, "average_rating": _avg(rs, rc)}
+        for g, c, p, rc, rs in rows
+    ]
+
+
+def by_nationality(db: Session, filters: list) -> List[dict]:
+    # Like the frontend, an author profile's nationality overrides the book's own value
+    nationality = func.coalesce(AuthorProfile.nationality, Book.nationality)
+    rows = (
+        db.query(nationality, func.count(Book.id), func.count(func.distinct(Book.author)),
+                 func.sum(Book.pages))
+        .outerjoin(AuthorProfile, AuthorProfile.name == Book.author)
+        .filter(*filters)
+        .group_by(nationality)
+        .order_by(func.count(Book.id).desc())
+        .all()
+    )
+    return [
+        {"nationality": n, "count": c, "authors": a, "pages": p or 0}
+        for n, c, a, p in rows
+    ]
+
+
+def by_author(db: Session, filters: list, limit: int = 100) -> List[dict]:
+    nationality = func.coalesce(AuthorProfile.nationality, func.min(Book.nationality))
+    rows = (
+        db.query(Book.author, func.count(Book.id), func.sum(Book.pages),
+                 func.count(Book.rating), func.sum(Book.rating), nationality)
+        .outerjoin(AuthorProfile, AuthorProfile.name == Book.author)
+        .filter(*filters)
+        .group_by(Book.author)
+        .order_by(func.count(Book.id).desc(), func.sum(Book.pages).desc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        {"author": a, "count": c, "pages": p or 0, "average_rating": _avg(rs, rc), "nationality": n}
+        for a, c, p, rc, rs, n in rows
+    ]
+
+
+def by_year(db: Session, filters: list) -> List[dict]:
+    if not filters:
+        years = [
+            {"year": int(g["key"]), "count": g["count"], "pages": g["pages"], "average_rating": g["average_rating"]}
+            for g in aggregates.read(db, "year")
+        ]
+        return sorted(years, key=lambda y: y["year"])
+    rows = (
+        db.query(YEAR_KEY, func.count(Book.id), func.sum(Book.pages),
+                 func.count(Book.rating), func.sum(Book.rating))
+        .filter(*filters, _DATED)
+        .group_by(YEAR_KEY)
+        .order_by(YEAR_KEY)
+        .all()
+    )
+    return [
+        {"year": int(y), "count": c, "pages": p or 0, "average_rating": _avg(rs, rc)}
+        for y, c, p, rc, rs in rows
+    ]
+
+
+def by_month(db: Session, filters: list) -> List[dict]:
+    rows = (
+        db.query(MONTH_KEY, func.count(Book.id), func.sum(Book.pages))
+        .filter(*filters, _DATED)
+        .group_by(MONTH_KEY)
+        .order_by(MONTH_KEY)
+        .all()
+    )
+    return [
+        {"year": int(key[:4]), "month": int(key[5:7]), "count": c, "pages": p or 0}
+        for key, c, p in rows
+    ]
+
+
+def rating_distribution(db: Session, filters: list) -> List[dict]:
+    rows = (
+        db.query(Book.rating, func.count(Book.id))
+        .filter(*filters, Book.rating.isnot(None))
+        .group_by(Book.rating)
+        .order_by(Book.rating.desc())
+        .all()
+    )
+    return [{"rating": r, "count": c} for r, c in rows]
+
+
+def by_collection(db: Session, filters: list) -> List[dict]:
+    query = db.query(BookCollection.name, func.count())
+    if filters:
+        query = query.join(Book, Book.id == BookCollection.book_id).filter(*filters)
+    # Unfiltered, this is an index-only scan of ix_book_collections_name
+    rows = query.group_by(BookCollection.name).order_by(func.count().desc(), BookCollection.name).all()
+    return [{"collection": name, "count": c} for name, c in rows]
+
+
+def by_academic_field(db: Session, filters: list) -> List[dict]:
+    field = func.coalesce(Book.academic_field, "Sin categoría")
+    rows = (
+        db.query(field, func.count(Book.id), func.sum(Book.pages))
+        .filter(*filters, Book.reading_type.in_(ACADEMIC_TYPES))
+        .group_by(field)
+        .order_by(func.count(Book.id).desc())
+        .all()
+    )
+    return [{"field": f, "count": c, "pages": p or 0} for f, c, p in rows]
+
+
+# ─── Influence scores ────────────────────────────────────────────────────────
+
+INFLUENCE_DIMENSIONS = {
+    "author": Book.author,
+    "nationality": func.coalesce(func.nullif(Book.nationality, ""), "Unknown"),
+    "genre": Book.genre,
+}
+
+
+def influence(db: Session, dimension: str, filters: list) -> List[dict]:
+    """
+    Weighted influence per author / nationality / genre, same formula as influenceCalculator.ts.
+    One GROUP BY (key, genre) query; genre weights are applied per group afterwards.
+    """
+    key = INFLUENCE_DIMENSIONS[dimension]
+    rows = (
+        db.query(
+            key,
+            Book.genre,
+            func.count(Book.id),
+            func.sum(Book.pages),
+            func.sum(Book.pages * RATING_MULTIPLIER),
+            func.count(Book.rating),
+            func.sum(Book.rating),
+            func.sum(case((Book.rating == 5, 1), else_=0)),
+        )
+        .filter(*filters)
+        .group_by(key, Book.genre)
+        .all()
+    )
+
+    groups: Dict[str, dict] = defaultdict(lambda: {
+        "books": 0, "pages": 0, "weighted": 0.0, "rated": 0, "rating_sum": 0.0,
+        "five_star": 0, "genres": {},
+    })
+    for name, genre, count, pages, rated_pages, rated, rating_sum, five_star in rows:
+        g = groups[name]
+        weight = get_genre_weight(genre)
+        g["books"] += count
+        g["pages"] += pages or 0
+        g["weighted"] += (rated_pages or 0) * weight
+        g["rated"] += rated
+        g["rating_sum"] += rating_sum or 0
+        g["five_star"] += five_star or 0
+        g["genres"][genre] = {"genre": genre, "count": count, "weight": weight}
+
+    scores = []
+    for name, g in groups.items():
+        diversity_bonus = min(0.20, (len(g["genres"]) - 1) * 0.05)
+        favorite_bonus = g["five_star"] * 0.10
+        raw = g["weighted"] * (1 + diversity_bonus + favorite_bonus)
+        top_genres = sorted(g["genres"].values(), key=lambda x: -x["count"])[:5]
+        scores.append({
+            "name": name,
+            "raw_score": raw,
+            "normalized_score": 0,
+            "breakdown": {
+                "books_count": g["books"],
+                "total_pages": g["pages"],
+                "weighted_pages": js_round(g["weighted"]),
+                "avg_rating": _avg(g["rating_sum"], g["rated"]),
+            },
+            "top_genres": top_genres,
+        })
+
+    max_score = max([s["raw_score"] for s in scores] + [1])
+    for s in scores:
+        s["normalized_score"] = js_round(s["raw_score"] / max_score * 100)
+    scores.sort(key=lambda s: -s["normalized_score"])
+    return scores
+
+
+# ─── Timeline and goals ──────────────────────────────────────────────────────
+
+def timeline_statement(filters: list):
+    """Per-day totals in finished_on order: a walk of ix_books_finished_on, no table lookups unfiltered."""
+    return (
+        select(Book.finished_on, func.count(), func.sum(Book.pages),
+               func.count(Book.rating), func.sum(Book.rating))
+        .where(*filters, Book.finished_on.isnot(None))
+        .group_by(Book.finished_on)
+        .order_by(Book.finished_on)
+    )
+
+
+def timeline(db: Session, granularity: str, filters: list) -> List[dict]:
+    """
+    Books, pages and average rating per month or ISO week (Monday start), oldest
+    first; periods without books are left out. SQL groups by day, and only the
+    per-day rows are bucketed here.
+    """
+    rows = db.execute(timeline_statement(filters)).all()
+    periods: Dict[str, list] = {}
+    for day, c, p, rc, rs in rows:
+        totals = periods.setdefault(period_start(day, granularity), [0, 0, 0, 0.0])
+        totals[0] += c
+        totals[1] += p or 0
+        totals[2] += rc
+        totals[3] += rs or 0
+
+    result = []
+    for start, (c, p, rc, rs) in periods.items():
+        d = date.fromisoformat(start)
+        if granularity == "month":
+            label = {"year": d.year, "month": d.month}
+        else:
+            iso_year, week, _ = d.isocalendar()
+            label = {"year": iso_year, "week": week}
+        result.append({"start": start, **label, "count": c, "pages": p, "average_rating": _avg(rs, rc)})
+    return result
+
+
+def goal_progress(db: Session, year: int, target: Optional[int], as_of: date) -> dict:
+    """
+    Books read in `year` against its goal, as the goals widget computes it:
+    on track while no more than 2 books behind the pace of target/365 per day.
+    Without a goal, the target-derived fields are None.
+    """
+    months = {m["month"]: m for m in timeline(db, "month", year_range(year))}
+    monthly, books, pages = [], 0, 0
+    for month in range(1, 13):
+        m = months.get(month, {"count": 0, "pages": 0})
+        books += m["count"]
+        pages += m["pages"]
+        monthly.append({"month": month, "count": m["count"], "pages": m["pages"], "cumulative": books})
+
+    days_in_year = 366 if calendar.isleap(year) else 365
+    if as_of.year < year:
+        elapsed = 0
+    elif as_of.year > year:
+        elapsed = days_in_year
+    else:
+        elapsed = as_of.timetuple().tm_yday
+    expected = elapsed / days_in_year * target if target else None
+    return {
+        "year": year,
+        "target_books": target,
+        "books_read": books,
+        "pages_read": pages,
+        "books_remaining": max(0, target - books) if target else None,
+        "percent": books / target * 100 if target else None,
+        "expected_books": expected,
+        "ahead_by": books - expected if expected is not None else None,
+        "on_track": books - expected >= -2 if expected is not None else None,
+        "as_of": as_of.isoformat(),
+        "monthly": monthly,
+    }
@@ -0,0 +1,134 @@
+"""
+Incremental encoders for the export endpoints.
+
+Each helper yields encoded chunks of roughly `batch_size` rows, so a
+StreamingResponse can start sending before the query is exhausted and memory
+stays flat regardless of library size. The encoder classes work on one batch
+at a time, so the sync and async export routers share the same formatting.
+"""
+import csv
+import io
+import json
+import zlib
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, Sequence, Union
+
+BATCH_SIZE = 500
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+class JsonArrayEncoder:
+    """
+    Encodes a JSON array batch by batch, formatted exactly like
+    json.dumps(list, ensure_ascii=False, indent=2) nested `level` levels deep.
+    """
+
+    def __init__(self, level: int = 0):
+        self.outer = "  " * level
+        self.inner = self.outer + "  "
+        self.first = True
+
+    def encode(self, items: Iterable[dict]) -> str:
+        parts = []
+        for item in items:
+            encoded = json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n" + self.inner)
+            parts.append(("[\n" if self.first else ",\n") + self.inner + encoded)
+            self.first = False
+        return "".join(parts)
+
+    def close(self) -> str:
+        return "[]" if self.first else "\n" + self.outer + "]"
+
+
+class CsvEncoder:
+    """Encodes CSV rows batch by batch with the csv module's quoting rules."""
+
+    def __init__(self):
+        self.output = io.StringIO()
+        self.writer = csv.writer(self.output)
+
+    def encode(self, rows: Iterable[Sequence]) -> str:
+        self.writer.writerows(rows)
+        text = self.output.getvalue()
+        self.output.seek(0)
+        self.output.truncate(0)
+        return text
+
+
+def json_array_chunks(items: Iterable[dict], level: int = 0, batch_size: int = BATCH_SIZE) -> Iterator[str]:
+    encoder = JsonArrayEncoder(level)
+    for batch in batched(items, batch_size):
+        yield encoder.encode(batch)
+    yield encoder.close()
+
+
+def csv_chunks(header: Sequence[str], rows: Iterable[Sequence], batch_size: int = BATCH_SIZE) -> Iterator[str]:
+    encoder = CsvEncoder()
+    yield encoder.encode([header])
+    for batch in batched(rows, batch_size):
+        yield encoder.encode(batch)
+
+
+Chunks = Union[Iterable, AsyncIterator]
+
+
+def encode_chunks(chunks: Chunks, encoding: str = "utf-8") -> Chunks:
+    """Encode text chunks (sync or async); 'utf-8-sig' emits the BOM once, up front."""
+    bom = encoding == "utf-8-sig"
+    encoding = "utf-8" if bom else encoding
+    if hasattr(chunks, "__aiter__"):
+        return _aencode(chunks, encoding, bom)
+    return _encode(chunks, encoding, bom)
+
+
+def _encode(chunks, encoding, bom):
+    if bom:
+        yield "\ufeff".encode("utf-8")
+    for chunk in chunks:
+        if chunk:
+            yield chunk.encode(encoding)
+
+
+async def _aencode(chunks, encoding, bom):
+    if bom:
+        yield "\ufeff".encode("utf-8")
+    async for chunk in chunks:
+        if chunk:
+            yield chunk.encode(encoding)
+
+
+def gzip_chunks(chunks: Chunks, level: int = 6) -> Chunks:
+    """Compress a byte stream (sync or async) on the fly into a single gzip member."""
+    if hasattr(chunks, "__aiter__"):
+        return _agzip(chunks, level)
+    return _gzip(chunks, level)
+
+
+def _gzip(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 → gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def _agzip(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    return any(
+        part.split(";")[0].strip() == "gzip" and not part.replace(" ", "").endswith(";q=0")
+        for part in (accept_encoding or "").split(",")
+    )
@@ -0,0 +1,298 @@
+"""
+Multi-tenant mode (BOOKTRACKER_TENANCY=multi): one SQLite file per tenant.
+
+Each tenant's books live in BOOKTRACKER_TENANT_DIR/<tenant>.db, a shard with
+its own write lock, so one tenant's import never blocks another's writes.
+TenantMiddleware reads the tenant from the BOOKTRACKER_TENANT_HEADER header
+(X-Tenant-ID), or from ?tenant= where a browser cannot send headers
+(EventSource, download links), and keeps it in a context variable that
+follows the request into the threadpool. database.get_db / open_session then
+route to that tenant's shard.
+
+ShardRouter keeps at most BOOKTRACKER_TENANT_MAX_ENGINES shard engines open,
+least recently used first out. A shard is created and migrated the first time
+it is opened in the process; reopening after eviction costs one query.
+Disposing an evicted engine closes its idle connections only: sessions still
+using it finish normally.
+
+fan_out() runs a function on every shard in a thread pool, for cross-tenant
+admin aggregates (/api/admin) and maintenance such as change-log compaction.
+Shards that are not open are visited through a short-lived engine instead of
+the LRU, so a fan-out does not evict the engines of active tenants.
+
+The maintenance CLIs work on one database; point them at a shard with
+BOOKTRACKER_DATABASE_URL=sqlite:///tenants/<tenant>.db.
+"""
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from starlette.datastructures import MutableHeaders
+
+from config import (
+    DB_MODE,
+    SQLITE_PRAGMAS,
+    TENANT_DIR,
+    TENANT_FANOUT_WORKERS,
+    TENANT_HEADER,
+    TENANT_MAX_ENGINES,
+    TENANT_POOL_MAX_OVERFLOW,
+    TENANT_POOL_SIZE,
+)
+from database import apply_sqlite_pragmas, create_sqlite_engine
+
+T = TypeVar("T")
+
+# Lower-case, so the file name is the same on case-insensitive file systems
+TENANT_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+# Paths served without a tenant: no tenant data behind them
+PUBLIC_PATHS = ("/api/health", "/api/metrics", "/api/assets/", "/api/admin", "/docs", "/redoc", "/openapi.json")
+
+_tenant: ContextVar[Optional[str]] = ContextVar("tenant", default=None)
+
+
+def current_tenant() -> Optional[str]:
+    return _tenant.get()
+
+
+@contextmanager
+def tenant_context(tenant: Optional[str]) -> Iterator[None]:
+    """Route database access to `tenant`'s shard outside a request, e.g. in a background job."""
+    token = _tenant.set(tenant)
+    try:
+        yield
+    finally:
+        _tenant.reset(token)
+
+
+def shard_path(tenant: str) -> str:
+    return os.path.join(TENANT_DIR, f"{tenant}.db")
+
+
+def list_tenants() -> List[str]:
+    """Tenants with a shard file, sorted."""
+    if not os.path.isdir(TENANT_DIR):
+        return []
+    return sorted(
+        name[:-3] for name in os.listdir(TENANT_DIR)
+        if name.endswith(".db") and TENANT_ID.match(name[:-3])
+    )
+
+
+# ─── Shards ──────────────────────────────────────────────────────────────────
+
+class Shard:
+    def __init__(self, tenant: str, engine: Engine, async_engine=None):
+        self.tenant = tenant
+        self.engine = engine
+        self.sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.async_engine = async_engine
+        self.async_sessions = None
+        if async_engine is not None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker
+            self.async_sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    def close(self):
+        self.engine.dispose()
+        if self.async_engine is not None:
+            self.async_engine.sync_engine.dispose()   # NullPool: no connections to close
+
+
+def _open_engine(path: str, pooled: bool) -> Engine:
+    if pooled:
+        return create_sqlite_engine(f"sqlite:///{path}", pool_size=TENANT_POOL_SIZE,
+                                    max_overflow=TENANT_POOL_MAX_OVERFLOW)
+    return create_sqlite_engine(f"sqlite:///{path}", poolclass=NullPool)   # short fan-out visit
+
+
+def _migrate(engine: Engine):
+    from migrations import migrate
+    migrate(engine)
+
+
+class ShardRouter:
+    def __init__(self, max_open: int = TENANT_MAX_ENGINES):
+        self.max_open = max_open
+        self.opened = 0
+        self.evicted = 0
+        self._shards: "OrderedDict[str, Shard]" = OrderedDict()
+        self._opening: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant: str) -> Shard:
+        with self._lock:
+            shard = self._shards.get(tenant)
+            if shard is not None:
+                self._shards.move_to_end(tenant)
+                return shard
+            opening = self._opening.setdefault(tenant, threading.Lock())
+
+        # One thread creates and migrates the shard; others for the same tenant wait,
+        # requests for other tenants go on
+        with opening:
+            with self._lock:
+                shard = self._shards.get(tenant)
+            if shard is not None:
+                return shard
+            shard = self._open(tenant)
+            with self._lock:
+                self._shards[tenant] = shard
+                self._opening.pop(tenant, None)
+                self.opened += 1
+                evicted = []
+                while len(self._shards) > self.max_open:
+                    evicted.append(self._shards.popitem(last=False)[1])
+                self.evicted += len(evicted)
+        for old in evicted:
+            old.close()
+        return shard
+
+    def _open(self, tenant: str) -> Shard:
+        os.makedirs(TENANT_DIR, exist_ok=True)
+        path = shard_path(tenant)
+        engine = _open_engine(path, pooled=True)
+        _migrate(engine)
+        async_engine = None
+        if DB_MODE == "async":
+            from sqlalchemy.ext.asyncio import create_async_engine
+
+            # NullPool: an evicted engine has no aiosqlite connections (and threads) to close
+            async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+            apply_sqlite_pragmas(async_engine.sync_engine, SQLITE_PRAGMAS)
+        return Shard(tenant, engine, async_engine)
+
+    def peek(self, tenant: str) -> Optional[Shard]:
+        """The open shard of the tenant, without touching the LRU order."""
+        with self._lock:
+            return self._shards.get(tenant)
+
+    def close_all(self):
+        with self._lock:
+            shards = list(self._shards.values())
+            self._shards.clear()
+        for shard in shards:
+            shard.close()
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "open": len(self._shards),
+                "max_open": self.max_open,
+                "opened": self.opened,
+                "evicted": self.evicted,
+            }
+
+
+shards = ShardRouter()
+
+
+def current_shard() -> Shard:
+    tenant = _tenant.get()
+    if tenant is None:
+        raise HTTPException(status_code=400, detail=f"Missing {TENANT_HEADER} header")
+    return shards.get(tenant)
+
+
+# ─── Cross-tenant fan-out ────────────────────────────────────────────────────
+
+@contextmanager
+def borrow(tenant: str) -> Iterator[Engine]:
+    """An engine on the tenant's shard: the open one, or a temporary one outside the LRU."""
+    shard = shards.peek(tenant)
+    if shard is not None:
+        yield shard.engine
+        return
+    engine = _open_engine(shard_path(tenant), pooled=False)
+    try:
+        _migrate(engine)   # shards not opened since an upgrade may be behind
+        yield engine
+    finally:
+        engine.dispose()
+
+
+def fan_out(
+    fn: Callable[[Connection], T],
+    tenants: Optional[List[str]] = None,
+    workers: int = TENANT_FANOUT_WORKERS,
+) -> Tuple[Dict[str, T], Dict[str, str]]:
+    """
+    Run fn(conn) in a transaction on each tenant's shard (default: all of them),
+    `workers` shards at a time. Returns ({tenant: result}, {tenant: error}).
+    """
+    def visit(tenant: str) -> T:
+        with borrow(tenant) as engine, engine.begin() as conn:
+            return fn(conn)
+
+    tenants = list_tenants() if tenants is None else tenants
+    results: Dict[str, T] = {}
+    errors: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="tenant-fan-out") as pool:
+        futures = {tenant: pool.submit(visit, tenant) for tenant in tenants}
+        for tenant, future in futures.items():
+            try:
+                results[tenant] = future.result()
+            except Exception as exc:
+                errors[tenant] = f"{type(exc).__name__}: {exc}"
+    return results, errors
+
+
+# ─── Middleware ──────────────────────────────────────────────────────────────
+
+def _error(status: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    return [
+        {"type": "http.response.start", "status": status,
+         "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]},
+        {"type": "http.response.body", "body": body},
+    ]
+
+
+def resolve_tenant(scope) -> Optional[str]:
+    """The tenant named by the request's header, else its ?tenant= parameter (lower-cased)."""
+    header = TENANT_HEADER.lower().encode()
+    for name, value in scope.get("headers", ()):
+        if name == header:
+            return value.decode("latin-1").strip().lower()
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("tenant")
+    return values[0].strip().lower() if values else None
+
+
+class TenantMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(PUBLIC_PATHS) or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        tenant = resolve_tenant(scope)
+        if not tenant or not TENANT_ID.match(tenant):
+            detail = (f"Invalid tenant {tenant!r}: use 1-64 of a-z, 0-9, '_' and '-'" if tenant
+                      else f"Missing {TENANT_HEADER} header (or ?tenant=)")
+            for message in _error(400, detail):
+                await send(message)
+            return
+
+        async def send_with_vary(message):
+            # Browser caches must not hand one tenant's response to another
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).add_vary_header(TENANT_HEADER)
+            await send(message)
+
+        token = _tenant.set(tenant)
+        try:
+            await self.app(scope, receive, send_with_vary)
+        finally:
+            _tenant.reset(token)
@@ -0,0 +1,89 @@
+"""
+Per-table data versions for conditional GETs.
+
+Every write path calls bump() for the tables it touches, inside the same
+transaction as the write, and the read endpoints derive a strong ETag from the
+current version. A client that sends the ETag back in If-None-Match gets a bare
+304 without the rows being queried or serialized.
+
+Versions are seeded from the clock, so a recreated database never reuses an
+ETag a client may still hold for the old one.
+"""
+import time
+from typing import Optional
+
+from fastapi import Response
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from models import DataVersion
+
+BOOKS = "books"
+AUTHORS = "author_profiles"
+GOALS = "reading_goals"
+HALL_OF_FAME = "hall_of_fame"
+
+TABLES = (BOOKS, AUTHORS, GOALS, HALL_OF_FAME)
+
+# Session.info key under which bump() records the tables written in the
+# current transaction (read by the response cache after commit)
+BUMPED_KEY = "bumped_tables"
+
+
+def _seed() -> int:
+    return int(time.time() * 1000)
+
+
+def bump(db: Session, *tables: str):
+    """Advance the version of each table; call before the commit of the write."""
+    db.info.setdefault(BUMPED_KEY, set()).update(tables)
+    for table in tables:
+        stmt = insert(DataVersion).values(table_name=table, version=_seed())
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[DataVersion.table_name],
+            set_={"version": DataVersion.version + 1},
+        ))
+
+
+def ensure_seeded(db: Session):
+    """Give every table a version so reads have an ETag before the first write."""
+    stmt = insert(DataVersion).values([{"table_name": t, "version": _seed()} for t in TABLES])
+    db.execute(stmt.on_conflict_do_nothing(index_elements=[DataVersion.table_name]))
+
+
+def current_etag(db: Session, *tables: str) -> str:
+    """Strong ETag covering the given tables. Read it before the data, never after."""
+    rows = dict(db.execute(
+        select(DataVersion.table_name, DataVersion.version).where(DataVersion.table_name.in_(tables))
+    ).all())
+    return '"' + "-".join(f"{rows.get(t, 0):x}" for t in tables) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def validator_headers(etag: str) -> dict:
+    # no-cache: clients may store the body but must revalidate it every time
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def not_modified(etag: str, if_none_match: Optional[str], response: Response) -> Optional[Response]:
+    """
+    Return a 304 response when the client already holds `etag`; otherwise tag
+    `response` and return None so the endpoint goes on to build the body.
+    """
+    headers = validator_headers(etag)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
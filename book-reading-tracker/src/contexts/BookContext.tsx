@@ -11,6 +11,7 @@ import type { ReactNode } from 'react';
 import type { Reading, AuthorProfile, Stats, ReadingGoal } from '../types';
 import { calculateStats } from '../utils/statsCalculator';
 import { api } from '../utils/api';
+import type { SyncDelta } from '../utils/api';
 import { storage } from '../utils/storage';
 
 interface BookContextType {
@@ -50,6 +51,8 @@ export function BookProvider({ children }: { children: ReactNode }) {
 
   // Keep a ref so callbacks can read the latest value without stale closures
   const backendRef = useRef(false);
+  // Last change-log seq reflected in the state (see "Live updates" below)
+  const syncSeqRef = useRef(0);
   useEffect(() => {
     backendRef.current = backendAvailable;
   }, [backendAvailable]);
@@ -65,6 +68,8 @@ export function BookProvider({ children }: { children: ReactNode }) {
 
         if (available) {
           const currentYear = new Date().getFullYear();
+          // Read before the lists: changes made meanwhile are replayed by the live sync
+          syncSeqRef.current = await api.sync.head();
           const [apiBooks, apiProfiles, apiGoal] = await Promise.all([
             api.books.list(),
             api.authors.list(),
@@ -159,6 +164,94 @@ export function BookProvider({ children }: { children: ReactNode }) {
     }
   }, [authorProfiles, isLoading]);
 
+  // ─── Live updates ─────────────────────────────────────────────────────────
+  // Writes from other tabs and devices arrive as server-sent events carrying the
+  // change-log seq; only the rows changed since the last seq are fetched.
+
+  const applyDelta = useCallback((delta: SyncDelta) => {
+    if (delta.books.upserted.length || delta.books.deleted.length) {
+      setReadings(prev => {
+        const updates = new Map(delta.books.upserted.map(b => [b.id, b]));
+        const deleted = new Set(delta.books.deleted);
+        const next = prev
+          .filter(r => !deleted.has(r.id))
+          .map(r => {
+            const updated = updates.get(r.id);
+            updates.delete(r.id);
+            return updated ?? r;
+          });
+        return [...next, ...updates.values()];
+      });
+    }
+    if (delta.authors.upserted.length || delta.authors.deleted.length) {
+      setAuthorProfiles(prev => {
+        const next = new Map(prev);
+        delta.authors.deleted.forEach(name => next.delete(name));
+        delta.authors.upserted.forEach(p => next.set(p.name, p));
+        return next;
+      });
+    }
+    const currentYear = new Date().getFullYear();
+    const goal = delta.goals.upserted.find(g => g.year === currentYear);
+    if (goal) setReadingGoalState(goal);
+  }, []);
+
+  useEffect(() => {
+    if (!backendAvailable || isLoading) return;
+    let pulling = false;
+    let again = false;
+
+    // The server no longer covers our seq: rebuild the state from a full sync
+    const resync = async () => {
+      const books = new Map<string, Reading>();
+      const profiles = new Map<string, AuthorProfile>();
+      let delta: SyncDelta;
+      let since = 0;
+      do {
+        delta = await api.sync.changes(since);
+        delta.books.upserted.forEach(b => books.set(b.id, b));
+        delta.books.deleted.forEach(id => books.delete(id));
+        delta.authors.upserted.forEach(p => profiles.set(p.name, p));
+        delta.authors.deleted.forEach(name => profiles.delete(name));
+        since = delta.seq;
+      } while (delta.more);
+      setReadings(Array.from(books.values()));
+      setAuthorProfiles(profiles);
+      syncSeqRef.current = since;
+    };
+
+    const pull = async () => {
+      if (pulling) {
+        again = true;
+        return;
+      }
+      pulling = true;
+      try {
+        do {
+          again = false;
+          let delta: SyncDelta;
+          do {
+            delta = await api.sync.changes(syncSeqRef.current);
+            if (delta.reset) {
+              await resync();
+              break;
+            }
+            applyDelta(delta);
+            syncSeqRef.current = delta.seq;
+          } while (delta.more);
+        } while (again);
+      } catch (err) {
+        console.error('Failed to sync changes from backend:', err);
+      } finally {
+        pulling = false;
+      }
+    };
+
+    return api.sync.subscribe(seq => {
+      if (seq !== syncSeqRef.current) pull();
+    });
+  }, [backendAvailable, isLoading, applyDelta]);
+
   // ─── Stats (computed, not stored) ─────────────────────────────────────────
   const stats = calculateStats(readings, authorProfiles);
 
@@ -177,7 +270,15 @@ export function BookProvider({ children }: { children: ReactNode }) {
 
       // Persist to backend (fire-and-forget)
       if (backendRef.current) {
-        api.books.create(reading).catch(err => {
+        api.books
+          .create(reading)
+          // Swap the temporary id for the server's (the live sync may already have added that row)
+          .then(saved =>
+            setReadings(prev =>
+              prev.filter(r => r.id !== saved.id).map(r => (r.id === newReading.id ? saved : r)),
+            ),
+          )
+          .catch(err => {
           console.error('Failed to persist book to backend:', err);
           setSyncError('Error syncing with server — changes saved locally');
         });
@@ -11,6 +11,30 @@ import type { HallOfFameData } from '../types/hallOfFame';
 
 const API_BASE = (import.meta.env.VITE_API_URL as string | undefined) ?? 'http://localhost:8000/api';
 
+// Multi-tenant backends (BOOKTRACKER_TENANCY=multi) keep one library per tenant,
+// named by the X-Tenant-ID header, or ?tenant= where no header can be sent
+// (EventSource, download links). Unset on a single-tenant backend.
+const TENANT = (import.meta.env.VITE_TENANT_ID as string | undefined)
+  ?? localStorage.getItem('booktracker_tenant') ?? undefined;
+const TENANT_HEADERS: Record<string, string> = TENANT ? { 'X-Tenant-ID': TENANT } : {};
+
+function withTenant(url: string): string {
+  return TENANT ? `${url}${url.includes('?') ? '&' : '?'}tenant=${encodeURIComponent(TENANT)}` : url;
+}
+
+// Uploaded / extracted images are stored server-side and referenced as
+// "/api/assets/<hash>.<ext>", a path on the API server rather than this page.
+const API_ORIGIN = new URL(API_BASE, window.location.href).origin;
+const ASSET_PATH = '/api/assets/';
+
+function resolveAsset(url: string | undefined): string | undefined {
+  return url?.startsWith(ASSET_PATH) ? API_ORIGIN + url : url;
+}
+
+function unresolveAsset(url: string | undefined): string | undefined {
+  return url?.startsWith(API_ORIGIN + ASSET_PATH) ? url.slice(API_ORIGIN.length) : url;
+}
+
 // ─── Field-name mapping ──────────────────────────────────────────────────────
 
 /** Convert a frontend Reading object → backend snake_case payload */
@@ -29,7 +53,7 @@ function toPayload(r: Reading | Omit<Reading, 'id' | 'parsedDate'>) {
     isbn: r.isbn,
     year_published: r.yearPublished,
     read_count: r.readCount,
-    cover_url: r.coverUrl,
+    cover_url: unresolveAsset(r.coverUrl),
     notes: r.notes,
     start_date: r.startDate,
     favorite: r.favorite ?? false,
@@ -60,7 +84,7 @@ function fromPayload(p: any): Reading {
     isbn: p.isbn,
     yearPublished: p.year_published,
     readCount: p.read_count,
-    coverUrl: p.cover_url,
+    coverUrl: resolveAsset(p.cover_url),
     notes: p.notes,
     startDate: p.start_date,
     favorite: p.favorite ?? false,
@@ -105,8 +129,8 @@ async function apiFetch<T>(
   options: RequestInit = {},
 ): Promise<T> {
   const res = await fetch(`${API_BASE}${path}`, {
-    headers: { 'Content-Type': 'application/json', ...options.headers },
     ...options,
+    headers: { 'Content-Type': 'application/json', ...TENANT_HEADERS, ...options.headers },
   });
   if (!res.ok) {
     const text = await res.text().catch(() => res.statusText);
@@ -117,6 +141,72 @@ async function apiFetch<T>(
   return text ? (JSON.parse(text) as T) : ({} as T);
 }
 
+/**
+ * Fetch every page of a keyset-paginated list endpoint, following the
+ * X-Next-Cursor response header until the server stops sending it.
+ */
+async function apiFetchAllPages<T>(path: string, pageSize = 1000): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const params = new URLSearchParams({ limit: String(pageSize) });
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetch(`${API_BASE}${path}?${params}`, {
+      headers: { 'Content-Type': 'application/json', ...TENANT_HEADERS },
+    });
+    if (!res.ok) {
+      const text = await res.text().catch(() => res.statusText);
+      throw new Error(`API GET ${path} → ${res.status}: ${text}`);
+    }
+    items.push(...((await res.json()) as T[]));
+    cursor = res.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return items;
+}
+
+// ─── Delta sync ───────────────────────────────────────────────────────────────
+
+export interface SyncChanges<T> {
+  upserted: T[];
+  deleted: string[];
+}
+
+/** One page of /api/sync, converted to frontend types. */
+export interface SyncDelta {
+  seq: number;
+  /** The server no longer covers the requested seq: reload everything. */
+  reset: boolean;
+  more: boolean;
+  books: SyncChanges<Reading>;
+  authors: SyncChanges<AuthorProfile>;
+  goals: SyncChanges<ReadingGoal>;
+  /** Hall of Fame entries as stored ({ section, key, position, value }); deleted keys are "section/key". */
+  // eslint-disable-next-line @typescript-eslint/no-explicit-any
+  hallOfFame: SyncChanges<any>;
+}
+
+// eslint-disable-next-line @typescript-eslint/no-explicit-any
+function syncFromPayload(p: any): SyncDelta {
+  const changes = p.changes ?? {};
+  const empty = { upserted: [], deleted: [] };
+  const books = changes.books ?? empty;
+  const authors = changes.authors ?? empty;
+  const goals = changes.goals ?? empty;
+  return {
+    seq: p.seq,
+    reset: p.reset,
+    more: p.more,
+    books: { upserted: books.upserted.map(fromPayload), deleted: books.deleted },
+    authors: { upserted: authors.upserted.map(profileFromPayload), deleted: authors.deleted },
+    goals: {
+      // eslint-disable-next-line @typescript-eslint/no-explicit-any
+      upserted: goals.upserted.map((g: any) => ({ year: g.year, targetBooks: g.target_books })),
+      deleted: goals.deleted,
+    },
+    hallOfFame: changes.hall_of_fame ?? empty,
+  };
+}
+
 // ─── Public API surface ───────────────────────────────────────────────────────
 
 export const api = {
@@ -132,10 +222,18 @@ export const api = {
 
   books: {
     list: async (): Promise<Reading[]> => {
-      const data = await apiFetch<unknown[]>('/books/');
+      const data = await apiFetchAllPages<unknown>('/books/');
       return data.map(fromPayload);
     },
 
+    /** Full-text search (title, author, notes, genre, collections), best matches first. */
+    search: async (
+      q: string,
+      limit = 20,
+    ): Promise<Array<{ id: string; title: string; author: string; genre: string; snippet: string; score: number }>> => {
+      return apiFetch(`/books/search?${new URLSearchParams({ q, limit: String(limit) })}`);
+    },
+
     create: async (book: Omit<Reading, 'id' | 'parsedDate'>): Promise<Reading> => {
       const data = await apiFetch<unknown>('/books/', {
         method: 'POST',
@@ -152,6 +250,43 @@ export const api = {
       return fromPayload(data);
     },
 
+    /** Update only the given fields (snake_case keys, as in the backend schema). */
+    patch: async (id: string, changes: Record<string, unknown>): Promise<Reading> => {
+      const data = await apiFetch<unknown>(`/books/${id}`, {
+        method: 'PATCH',
+        body: JSON.stringify(changes),
+      });
+      return fromPayload(data);
+    },
+
+    /**
+     * Apply many creates / patches / deletes in one request and one transaction.
+     * With atomic=true nothing is written unless every operation succeeds.
+     */
+    batch: async (
+      operations: Array<
+        | { op: 'create'; book: Omit<Reading, 'id' | 'parsedDate'> }
+        | { op: 'patch'; id: string; changes: Record<string, unknown> }
+        | { op: 'delete'; id: string }
+      >,
+      atomic = false,
+    ): Promise<{
+      committed: boolean;
+      created: number;
+      updated: number;
+      deleted: number;
+      failed: number;
+      results: Array<{ index: number; op: string; id: string | null; status: string }>;
+    }> => {
+      return apiFetch('/books/batch', {
+        method: 'POST',
+        body: JSON.stringify({
+          atomic,
+          operations: operations.map((o) => (o.op === 'create' ? { op: 'create', book: toPayload(o.book) } : o)),
+        }),
+      });
+    },
+
     delete: async (id: string): Promise<void> => {
       await apiFetch(`/books/${id}`, { method: 'DELETE' });
     },
@@ -176,6 +311,38 @@ export const api = {
     },
   },
 
+  assets: {
+    /** Store an image file; returns the URL to use as a cover or author photo. */
+    upload: async (file: Blob): Promise<string> => {
+      const res = await apiFetch<{ url: string }>('/assets/', {
+        method: 'POST',
+        headers: { 'Content-Type': file.type || 'application/octet-stream' },
+        body: file,
+      });
+      return resolveAsset(res.url) ?? res.url;
+    },
+  },
+
+  sagas: {
+    /**
+     * Sagas (non-academic books) with influence scores. Unfiltered, the precomputed
+     * table is served; with dashboard filters the stored saga keys are grouped server-side.
+     */
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    list: async (filters: Record<string, string> = {}): Promise<any> => {
+      return apiFetch(`/sagas/?${new URLSearchParams(filters)}`);
+    },
+  },
+
+  collections: {
+    /** Every collection with its book count; books of one: books.list filtered server-side via ?collection=. */
+    list: async (): Promise<
+      Array<{ name: string; book_count: number; pages: number; first_finished: string | null; last_finished: string | null }>
+    > => {
+      return apiFetch('/collections/');
+    },
+  },
+
   goals: {
     get: async (year: number): Promise<ReadingGoal | null> => {
       try {
@@ -192,6 +359,12 @@ export const api = {
         body: JSON.stringify({ year: goal.year, target_books: goal.targetBooks }),
       });
     },
+
+    /** Books read in the year against its goal, with the monthly breakdown (snake_case). */
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    progress: async (year: number): Promise<any> => {
+      return apiFetch(`/goals/${year}/progress`);
+    },
   },
 
   import: {
@@ -214,27 +387,110 @@ export const api = {
 
   export: {
     /** Opens the server-side JSON download in a new tab. */
-    json: () => window.open(`${API_BASE}/export/json`, '_blank'),
+    json: () => window.open(withTenant(`${API_BASE}/export/json`), '_blank'),
     /** Opens the server-side CSV download in a new tab. */
-    csv: () => window.open(`${API_BASE}/export/csv`, '_blank'),
+    csv: () => window.open(withTenant(`${API_BASE}/export/csv`), '_blank'),
     /** Opens the full backup JSON download (books + authors + goals). */
-    backup: () => window.open(`${API_BASE}/export/backup`, '_blank'),
+    backup: () => window.open(withTenant(`${API_BASE}/export/backup`), '_blank'),
+  },
+
+  jobs: {
+    /** Queue an export server-side; poll `get` until it succeeds, then `download`. */
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    export: async (kind: 'json' | 'csv' | 'backup', gzip = false): Promise<any> => {
+      return apiFetch(`/jobs/export/${kind}?gzip=${gzip}`, { method: 'POST' });
+    },
+    /** Status, progress and result of a job (snake_case). */
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    get: async (id: string): Promise<any> => {
+      return apiFetch(`/jobs/${id}`);
+    },
+    /** Cancel a queued or running job. */
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    cancel: async (id: string): Promise<any> => {
+      return apiFetch(`/jobs/${id}`, { method: 'DELETE' });
+    },
+    /** Opens the file a finished export job produced. */
+    download: (id: string) => window.open(withTenant(`${API_BASE}/jobs/${id}/result`), '_blank'),
+  },
+
+  stats: {
+    /** Server-computed dashboard aggregates (snake_case, as returned by /api/stats). */
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    all: async (filters: Record<string, string> = {}): Promise<any> => {
+      return apiFetch(`/stats/?${new URLSearchParams(filters)}`);
+    },
+    /** Books and pages per month or ISO week (from the normalized finish dates), oldest first. */
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    timeline: async (granularity: 'month' | 'week' = 'month', filters: Record<string, string> = {}): Promise<any[]> => {
+      return apiFetch(`/stats/timeline?${new URLSearchParams({ ...filters, granularity })}`);
+    },
+    /** Influence ranking for one dimension; academic/reference books are excluded by default. */
+    // eslint-disable-next-line @typescript-eslint/no-explicit-any
+    influence: async (dimension: 'author' | 'nationality' | 'genre'): Promise<any[]> => {
+      return apiFetch(`/stats/influence/${dimension}`);
+    },
+  },
+
+  sync: {
+    /** Change log position; read it before a full load and sync from there. */
+    head: async (): Promise<number> => {
+      return (await apiFetch<{ seq: number }>('/sync/head')).seq;
+    },
+    /** Rows changed after `since` (0 = everything). Call again with `seq` while `more` is true. */
+    changes: async (since: number, limit = 1000): Promise<SyncDelta> => {
+      return syncFromPayload(await apiFetch(`/sync/?since=${since}&limit=${limit}`));
+    },
+    /**
+     * Server-sent events with the change log's head seq, pushed after every write
+     * (from any tab or device). Returns a function that closes the stream.
+     */
+    subscribe: (onChange: (seq: number) => void): (() => void) => {
+      const source = new EventSource(withTenant(`${API_BASE}/sync/events`));
+      source.addEventListener('change', e => onChange(JSON.parse((e as MessageEvent).data).seq));
+      return () => source.close();
+    },
   },
 
   hallOfFame: {
     get: async (): Promise<HallOfFameData | null> => {
       try {
         const res = await apiFetch<{ data: HallOfFameData }>('/hall-of-fame/');
-        return res.data;
+        const photos = Object.entries(res.data.authorPhotos ?? {}).map(([author, url]) => [author, resolveAsset(url) ?? url]);
+        return { ...res.data, authorPhotos: Object.fromEntries(photos) };
       } catch {
         return null;
       }
     },
     set: async (data: HallOfFameData): Promise<void> => {
+      const photos = Object.entries(data.authorPhotos ?? {}).map(([author, url]) => [author, unresolveAsset(url) ?? url]);
       await apiFetch('/hall-of-fame/', {
         method: 'PUT',
-        body: JSON.stringify({ data }),
+        body: JSON.stringify({ data: { ...data, authorPhotos: Object.fromEntries(photos) } }),
+      });
+    },
+    /** JSON Patch (RFC 6902) against the document; only the sections it names are read and written. */
+    patch: async (
+      operations: Array<{ op: 'add' | 'remove' | 'replace' | 'move' | 'copy' | 'test'; path: string; value?: unknown; from?: string }>,
+    ): Promise<{ sections: string[]; rows_written: number }> => {
+      return apiFetch('/hall-of-fame/', {
+        method: 'PATCH',
+        body: JSON.stringify(operations),
+      });
+    },
+    /**
+     * Create or replace one entry. Keys: badges `${bookId}/${badgeId}`, nominations
+     * `${categoryId}/${bookId}`, annualAwards `${year}/${type}`, categories and rankings
+     * their id, authorPhotos the author name.
+     */
+    putEntry: async (section: keyof HallOfFameData, key: string, value: unknown): Promise<void> => {
+      await apiFetch(`/hall-of-fame/${section}/${encodeURIComponent(key).replace(/%2F/g, '/')}`, {
+        method: 'PUT',
+        body: JSON.stringify(value),
       });
     },
+    deleteEntry: async (section: keyof HallOfFameData, key: string): Promise<void> => {
+      await apiFetch(`/hall-of-fame/${section}/${encodeURIComponent(key).replace(/%2F/g, '/')}`, { method: 'DELETE' });
+    },
   },
 };